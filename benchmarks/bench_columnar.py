@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar departure store against the per-entity object graph.
+
+For feeds of 1k to 50k stop_time_updates, measures the time to apply a parsed
+feed and pick every station's top-k, and the peak memory allocated while doing it.
+
+Usage: python -m benchmarks.bench_columnar [--sizes 1000,5000,...] [--repeat N]
+"""
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.synthetic import build_feed
+from data import columnar
+from data.bart import BARTData
+
+STOPS_PER_TRIP = 10
+
+
+def make_data(columnar_store):
+    config = SimpleNamespace(
+        bart_api_key="", api_refresh_rate=30, preferred_stations=["WCRK"], columnar_store=columnar_store
+    )
+    data = BARTData(config)
+    return data
+
+
+def apply_objects(feed, now):
+    make_data(False)._apply_entities(feed, now)
+
+
+def apply_columnar(feed, now):
+    make_data(True)._apply_columnar(feed, now)
+
+
+def apply_columnar_no_numpy(feed, now):
+    saved, columnar.np = columnar.np, None
+    try:
+        make_data(True)._apply_columnar(feed, now)
+    finally:
+        columnar.np = saved
+
+
+def measure(fn, feed, now, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(feed, now)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(feed, now)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,5000,10000,25000,50000", help="Stop time updates per feed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best time is kept")
+    args = parser.parse_args()
+
+    paths = [("objects", apply_objects), ("columnar", apply_columnar)]
+    if columnar.np is not None:
+        paths.append(("columnar (no numpy)", apply_columnar_no_numpy))
+
+    now = time.time()
+    print(f"{'stop times':>10} {'path':>20} {'time (ms)':>10} {'peak (KiB)':>11}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        feed = build_feed(size // STOPS_PER_TRIP, STOPS_PER_TRIP, now)
+        for name, fn in paths:
+            elapsed, peak = measure(fn, feed, now, args.repeat)
+            print(f"{size:>10} {name:>20} {elapsed * 1000:>10.1f} {peak / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
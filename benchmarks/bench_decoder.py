@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark and validate the field-selective trip update decoder.
+
+For each feed size, times the protobuf parser plus trip_state_from_entity
+against decode_feed plus decoding every entity, and against decode_feed alone,
+which is what a refresh costs when no entity changed. Every decoded TripState
+is checked against the reference parser's. Run it with
+PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=python to compare against protobuf's
+pure Python backend.
+
+With --recording, also validates every trip update payload in a recording made
+with "record_payloads", and reports how many entities differ.
+
+Usage: python -m benchmarks.bench_decoder [--sizes 100,500,1000,2500] [--stops-per-trip 12]
+           [--unknown-share 0.2] [--time-mode arrival|departure|both] [--recording bart.rec]
+"""
+import argparse
+import time
+
+from google.transit import gtfs_realtime_pb2
+
+from benchmarks.synthetic import TIME_MODES, build_payload
+from data.feed_decoder import decode_feed, protobuf_is_pure_python
+from data.recorder import read_recording
+from data.trip_updates import trip_state_from_entity
+
+TRIP_UPDATE_ENDPOINT = "/gtfsrt/tripupdate.aspx"
+
+
+def reference_states(payload):
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    return {entity.id: trip_state_from_entity(entity) for entity in feed.entity if entity.HasField("trip_update")}
+
+
+def decoded_states(payload):
+    _, entities = decode_feed(payload)
+    return {entity.entity_id: entity.decode_trip() for entity in entities if entity.decode_trip is not None}
+
+
+def scan_only(payload):
+    _, entities = decode_feed(payload)
+    return sum(1 for _ in entities)
+
+
+def mismatches(payload):
+    """Entities the decoder reads differently from the reference parser"""
+    reference = reference_states(payload)
+    decoded = decoded_states(payload)
+    return sum(
+        1 for entity_id in reference.keys() | decoded.keys() if reference.get(entity_id) != decoded.get(entity_id)
+    )
+
+
+def best_of(function, payload, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def validate_recording(path):
+    payloads = differing = 0
+    for record in read_recording(path):
+        if record.endpoint != TRIP_UPDATE_ENDPOINT:
+            continue
+        payloads += 1
+        differing += mismatches(record.payload)
+    print(f"{path}: {payloads} trip update payloads, {differing} entities differ from the protobuf parser")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,500,1000,2500", help="Trips per feed")
+    parser.add_argument("--stops-per-trip", type=int, default=12)
+    parser.add_argument("--unknown-share", type=float, default=0.0, help="Share of stop_ids no board knows")
+    parser.add_argument("--time-mode", choices=TIME_MODES, default="arrival")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per size")
+    parser.add_argument("--recording", help="Also validate every trip update payload in this recording")
+    options = parser.parse_args()
+
+    backend = "pure Python" if protobuf_is_pure_python() else "native"
+    print(f"protobuf backend: {backend}")
+    print(f"{'trips':>6} {'KiB':>7} {'protobuf ms':>12} {'decoder ms':>11} {'speedup':>8} {'scan ms':>8} {'differ':>7}")
+    for trips in (int(s) for s in options.sizes.split(",")):
+        payload = build_payload(
+            trips, options.stops_per_trip, unknown_share=options.unknown_share, time_mode=options.time_mode
+        )
+        reference = best_of(reference_states, payload, options.repeats)
+        decoded = best_of(decoded_states, payload, options.repeats)
+        scan = best_of(scan_only, payload, options.repeats)
+        print(
+            f"{trips:>6} {len(payload) / 1024:>7.0f} {reference:>12.2f} {decoded:>11.2f} "
+            f"{reference / decoded:>7.2f}x {scan:>8.2f} {mismatches(payload):>7}"
+        )
+
+    if options.recording:
+        validate_recording(options.recording)
+
+
+if __name__ == "__main__":
+    main()
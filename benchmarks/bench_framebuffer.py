@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy framebuffer backend against drawing directly on the
+matrix driver, at every resolution with a coordinates/w*h*.json.example file.
+
+"primitives" times one call each: a full-screen fill (a SetPixel loop on the
+driver, one slice fill on the framebuffer), a line of text in the layout's
+default font, a corner-to-corner line and the swap, which for the framebuffer
+includes pushing the frame to the driver in one SetImage call. "uncached" is
+the framebuffer drawing text glyph by glyph, without its text cache. "screens"
+repaints each screen in full every frame, for the layouts that have the BART
+board sections.
+
+Both backends end up on the emulator with its headless raw adapter, which
+stands in for the driver here: the direct numbers are per-pixel Python calls,
+as on the Pi, but a hardware swap is cheaper than the emulator's.
+
+Usage: python -m benchmarks.bench_framebuffer [--seconds 1]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions, graphics
+from RGBMatrixEmulator.adapters.raw_adapter import RawAdapter
+
+from benchmarks.bench_render import make_data
+from renderers.departures import DepartureRenderer
+from renderers.framebuffer import BitmapFonts, FramebufferMatrix
+from renderers.system_status import SystemStatusRenderer
+from tests.helpers import COLORS
+
+TEXT = "Walnut Creek 12"
+
+
+class DriverFonts:
+    """The driver's fonts, loaded from the same BDF files as the bitmap fonts"""
+
+    def __init__(self):
+        self.paths = BitmapFonts()
+        self.fonts = {}
+
+    def get_font(self, name):
+        font = self.fonts.get(name)
+        if font is None:
+            font = self.fonts[name] = graphics.Font()
+            font.LoadFont(self.paths.get_font(name).path)
+        return font
+
+
+class DirectCanvas:
+    """A driver canvas with the SetFont and DrawText calls the renderers make, drawn with the driver's graphics"""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.width = canvas.width
+        self.height = canvas.height
+        self.font = None
+
+    def Clear(self):
+        self.canvas.Clear()
+
+    def SetPixel(self, x, y, r, g, b):
+        self.canvas.SetPixel(x, y, r, g, b)
+
+    def SetImage(self, image, x=0, y=0):
+        self.canvas.SetImage(image, x, y)
+
+    def SetFont(self, font):
+        self.font = font
+
+    def DrawText(self, canvas, text, x, y, r, g, b):
+        return graphics.DrawText(self.canvas, self.font, x, y, graphics.Color(r, g, b), text)
+
+    def DrawLine(self, x0, y0, x1, y1, r, g, b):
+        graphics.DrawLine(self.canvas, x0, y0, x1, y1, graphics.Color(r, g, b))
+
+
+class DirectMatrix:
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.width = matrix.width
+        self.height = matrix.height
+
+    def CreateFrameCanvas(self):
+        return DirectCanvas(self.matrix.CreateFrameCanvas())
+
+    def SwapOnVSync(self, canvas):
+        canvas.canvas = self.matrix.SwapOnVSync(canvas.canvas)
+        return canvas
+
+
+def uncached_framebuffer(driver):
+    matrix = FramebufferMatrix(driver)
+    matrix.text_cache = None
+    return matrix
+
+
+def emulated_matrix(width, height):
+    options = RGBMatrixOptions()
+    options.cols = width
+    options.rows = height
+    options.display_adapter = RawAdapter
+    return RGBMatrix(options=options)
+
+
+def layouts():
+    """(width, height, coordinates) for every supported resolution, smallest first"""
+    found = []
+    for path in glob.glob("coordinates/w*h*.json.example"):
+        match = re.match(r"w(\d+)h(\d+)", os.path.basename(path))
+        with open(path) as f:
+            found.append((int(match.group(1)), int(match.group(2)), json.load(f)))
+    return sorted(found, key=lambda layout: layout[0] * layout[1])
+
+
+def per_call(run, seconds):
+    """Microseconds per call of ``run``"""
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        run()
+        calls += 1
+    return 1e6 * (time.perf_counter() - start) / calls
+
+
+def direct_fill(canvas):
+    for x in range(canvas.width):
+        for y in range(canvas.height):
+            canvas.SetPixel(x, y, 0, 0, 255)
+
+
+def primitives(matrix, fonts, coords, seconds):
+    canvas = matrix.CreateFrameCanvas()
+    canvas.SetFont(fonts.get_font(coords.get("defaults", {}).get("font_name", "4x6")))
+    fill = getattr(canvas, "FillRect", None)
+    results = {
+        "fill": per_call(
+            (lambda: fill(0, 0, canvas.width, canvas.height, 0, 0, 255)) if fill else lambda: direct_fill(canvas),
+            seconds,
+        ),
+        "text": per_call(lambda: canvas.DrawText(canvas, TEXT, 0, canvas.height // 2, 255, 255, 255), seconds),
+        "line": per_call(lambda: canvas.DrawLine(0, 0, canvas.width - 1, canvas.height - 1, 255, 0, 0), seconds),
+    }
+
+    def swap():
+        nonlocal canvas
+        canvas = matrix.SwapOnVSync(canvas)
+
+    results["swap"] = per_call(swap, seconds)
+    return results
+
+
+def screens(matrix, data, coords, seconds):
+    with open(COLORS) as f:
+        colors = json.load(f)
+    results = {}
+    for name, renderer_class in (("departures", DepartureRenderer), ("system_status", SystemStatusRenderer)):
+        renderer = renderer_class(matrix, data, colors, coords)
+
+        def repaint():
+            if hasattr(renderer, "invalidate"):
+                renderer.invalidate()
+            renderer.render(data.clock())
+
+        try:
+            results[name] = per_call(repaint, seconds)
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1, help="How long each measurement runs")
+    options = parser.parse_args()
+
+    data = make_data()
+    backends = (
+        ("direct", DirectMatrix, DriverFonts()),
+        ("uncached", uncached_framebuffer, BitmapFonts()),
+        ("framebuffer", FramebufferMatrix, BitmapFonts()),
+    )
+    print(f"{'size':>7} {'backend':>11} {'fill us':>9} {'text us':>9} {'line us':>9} {'swap us':>9}", end="")
+    print(f" {'departures fps':>15} {'status fps':>11}")
+    for width, height, coords in layouts():
+        driver = emulated_matrix(width, height)
+        for backend, wrap, fonts in backends:
+            matrix = wrap(driver)
+            data.font = fonts
+            timings = primitives(matrix, fonts, coords, options.seconds / 4)
+            print(f"{width:>3}x{height:<3} {backend:>11}", end="")
+            print("".join(f" {timings[name]:>9.1f}" for name in ("fill", "text", "line", "swap")), end="")
+            if "departures" in coords:
+                for name, result in screens(matrix, data, coords, options.seconds).items():
+                    width_column = 15 if name == "departures" else 11
+                    if isinstance(result, Exception):
+                        print(f" {'failed':>{width_column}}", end="")
+                    else:
+                        print(f" {1e6 / result:>{width_column}.1f}", end="")
+            print()
+    print("Screens are only timed for layouts with the BART board sections. A failed screen raised while drawing.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingest path: BARTData.update_departures end to end.
+
+Each refresh fetches a synthetic FULL_DATASET payload from an in-process
+transport, so the timing covers change detection, parsing, applying trip
+updates, per-station fan-out and publishing, but no network. Consecutive
+refreshes alternate between two feeds, so no refresh is skipped as unchanged.
+Minutes computation is timed separately, the way the departures board does
+it for every row it shows.
+
+Every size runs in a fresh child process so peak RSS is per size.
+
+Usage: python -m benchmarks.bench_ingest [--sizes 100,500,1000,2500] [--stops-per-trip 12]
+           [--unknown-share 0.2] [--time-mode arrival|departure|both] [--all-stations] [--columnar]
+           [--fast-decoder]
+"""
+import argparse
+import gc
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+
+from google.transit import gtfs_realtime_pb2
+
+from benchmarks.synthetic import TIME_MODES, build_payload
+from data.bart import BARTData
+from data.subscription import Subscription
+from tests.helpers import FakeTransport, make_config
+
+
+def make_data(payloads, now, options):
+    data = BARTData(make_config(columnar_store=options.columnar, fast_decoder=options.fast_decoder))
+    # Payloads in turn, with a fixed clock so countdowns are stable
+    data.transport = FakeTransport(payloads, now=now)
+    data.clock = data.transport.clock
+    if options.all_stations:
+        data.subscription = Subscription()
+    return data
+
+
+def refresh(data):
+    data.last_update = 0
+    data.update_departures()
+
+
+def count_minutes(data, now):
+    rows = 0
+    for station_id, station in data.stations.items():
+        if data.subscription.wants_station(station_id):
+            for departure in station.ordered_departures():
+                departure.minutes_at(now)
+                rows += 1
+    return rows
+
+
+def run_size(trips, options):
+    now = time.time()
+    feed_options = {"unknown_share": options.unknown_share, "time_mode": options.time_mode}
+    # Distinct header timestamps, or the change detector skips the second feed
+    payloads = [build_payload(trips, options.stops_per_trip, now + seed, seed, **feed_options) for seed in (1, 2)]
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payloads[0])
+    entities = len(feed.entity)
+
+    parse = float("inf")
+    for _ in range(options.refreshes):
+        start = time.perf_counter()
+        gtfs_realtime_pb2.FeedMessage().ParseFromString(payloads[0])
+        parse = min(parse, time.perf_counter() - start)
+
+    data = make_data(payloads, now, options)
+    refresh(data)  # warm up the station index and interned strings
+    timings = []
+    for _ in range(options.refreshes):
+        start = time.perf_counter()
+        refresh(data)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    start = time.perf_counter()
+    rows = count_minutes(data, now)
+    minutes = time.perf_counter() - start
+
+    # Allocations, in a separate pass so tracing doesn't skew the timings
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    refresh(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    return {
+        "trips": trips,
+        "stop_times": trips * options.stops_per_trip,
+        "entities_per_sec": entities / timings[0],
+        "parse_ms": parse * 1000,
+        "best_ms": timings[0] * 1000,
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "minutes_ms": minutes * 1000,
+        "rows": rows,
+        "traced_peak_kib": peak / 1024,
+        "retained_blocks": retained,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_isolated(trips, options):
+    """Run one size in a fresh process so its peak RSS isn't inherited from the last"""
+    context = multiprocessing.get_context("fork")
+    results = context.SimpleQueue()
+    child = context.Process(target=lambda: results.put(run_size(trips, options)))
+    child.start()
+    result = results.get()
+    child.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,500,1000,2500", help="Trips per feed")
+    parser.add_argument("--stops-per-trip", type=int, default=12)
+    parser.add_argument("--unknown-share", type=float, default=0.0, help="Share of stop_ids no board knows")
+    parser.add_argument("--time-mode", choices=TIME_MODES, default="arrival")
+    parser.add_argument("--all-stations", action="store_true", help="Build departures for every station")
+    parser.add_argument("--columnar", action="store_true", help="Use the columnar departure store")
+    parser.add_argument(
+        "--fast-decoder", action="store_true", default=None, help="Decode trip updates without the protobuf parser"
+    )
+    parser.add_argument("--refreshes", type=int, default=5, help="Timed refreshes per size")
+    options = parser.parse_args()
+
+    print(
+        f"{'trips':>6} {'stop times':>10} {'entities/s':>11} {'parse ms':>9} {'best ms':>8} {'median ms':>10} "
+        f"{'minutes ms':>11} {'rows':>6} {'peak KiB':>9} {'blocks':>8} {'RSS MiB':>8}"
+    )
+    for trips in (int(s) for s in options.sizes.split(",")):
+        r = run_isolated(trips, options)
+        print(
+            f"{r['trips']:>6} {r['stop_times']:>10} {r['entities_per_sec']:>11.0f} {r['parse_ms']:>9.2f} "
+            f"{r['best_ms']:>8.2f} {r['median_ms']:>10.2f} {r['minutes_ms']:>11.3f} {r['rows']:>6} "
+            f"{r['traced_peak_kib']:>9.0f} {r['retained_blocks']:>8} {r['peak_rss_mib']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
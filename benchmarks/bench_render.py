@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the render loop per screen type: frames per second, frames actually
+drawn per second and CPU use, with frame pacing and without.
+
+"unpaced" is the old loop, which drew and swapped as fast as it could.
+"repaint" is the same, but repaints the whole screen every frame rather than
+just the regions whose content changed.
+"paced" runs each frame through FramePacer, which caps the frame rate and
+skips frames whose fingerprint didn't change. "deadline" also sleeps between
+frames until the renderer's next_change, so fps there counts wake-ups. "ops"
+is canvas calls (pixels, text, images) per frame drawn. Renderers draw on an in-memory
+canvas using the 64x32 layout and colors, so the numbers cover the Python
+drawing work but not the matrix driver.
+
+Usage: python -m benchmarks.bench_render [--seconds 3] [--fps 30]
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.synthetic import build_payload
+from data.bart import BARTData
+from renderers.departures import DepartureRenderer
+from renderers.frame_pacing import DEFAULT_FPS, FramePacer
+from renderers.system_status import SystemStatusRenderer
+from tests.helpers import COLORS, COORDINATES, FakeFonts, FakeMatrix, FakeTransport, make_config
+
+
+def make_data():
+    data = BARTData(make_config(time_format="12h", scrolling_speed=0.2))
+    data.transport = FakeTransport([build_payload(200, 12)])
+    data.font = FakeFonts()
+    data.update_departures()
+    data.snapshots.publish(system_status={"status": "alert", "ticker": "Elevator outage at Walnut Creek"})
+    return data
+
+
+def make_renderers(matrix, data):
+    with open(COORDINATES) as f:
+        coords = json.load(f)
+    with open(COLORS) as f:
+        colors = json.load(f)
+    renderers = {
+        "departures": DepartureRenderer(matrix, data, colors, coords),
+        "system_status": SystemStatusRenderer(matrix, data, colors, coords),
+    }
+    # These draw through the matrix driver, which reads the command line when it's imported
+    sys.argv = sys.argv[:1]
+    try:
+        from renderers.network import NetworkErrorRenderer
+        from renderers.offday import OffdayRenderer
+    except ImportError as e:
+        print(f"Skipping the offday and network error screens: {e}")
+    else:
+        renderers["offday"] = OffdayRenderer(matrix, data, colors, coords)
+        renderers["network_error"] = NetworkErrorRenderer(matrix, data, colors, coords)
+    return renderers
+
+
+def run_unpaced(data, renderer, seconds, repaint=False):
+    frames = 0
+    cpu_start = time.process_time()
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        if repaint and hasattr(renderer, "invalidate"):
+            renderer.invalidate()
+        renderer.render(data.clock())
+        frames += 1
+    wall = time.monotonic() - start
+    return frames, frames / wall, frames / wall, 100 * (time.process_time() - cpu_start) / wall
+
+
+def run_paced(data, renderer, seconds, fps, deadlines=False):
+    pacer = FramePacer(fps)
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        now = data.clock()
+        next_change = renderer.next_change(now) if deadlines else now
+        pacer.frame(
+            "screen",
+            renderer.fingerprint(now),
+            lambda: renderer.render(now),
+            None if next_change is None else next_change - now,
+        )
+    stats = pacer.report()["screen"]
+    return stats.drawn, stats.frames / stats.wall, stats.drawn / stats.wall, 100 * stats.cpu / stats.wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3, help="How long each screen runs in each mode")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="Frame rate cap for the paced loop")
+    options = parser.parse_args()
+
+    data = make_data()
+    matrix = FakeMatrix()
+    renderers = make_renderers(matrix, data)
+    print(f"{'screen':>14} {'mode':>9} {'fps':>9} {'drawn/s':>9} {'CPU %':>6} {'ops':>6}")
+    for name, renderer in renderers.items():
+        for mode, run in (
+            ("repaint", lambda: run_unpaced(data, renderer, options.seconds, repaint=True)),
+            ("unpaced", lambda: run_unpaced(data, renderer, options.seconds)),
+            ("paced", lambda: run_paced(data, renderer, options.seconds, options.fps)),
+            ("deadline", lambda: run_paced(data, renderer, options.seconds, options.fps, deadlines=True)),
+        ):
+            calls = matrix.calls
+            try:
+                frames, fps, drawn, cpu = run()
+            except Exception as e:
+                print(f"{name:>14} {mode:>9} failed to draw: {e!r}")
+                continue
+            ops = (matrix.calls - calls) / max(frames, 1)
+            print(f"{name:>14} {mode:>9} {fps:>9.1f} {drawn:>9.1f} {cpu:>6.1f} {ops:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
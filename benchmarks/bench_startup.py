@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark time to the first useful frame: from creating BARTData until a
+snapshot with departures for the current station is published.
+
+A cold start has to wait for the first trip updates fetch, which goes through
+an in-process transport with a fixed injected latency. A warm start restores
+the snapshot saved by a previous run and has departures to draw before any
+fetch. Both are timed over the same synthetic feed.
+
+Usage: python -m benchmarks.bench_startup [--trips 500] [--latency 1.5] [--runs 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import build_payload
+from data.bart import BARTData
+from tests.helpers import FakeTransport, make_config
+
+
+def make_data(snapshot_file, transport):
+    data = BARTData(make_config(snapshot_file=snapshot_file))
+    data.transport = transport
+    return data
+
+
+def first_useful_frame(snapshot_file, transport):
+    """Seconds until the current station has departures to show, and whether they were restored"""
+    start = time.perf_counter()
+    data = make_data(snapshot_file, transport)
+    station = data.snapshot.station
+    if not station or not station.departures:
+        # Nothing to draw until the first fetch lands
+        data.update_departures()
+        station = data.snapshot.station
+    elapsed = time.perf_counter() - start
+    if not station or not station.departures:
+        raise RuntimeError("no departures after the first fetch")
+    return elapsed, station.saved_at is not None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=500, help="Trips in the synthetic feed")
+    parser.add_argument("--stops-per-trip", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=1.5, help="Seconds the first fetch takes")
+    parser.add_argument("--runs", type=int, default=5)
+    options = parser.parse_args()
+
+    payload = build_payload(options.trips, options.stops_per_trip, time.time(), 1)
+    # One payload after a fixed delay, like a slow first request over the network
+    transport = FakeTransport([payload], latency=options.latency)
+    directory = tempfile.mkdtemp()
+    snapshot_file = os.path.join(directory, "snapshot.bin")
+    try:
+        # Run once to leave a saved snapshot behind, as a previous boot would
+        data = make_data(snapshot_file, transport)
+        data.update_departures()
+        data.save_snapshot(data.clock())
+
+        print(f"{'start':>6} {'best ms':>9} {'median ms':>10} {'restored':>9}")
+        for label, path in (("cold", None), ("warm", snapshot_file)):
+            results = sorted(first_useful_frame(path, transport) for _ in range(options.runs))
+            print(
+                f"{label:>6} {results[0][0] * 1000:>9.1f} {results[len(results) // 2][0] * 1000:>10.1f} "
+                f"{str(results[0][1]):>9}"
+            )
+    finally:
+        for name in os.listdir(directory):
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for station departure lookups.
+
+Compares the old lookup (linear scan over every station plus a full sort of its
+departures on each call) with the prebuilt station index and top-k view that
+BARTData builds once per feed.
+
+Usage: python -m benchmarks.bench_station_lookup [--departures N] [--iterations N]
+"""
+import argparse
+import random
+import time
+import timeit
+from types import SimpleNamespace
+
+from data.bart import BARTData, BARTDeparture
+
+LOOKUPS = ["WCRK", "Powell St.", "embr", "Civic Center/UN Plaza", "DALY"]
+
+
+def build_data(departures_per_station):
+    config = SimpleNamespace(bart_api_key="", api_refresh_rate=30, preferred_stations=["WCRK"])
+    data = BARTData(config)
+    rng = random.Random(1)
+    now = time.time()
+    for station in data.stations.values():
+        departures = [
+            BARTDeparture("Dest", now + rng.randint(0, 90) * 60, "1", "N", "yellow", 10)
+            for _ in range(departures_per_station)
+        ]
+        station.set_departures(departures, data._max_rows())
+    return data
+
+
+def linear_lookup(data, station_name):
+    """The lookup as it was before the station index existed"""
+    station = None
+    for s in data.stations.values():
+        if s.name.lower() == station_name.lower() or s.abbreviation.lower() == station_name.lower():
+            station = s
+            break
+    return sorted(station.departures, key=lambda d: d.arrival_time)[: data._max_rows()]
+
+
+def indexed_lookup(data, station_name):
+    return data.find_station(station_name).next_departures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--departures", type=int, default=40, help="Departures per station (Default: 40)")
+    parser.add_argument("--iterations", type=int, default=20000, help="Lookups per measurement (Default: 20000)")
+    args = parser.parse_args()
+
+    data = build_data(args.departures)
+    for name, fn in (("linear scan + sort", linear_lookup), ("index + top-k", indexed_lookup)):
+        elapsed = timeit.timeit(
+            lambda: [fn(data, station) for station in LOOKUPS], number=args.iterations // len(LOOKUPS)
+        )
+        per_lookup = elapsed / args.iterations * 1e6
+        print(f"{name:>20}: {per_lookup:8.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
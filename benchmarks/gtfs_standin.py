@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the BART GTFS-RT API, with fault and latency injection.
+
+Serves /gtfsrt/tripupdate.aspx, /gtfsrt/alerts.aspx and /api/stn.aspx from a
+payload recording (see data.recorder) or from synthetic feeds, and degrades
+responses on request: latency drawn from a distribution, HTTP errors,
+truncated or garbage protobuf bodies, connections dropped mid-body and
+slow-drip bodies. Point BARTData at it with the ``bart_api_base`` config option.
+
+Usage: python -m benchmarks.gtfs_standin [--port 8080] [--recording FILE]
+           [--latency lognormal:-2.3,0.8] [--error-rate 0.05] [--truncate-rate 0.02]
+           [--garbage-rate 0.02] [--drop-rate 0.01] [--slow-drip-rate 0.05]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from google.transit import gtfs_realtime_pb2
+
+from benchmarks.synthetic import build_payload
+from data.bart import BARTData
+from data.recorder import read_recording
+
+TRIP_UPDATES = "/gtfsrt/tripupdate.aspx"
+ALERTS = "/gtfsrt/alerts.aspx"
+STATIONS = "/api/stn.aspx"
+
+# What a captive portal or failing proxy returns instead of protobuf
+GARBAGE_BODY = b"<html><head><title>502 Bad Gateway</title></head><body>Bad Gateway</body></html>"
+
+LatencyDistribution = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """
+    Parse a latency distribution in seconds:
+    ``fixed:S``, ``uniform:LOW,HIGH``, ``normal:MEAN,STDDEV``, ``exponential:MEAN``
+    or ``lognormal:MU,SIGMA`` (of the underlying normal, so ``lognormal:-2.3,0.8``
+    has a median of about 100ms and a long tail).
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",")] if args else []
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+class FaultProfile(NamedTuple):
+    """How often each kind of fault is injected, as a probability per request"""
+
+    latency: LatencyDistribution = parse_latency("fixed:0")
+    error_rate: float = 0.0  # 503 Service Unavailable
+    truncate_rate: float = 0.0  # a complete response whose protobuf body is cut short
+    garbage_rate: float = 0.0  # a complete response with a non-protobuf body
+    drop_rate: float = 0.0  # the connection closes partway through the body
+    slow_drip_rate: float = 0.0  # the body arrives a few bytes at a time
+    drip_chunk: int = 64  # bytes per slow-drip write
+    drip_interval: float = 0.25  # seconds between slow-drip writes
+
+
+class PayloadSource:
+    """
+    Payloads per endpoint. A recording is served in order and loops; without
+    one, trip updates are synthesized fresh for every request.
+    """
+
+    def __init__(self, recording: Optional[str] = None, trips: int = 60, stops_per_trip: int = 12):
+        self.trips = trips
+        self.stops_per_trip = stops_per_trip
+        self.recorded: Dict[str, List[bytes]] = {}
+        self.positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if recording:
+            for record in read_recording(recording):
+                self.recorded.setdefault(record.endpoint, []).append(record.payload)
+
+    def payload(self, endpoint: str) -> Optional[bytes]:
+        with self._lock:
+            payloads = self.recorded.get(endpoint)
+            if payloads:
+                position = self.positions.get(endpoint, 0)
+                self.positions[endpoint] = (position + 1) % len(payloads)
+                return payloads[position]
+
+        if endpoint == TRIP_UPDATES:
+            return build_payload(self.trips, self.stops_per_trip, seed=int(time.time()) // 30)
+        if endpoint == ALERTS:
+            feed = gtfs_realtime_pb2.FeedMessage()
+            feed.header.gtfs_realtime_version = "2.0"
+            feed.header.timestamp = int(time.time())
+            return feed.SerializeToString()
+        if endpoint == STATIONS:
+            stations = [
+                {"abbr": station.abbreviation, "name": station.name}
+                for station in BARTData._initialize_stations(None).values()
+            ]
+            return json.dumps({"root": {"stations": {"station": stations}}}).encode("utf-8")
+        return None
+
+
+class StandInStats:
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def __str__(self):
+        return " ".join(f"{outcome}={count}" for outcome, count in sorted(self.counts.items()))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        endpoint = urlsplit(self.path).path
+        body = server.source.payload(endpoint)
+        if body is None:
+            server.stats.count("not_found")
+            self._respond(404, b"")
+            return
+
+        faults = server.faults
+        with server.rng_lock:
+            latency = faults.latency(server.rng)
+            roll = server.rng.random()
+        time.sleep(latency)
+
+        # One fault at most per request, picked from a single roll
+        for outcome, rate in (
+            ("error", faults.error_rate),
+            ("truncated", faults.truncate_rate),
+            ("garbage", faults.garbage_rate),
+            ("dropped", faults.drop_rate),
+            ("slow_drip", faults.slow_drip_rate),
+        ):
+            if roll < rate:
+                break
+            roll -= rate
+        else:
+            outcome = "ok"
+        server.stats.count(outcome)
+
+        if outcome == "error":
+            self._respond(503, b"Service Unavailable")
+        elif outcome == "truncated":
+            self._respond(200, body[: len(body) // 2])
+        elif outcome == "garbage":
+            self._respond(200, GARBAGE_BODY, "text/html")
+        elif outcome == "dropped":
+            self._start(200, len(body))
+            self.wfile.write(body[: len(body) // 3])
+            self.close_connection = True
+        elif outcome == "slow_drip":
+            self._start(200, len(body))
+            for start in range(0, len(body), faults.drip_chunk):
+                self.wfile.write(body[start : start + faults.drip_chunk])  # noqa: E203
+                self.wfile.flush()
+                time.sleep(faults.drip_interval)
+        else:
+            self._respond(200, body)
+
+    def _start(self, status: int, length: int, content_type: str = "application/octet-stream") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _respond(self, status: int, body: bytes, content_type: str = "application/octet-stream") -> None:
+        self._start(status, len(body), content_type)
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, source: PayloadSource, faults: FaultProfile = FaultProfile(), seed: int = 1):
+        super().__init__(address, StandInHandler)
+        self.source = source
+        self.faults = faults
+        self.stats = StandInStats()
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve from a daemon thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--recording", help="Payload recording to serve instead of synthetic feeds")
+    parser.add_argument("--trips", type=int, default=60, help="Trips per synthetic feed")
+    parser.add_argument("--stops-per-trip", type=int, default=12)
+    parser.add_argument("--latency", type=parse_latency, default=parse_latency("fixed:0"))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--garbage-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--slow-drip-rate", type=float, default=0.0)
+    parser.add_argument("--drip-chunk", type=int, default=64)
+    parser.add_argument("--drip-interval", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        args.latency,
+        args.error_rate,
+        args.truncate_rate,
+        args.garbage_rate,
+        args.drop_rate,
+        args.slow_drip_rate,
+        args.drip_chunk,
+        args.drip_interval,
+    )
+    source = PayloadSource(args.recording, args.trips, args.stops_per_trip)
+    server = StandInServer((args.host, args.port), source, faults, args.seed)
+    print(f"Serving BART GTFS-RT stand-in on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.stats)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic GTFS-RT trip update feeds for benchmarks.
+"""
+import random
+import time
+
+from google.transit import gtfs_realtime_pb2
+
+from data.bart import BARTData
+
+STATION_IDS = list(BARTData._initialize_stations(None))
+ROUTE_IDS = [
+    "ROUTE 1",
+    "ROUTE 2",
+    "ROUTE 3",
+    "ROUTE 4",
+    "ROUTE 5",
+    "ROUTE 6",
+    "ROUTE 7",
+    "ROUTE 8",
+    "ROUTE 11",
+    "ROUTE 12",
+]
+DESTINATIONS = ["MLBR", "SFIA", "RICH", "BERY", "DALY", "DUBL", "PITT", "ANTC"]
+
+# Which StopTimeEvent each stop_time_update carries
+ARRIVAL = "arrival"
+DEPARTURE = "departure"
+BOTH = "both"
+TIME_MODES = (ARRIVAL, DEPARTURE, BOTH)
+
+
+def build_feed(
+    trips: int,
+    stops_per_trip: int,
+    now: float = None,
+    seed: int = 1,
+    unknown_share: float = 0.0,
+    time_mode: str = ARRIVAL,
+) -> gtfs_realtime_pb2.FeedMessage:
+    """
+    A FULL_DATASET feed with ``trips`` trip updates of ``stops_per_trip`` stop time updates each.
+
+    ``unknown_share`` of the stop_time_updates use stop_ids no board knows about,
+    as platforms and yards do in the live feed. ``time_mode`` picks whether each
+    one carries an arrival, a departure, or both (departure 30s after arrival).
+    """
+    if time_mode not in TIME_MODES:
+        raise ValueError(f"time_mode must be one of {TIME_MODES}")
+    now = time.time() if now is None else now
+    rng = random.Random(seed)
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = int(now)
+
+    for trip in range(trips):
+        entity = feed.entity.add()
+        entity.id = f"{trip}"
+        trip_update = entity.trip_update
+        trip_update.trip.trip_id = f"{trip}-{rng.choice(DESTINATIONS)}"
+        trip_update.trip.route_id = rng.choice(ROUTE_IDS)
+        arrival = int(now) + rng.randint(-120, 600)
+        for stop in range(stops_per_trip):
+            update = trip_update.stop_time_update.add()
+            if unknown_share and rng.random() < unknown_share:
+                update.stop_id = f"X{(trip + stop) % 97:02d}"
+            else:
+                update.stop_id = STATION_IDS[(trip + stop) % len(STATION_IDS)]
+            delay = rng.choice((0, 0, 0, 60, 120))
+            if time_mode != DEPARTURE:
+                update.arrival.time = arrival
+                update.arrival.delay = delay
+            if time_mode != ARRIVAL:
+                update.departure.time = arrival + (30 if time_mode == BOTH else 0)
+                update.departure.delay = delay
+            arrival += rng.randint(90, 240)
+    return feed
+
+
+def build_payload(trips: int, stops_per_trip: int, now: float = None, seed: int = 1, **options) -> bytes:
+    return build_feed(trips, stops_per_trip, now, seed, **options).SerializeToString()
@@ -0,0 +1,152 @@
+"""
+Service alerts from the GTFS-RT alerts feed, indexed by the stations and lines they affect.
+
+The feed is parsed only when its payload changes. An alert whose entity id
+and content hash match the previous payload keeps its existing read-only dict,
+so renderers comparing by identity see nothing new. Alerts repeated under
+several entity ids are kept once.
+
+Each alert is indexed by the stations and lines its ``informed_entity``
+selectors name, through their stop and route ids. Alerts naming neither apply
+system-wide. A station's alerts and its composed ticker string are then one
+dictionary lookup, cached until the alerts change.
+"""
+import hashlib
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+TICKER_SEPARATOR = " | "
+DEFAULT_TITLE = "Alert"
+
+
+def _translation(text) -> str:
+    """The English translation of a TranslatedString, or the first one"""
+    for translation in text.translation:
+        if translation.language in ("", "en"):
+            return translation.text
+    return text.translation[0].text if text.translation else ""
+
+
+def compose_ticker(alerts: Iterable[Mapping]) -> str:
+    return TICKER_SEPARATOR.join(alert["title"] for alert in alerts)
+
+
+class AlertIndex:
+    """The current alerts, with lookups by station and by line"""
+
+    def __init__(
+        self, station_for: Optional[Callable[[str], str]] = None, line_for: Optional[Callable[[str], str]] = None
+    ):
+        # Map a GTFS stop id (e.g. a platform) to its station, and a route id to its line color
+        self.station_for = station_for or (lambda stop_id: stop_id)
+        self.line_for = line_for or (lambda route_id: route_id)
+        self.alerts: Tuple[Mapping, ...] = ()
+        self.version = 0
+        self._known: Dict[Tuple[str, bytes], Mapping] = {}  # (entity id, digest) -> alert
+        self._system_wide: Tuple[Mapping, ...] = ()
+        self._by_station: Dict[str, List[Mapping]] = {}
+        self._by_line: Dict[str, List[Mapping]] = {}
+        self._station_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple[Mapping, ...], str]] = {}
+
+    def update(self, feed) -> bool:
+        """Index the alerts in a parsed FeedMessage. Returns True if the set of alerts changed."""
+        known = {}
+        alerts = []
+        digests = set()
+        for entity in feed.entity:
+            if not entity.HasField("alert") or entity.is_deleted:
+                continue
+            digest = hashlib.blake2b(entity.alert.SerializeToString(), digest_size=16).digest()
+            if digest in digests:
+                # The same alert published under another entity id
+                continue
+            digests.add(digest)
+            key = (entity.id, digest)
+            alert = self._known.get(key)
+            if alert is None:
+                alert = self._build_alert(entity)
+            known[key] = alert
+            alerts.append(alert)
+
+        self._known = known
+        return self._set_alerts(tuple(alerts))
+
+    def replace(self, alerts: Iterable[Mapping]) -> bool:
+        """
+        Take alerts already built elsewhere, e.g. by the shared feed's fetcher.
+        Alerts equal to current ones keep their existing dicts. Returns True if the alerts changed.
+        """
+        current = {alert['id']: alert for alert in self.alerts}
+        replaced = []
+        for alert in alerts:
+            existing = current.get(alert['id'])
+            replaced.append(existing if existing == alert else MappingProxyType(dict(alert)))
+        self._known = {}
+        return self._set_alerts(tuple(replaced))
+
+    def _set_alerts(self, alerts: Tuple[Mapping, ...]) -> bool:
+        if len(alerts) == len(self.alerts) and all(a is b for a, b in zip(alerts, self.alerts)):
+            return False
+        self.alerts = alerts
+        self._build_index()
+        self.version += 1
+        return True
+
+    def _build_alert(self, entity) -> Mapping:
+        alert = entity.alert
+        station_ids = set()
+        lines = set()
+        for selector in alert.informed_entity:
+            if selector.stop_id:
+                station_ids.add(self.station_for(selector.stop_id))
+            if selector.route_id:
+                lines.add(self.line_for(selector.route_id))
+            elif selector.HasField("trip") and selector.trip.route_id:
+                lines.add(self.line_for(selector.trip.route_id))
+        return MappingProxyType(
+            {
+                'id': entity.id,
+                'title': _translation(alert.header_text) or DEFAULT_TITLE,
+                'description': _translation(alert.description_text),
+                'effect': alert.effect,
+                'cause': alert.cause,
+                'station_ids': tuple(sorted(station_ids)),
+                'lines': tuple(sorted(lines)),
+            }
+        )
+
+    def _build_index(self) -> None:
+        system_wide = []
+        self._by_station = {}
+        self._by_line = {}
+        for alert in self.alerts:
+            if not alert['station_ids'] and not alert['lines']:
+                system_wide.append(alert)
+            for station_id in alert['station_ids']:
+                self._by_station.setdefault(station_id, []).append(alert)
+            for line in alert['lines']:
+                self._by_line.setdefault(line, []).append(alert)
+        self._system_wide = tuple(system_wide)
+        self._station_cache = {}
+
+    def for_station(self, station_id: Optional[str], lines: Iterable[str] = ()) -> Tuple[Tuple[Mapping, ...], str]:
+        """
+        The alerts relevant to a station board, and their ticker string: system-wide
+        alerts, alerts naming the station, and alerts naming any of ``lines``
+        """
+        key = (station_id, tuple(sorted(set(lines))))
+        cached = self._station_cache.get(key)
+        if cached is not None:
+            return cached
+
+        relevant = {id(alert): alert for alert in self._system_wide}
+        for alert in self._by_station.get(station_id, ()):
+            relevant[id(alert)] = alert
+        for line in key[1]:
+            for alert in self._by_line.get(line, ()):
+                relevant[id(alert)] = alert
+        # Keep the feed's order
+        order = {id(alert): position for position, alert in enumerate(self.alerts)}
+        alerts = tuple(sorted(relevant.values(), key=lambda alert: order[id(alert)]))
+        cached = self._station_cache[key] = (alerts, compose_ticker(alerts))
+        return cached
@@ -1,42 +1,270 @@
-import requests
+import heapq
 import time
 from google.transit import gtfs_realtime_pb2
 import logging
 import debug
-from typing import Dict, List, Optional, Tuple
+from data.alerts import AlertIndex
+from data.columnar import ColumnarDepartures
+from data.feed_changes import FeedChangeDetector
+from data.feed_decoder import decode_feed, protobuf_is_pure_python
+from data.fetch_policy import STALENESS_LIMIT, FetchPolicy, NetworkState
+from data.poll_schedule import PollScheduler, ServiceCalendar
+from data.recorder import PayloadRecorder, RecordingTransport, ReplayTransport
+from data.static_gtfs import StaticGTFS
+from data.timetable import Timetable
+from data.snapshot import DataSnapshot, SnapshotPublisher, StationSnapshot, WeatherSnapshot, freeze_status
+from data.shared_feed import SharedFeedReader
+from data.snapshot_store import WRITE_INTERVAL, SnapshotStore
+from data.subscription import Subscription
+from data.transport import BART_API_BASE, BARTTransport
+from data.trip_updates import TripState, TripUpdateApplier, entity_records
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_MAX_ROWS = 3
+
+# Used when no static GTFS feed is configured, or it doesn't cover a route, trip or stop
+LINE_COLORS = {
+    "ROUTE 1": "yellow",  # Antioch - SFO/Millbrae
+    "ROUTE 2": "yellow",  # Pittsburg/Bay Point - SFO/Millbrae
+    "ROUTE 3": "orange",  # Richmond - Warm Springs/South Fremont
+    "ROUTE 4": "orange",  # Richmond - Warm Springs/South Fremont
+    "ROUTE 5": "green",   # Warm Springs/South Fremont - Daly City
+    "ROUTE 6": "green",   # Warm Springs/South Fremont - Daly City
+    "ROUTE 7": "red",     # Warm Springs/South Fremont - Richmond
+    "ROUTE 8": "red",     # Warm Springs/South Fremont - Richmond
+    "ROUTE 11": "blue",   # Dublin/Pleasanton - Daly City
+    "ROUTE 12": "blue"    # Dublin/Pleasanton - Daly City
+}
+DEFAULT_PLATFORM = "1"
+DEFAULT_DIRECTION = "N"
+DEFAULT_TRAIN_LENGTH = 10  # not in static GTFS
+
+
+def departure_sort_key(departure) -> float:
+    """Ordering used for every departure list: soonest train first"""
+    return departure.arrival_time
+
+
+def normalize_station_key(key: str) -> str:
+    """Normalize a station name or abbreviation for index lookups"""
+    return key.strip().lower()
+
 
 class BARTStation:
+    __slots__ = (
+        "name", "abbreviation", "station_id", "departures", "next_departures", "last_updated", "limit", "_ordered",
+        "scheduled", "saved_at"
+    )
+
     def __init__(self, name: str, abbreviation: str, station_id: str):
         self.name = name
         self.abbreviation = abbreviation
         self.station_id = station_id
         self.departures = []
+        # Top-k view of departures, sized to the layout's max_rows
+        self.next_departures = []
         self.last_updated = 0
+        self.limit = DEFAULT_MAX_ROWS
+        self._ordered = True
+        # True while the departures come from the timetable rather than the realtime feed
+        self.scheduled = False
+        # When the departures were saved, while they're restored from a saved snapshot
+        self.saved_at: Optional[float] = None
+
+    def set_departures(
+        self,
+        departures: List["BARTDeparture"],
+        limit: int = DEFAULT_MAX_ROWS,
+        scheduled: bool = False,
+        saved_at: Optional[float] = None,
+    ) -> None:
+        """Replace this station's departures and rebuild the top-k view with a bounded heap"""
+        self.scheduled = scheduled
+        self.saved_at = saved_at
+        self.limit = limit
+        self.departures = departures
+        self.next_departures = heapq.nsmallest(limit, departures, key=departure_sort_key)
+        self._ordered = len(departures) <= 1
+
+    def evict_departed(self, now: float) -> bool:
+        """
+        Drop trains that have already left as of ``now``.
+        Only scans the full list when the soonest train in the top-k view has gone.
+        """
+        if not self.next_departures or not self.next_departures[0].departed(now):
+            return False
+        self.set_departures(
+            [d for d in self.departures if not d.departed(now)], self.limit, self.scheduled, self.saved_at
+        )
+        return True
+
+    def ordered_departures(self) -> List["BARTDeparture"]:
+        """All departures, soonest first. Sorted at most once per feed."""
+        if not self._ordered:
+            self.departures.sort(key=departure_sort_key)
+            self._ordered = True
+        return self.departures
+
+class BARTDeparture(NamedTuple):
+    """
+    A single predicted train at a station. Immutable, and stored as a tuple so
+    it carries no per-instance __dict__; string fields are interned by BARTData
+    so departures share one object per distinct destination and line color.
+    """
+
+    destination_name: str
+    arrival_time: float  # Predicted epoch seconds, delay already included
+    platform: str
+    direction: str
+    line_color: str
+    train_length: int
+    delay: int = 0
+
+    def minutes_at(self, now: float) -> int:
+        """Whole minutes until this train arrives, as seen at ``now``"""
+        return int((self.arrival_time - now) / 60)
+
+    def departed(self, now: float) -> bool:
+        return self.minutes_at(now) < 0
+
+    def next_change_at(self, now: float) -> float:
+        """When minutes_at next changes after ``now``. Minutes truncate toward zero, so 0 lasts two minutes."""
+        minutes = self.minutes_at(now)
+        if minutes > 0:
+            return self.arrival_time - minutes * 60
+        return self.arrival_time - (minutes - 1) * 60
+
+    @property
+    def minutes(self) -> int:
+        return self.minutes_at(time.time())
 
-class BARTDeparture:
-    def __init__(self, destination_name: str, minutes: int, platform: str, direction: str, 
-                 line_color: str, train_length: int, delay: int = 0):
-        self.destination_name = destination_name
-        self.minutes = minutes
-        self.platform = platform
-        self.direction = direction
-        self.line_color = line_color
-        self.train_length = train_length
-        self.delay = delay
 
 class BARTData:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('bartled')
         self.api_key = config.bart_api_key
+        self.transport = self._build_transport()
+        # Wall clock for countdowns; a replay supplies the recorded time instead
+        self.clock = getattr(self.transport, 'clock', time.time)
         self.stations = self._initialize_stations()
-        self.base_url = "https://api.bart.gov/gtfsrt/tripupdate.aspx"
-        self.station_url = "https://api.bart.gov/api/stn.aspx"
-        self.alert_url = "https://api.bart.gov/gtfsrt/alerts.aspx"
+        # Route, trip and stop tables from a local static GTFS zip, if configured
+        self.static_gtfs = self._load_static_gtfs()
+        # Scheduled departures to show while the realtime feed is down or warming up
+        self.timetable = self._load_timetable()
+        self.using_timetable = False
+        # Backoff, circuit breaking and staleness limits per endpoint
+        staleness_limit = getattr(config, 'staleness_limit', STALENESS_LIMIT)
+        self.trip_policy = FetchPolicy("trip updates", staleness_limit)
+        self.alert_policy = FetchPolicy("alerts", staleness_limit)
+        # It takes a few failed polls in a row to show the network error screen, and a few good ones to clear it
+        self.network_state = NetworkState(
+            getattr(config, 'network_error_after', 3), getattr(config, 'network_recovery_after', 2)
+        )
+        # Last published system status, served until the alerts go stale
+        self.system_status: Optional[Dict] = None
+        self.alert_changes = FeedChangeDetector()
+        self.alerts = AlertIndex(
+            self.static_gtfs.station_for if self.static_gtfs else None, lambda route_id: self.get_line_color(route_id)
+        )
+        # bart_api_base points every endpoint at another server, e.g. a local stand-in
+        api_base = getattr(config, 'bart_api_base', None) or BART_API_BASE
+        self.base_url = f"{api_base}/gtfsrt/tripupdate.aspx"
+        self.station_url = f"{api_base}/api/stn.aspx"
+        self.alert_url = f"{api_base}/gtfsrt/alerts.aspx"
         self.last_update = 0
+        # Departures and alerts published by a fetcher process on this host, instead of polling
+        shared_feed = getattr(config, 'shared_feed', None)
+        self.shared_feed = SharedFeedReader(shared_feed) if shared_feed else None
+        self.trip_changes = FeedChangeDetector()
+        self.trip_updates = TripUpdateApplier()
+        # Optional array-backed store that skips building objects for rows nobody sees
+        self.columnar_store = getattr(config, 'columnar_store', False)
+        self.columnar_departures = None
+        # Read trip updates straight from the payload instead of through the protobuf parser,
+        # by default only where that parser is pure Python and slower than the decoder
+        self.fast_decoder = getattr(config, 'fast_decoder', None)
+        if self.fast_decoder is None:
+            self.fast_decoder = protobuf_is_pure_python()
+        # Destinations and line colors shared by every departure
+        self.interned: Dict[str, str] = {}
         self.update_frequency = config.api_refresh_rate or 30  # Default to 30 seconds
+        if isinstance(self.transport, ReplayTransport) and not self.transport.realtime:
+            # Every poll takes the next recorded payload
+            self.update_frequency = 0
+        # Polls follow the nearest departure and BART's service hours
+        self.scheduler = PollScheduler(
+            ServiceCalendar(getattr(config, 'end_of_day', None)),
+            getattr(config, 'full_refresh_time', None),
+            self.update_frequency,
+        )
+        self.poll_interval = self.update_frequency
         self.current_station = None
         self._set_default_station()
+        self.station_index = self._build_station_index()
+        # Only the stations and lines on screen get departure objects
+        self.subscription = self._build_subscription()
+        # Immutable snapshots handed to the render thread
+        self.snapshots = SnapshotPublisher()
+        # The last snapshot saved to disk, shown at startup until fresh data arrives
+        snapshot_file = getattr(config, 'snapshot_file', None)
+        self.snapshot_store = None
+        if snapshot_file:
+            self.snapshot_store = SnapshotStore(
+                snapshot_file, getattr(config, "snapshot_write_interval", WRITE_INTERVAL)
+            )
+        if not self.restore_snapshot(self.clock()) and not self.show_timetable(self.clock()):
+            self.publish_station()
+
+    def _build_transport(self):
+        """
+        HTTP transport, or a recorded session from ``replay_file`` in its place.
+        ``record_file`` appends every payload fetched to a recording.
+        """
+        replay_file = getattr(self.config, 'replay_file', None)
+        if replay_file:
+            realtime = getattr(self.config, 'replay_realtime', True)
+            debug.info(f"Replaying BART payloads from {replay_file}{' in real time' if realtime else ''}")
+            return ReplayTransport(replay_file, realtime=realtime, loop=getattr(self.config, 'demo_mode', False))
+
+        transport = BARTTransport(self.api_key)
+        record_file = getattr(self.config, 'record_file', None)
+        if record_file:
+            debug.info(f"Recording BART payloads to {record_file}")
+            transport = RecordingTransport(transport, PayloadRecorder(record_file))
+        return transport
+
+    def _load_static_gtfs(self) -> Optional[StaticGTFS]:
+        """Load the compiled static GTFS tables and add any stations they know that we don't"""
+        path = getattr(self.config, 'static_gtfs', None)
+        if not path:
+            return None
+        try:
+            static = StaticGTFS.load(path)
+        except Exception as e:
+            self.logger.error(f"Error loading static GTFS from {path}: {e}")
+            debug.error(f"Error loading static GTFS from {path}: {e}")
+            return None
+        for station_id, name in static.stations.items():
+            if station_id not in self.stations:
+                self.stations[station_id] = BARTStation(name, station_id, station_id)
+        return static
+
+    @property
+    def network_issues(self) -> bool:
+        return self.network_state.down
+
+    def _load_timetable(self) -> Optional[Timetable]:
+        """Map the timetable compiled from the static GTFS zip, unless timetable_fallback is off"""
+        path = getattr(self.config, 'static_gtfs', None)
+        if not path or not self.static_gtfs or not getattr(self.config, 'timetable_fallback', True):
+            return None
+        try:
+            return Timetable.load(path, self.static_gtfs)
+        except Exception as e:
+            self.logger.error(f"Error loading timetable from {path}: {e}")
+            debug.error(f"Error loading timetable from {path}: {e}")
+            return None
 
     def _initialize_stations(self) -> Dict[str, BARTStation]:
         """Initialize all BART stations"""
@@ -117,93 +345,424 @@ class BARTData:
                 self.current_station = self.stations["WCRK"]
                 debug.info(f"Falling back to Walnut Creek station")
 
+    def _build_station_index(self) -> Dict[str, BARTStation]:
+        """Map normalized station names and abbreviations to their station"""
+        index = {}
+        for station in self.stations.values():
+            index[normalize_station_key(station.abbreviation)] = station
+            index[normalize_station_key(station.name)] = station
+        return index
+
+    def _build_subscription(self) -> Subscription:
+        """Subscribe to the preferred stations (plus the current one) and the preferred lines"""
+        preferred_stations = getattr(self.config, 'preferred_stations', None)
+        if not preferred_stations:
+            return Subscription(None, getattr(self.config, 'preferred_lines', None))
+
+        station_ids = set()
+        for name in preferred_stations:
+            station = self.stations.get(name) or self.find_station(name)
+            if station:
+                station_ids.add(station.station_id)
+        if self.current_station:
+            station_ids.add(self.current_station.station_id)
+        return Subscription(station_ids, getattr(self.config, 'preferred_lines', None))
+
+    def subscribe(self, station: BARTStation, current_time: Optional[float] = None) -> None:
+        """
+        Start showing ``station``. Its departures are built from the trip state
+        kept from the last feed, so no refetch is needed.
+        """
+        if not self.subscription.add_station(station.station_id):
+            return
+        debug.log(f"Subscribed to {station.name}")
+        current_time = self.clock() if current_time is None else current_time
+        if self.columnar_store:
+            self._refresh_columnar([station.station_id], current_time)
+        else:
+            self.trip_updates.rebuild(lambda trip: self._build_trip_departures(trip, current_time))
+            self._refresh_stations([station.station_id], current_time)
+        if self.using_timetable:
+            self.show_timetable(current_time)
+        elif station is self.current_station:
+            self.publish_station()
+
+    @property
+    def snapshot(self) -> DataSnapshot:
+        """The latest published snapshot. Safe to read from any thread without locking."""
+        return self.snapshots.current
+
+    def publish_station(self) -> None:
+        """Publish the current station's departures to the render thread"""
+        station = StationSnapshot.from_station(self.current_station) if self.current_station else None
+        self.snapshots.publish(station=station)
+
+    def publish_weather(self, weather) -> None:
+        """Publish a copy of the weather to the render thread"""
+        self.snapshots.publish(weather=WeatherSnapshot.from_weather(weather))
+
+    def restore_snapshot(self, current_time: float) -> bool:
+        """
+        Show the last saved snapshot, marked with its age, until fresh data arrives.
+        Returns True if the current station's departures were restored.
+        """
+        if self.snapshot_store is None:
+            return False
+        restored = self.snapshot_store.load(current_time, BARTDeparture._make)
+        if restored is None:
+            return False
+
+        saved = restored.station
+        station = self.current_station
+        departures = []
+        if station is not None and saved.station_id == station.station_id:
+            departures = [departure for departure in saved.departures if not departure.departed(current_time)]
+        if departures:
+            station.set_departures(departures, self._max_rows(), saved.scheduled, saved.saved_at)
+            if not saved.scheduled:
+                # The saved departures count toward the staleness limit like any other realtime data
+                self.trip_policy.last_success = saved.saved_at
+        self.snapshots.publish(
+            station=StationSnapshot.from_station(station) if station else None,
+            system_status=restored.system_status,
+            weather=restored.weather,
+        )
+        # No need to write back what was just read
+        self.snapshot_store.saved_version = self.snapshot.version
+        debug.info(f"Restored a snapshot saved {current_time - saved.saved_at:.0f}s ago")
+        return bool(departures)
+
+    def save_snapshot(self, current_time: float) -> None:
+        """Save the current snapshot for the next start, at most once per write interval"""
+        if self.snapshot_store is not None:
+            self.snapshot_store.save(self.snapshot, current_time)
+
+    def evict_departed(self, current_time: float) -> None:
+        """Drop trains that have left from the subscribed stations, republishing if the board changed"""
+        for station_id, station in self.stations.items():
+            if self.subscription.wants_station(station_id) and station.evict_departed(current_time):
+                if self.using_timetable:
+                    # Top the board back up with the next scheduled trains
+                    self.show_timetable(current_time)
+                    return
+                if station is self.current_station:
+                    self.publish_station()
+
+    def show_timetable(self, current_time: float) -> bool:
+        """
+        Fill the subscribed stations with scheduled departures, marked as
+        scheduled, until the realtime feed is back. Returns False without a timetable.
+        """
+        if self.timetable is None:
+            return False
+        rows = self._max_rows() * 2
+        for station_id, station in self.stations.items():
+            if not self.subscription.wants_station(station_id):
+                continue
+            departures = [
+                self._make_scheduled_departure(scheduled)
+                for scheduled in self.timetable.next_departures(station_id, current_time, rows)
+            ]
+            station.set_departures(departures, self._max_rows(), scheduled=True)
+        if not self.using_timetable:
+            debug.info("Showing scheduled departures until the realtime feed is available")
+        self.using_timetable = True
+        self.publish_station()
+        return True
+
+    def _make_scheduled_departure(self, scheduled) -> BARTDeparture:
+        line_color = self.intern(self.get_line_color(scheduled.route_id))
+        return BARTDeparture(
+            destination_name=self.intern(scheduled.headsign or line_color.title()),
+            arrival_time=scheduled.departure_time,
+            platform=self.intern(scheduled.platform or DEFAULT_PLATFORM),
+            direction=DEFAULT_DIRECTION,
+            line_color=line_color,
+            train_length=DEFAULT_TRAIN_LENGTH,
+        )
+
+    def _leave_timetable(self, current_time: float) -> None:
+        """Replace every scheduled board with realtime departures once the feed is back"""
+        self.using_timetable = False
+        station_ids = [station_id for station_id in self.stations if self.subscription.wants_station(station_id)]
+        if self.columnar_store:
+            self._refresh_columnar(station_ids, current_time)
+        else:
+            self._refresh_stations(station_ids, current_time)
+
+    def _max_rows(self) -> int:
+        """Number of departure rows the current layout can show"""
+        try:
+            return int(self.config.layout.coords("departures.rows.max_rows"))
+        except Exception:
+            return DEFAULT_MAX_ROWS
+
+    def find_station(self, station_name: str) -> Optional[BARTStation]:
+        """Look up a station by name or abbreviation (case-insensitive)"""
+        return self.station_index.get(normalize_station_key(station_name))
+
+    def intern(self, value: str) -> str:
+        """Return the shared copy of ``value`` so identical strings are stored once"""
+        return self.interned.setdefault(value, value)
+
     def get_line_color(self, route_id: str) -> str:
         """Get the color for a BART line based on the route ID"""
-        line_colors = {
-            "ROUTE 1": "yellow",  # Antioch - SFO/Millbrae
-            "ROUTE 2": "yellow",  # Pittsburg/Bay Point - SFO/Millbrae
-            "ROUTE 3": "orange",  # Richmond - Warm Springs/South Fremont
-            "ROUTE 4": "orange",  # Richmond - Warm Springs/South Fremont
-            "ROUTE 5": "green",   # Warm Springs/South Fremont - Daly City
-            "ROUTE 6": "green",   # Warm Springs/South Fremont - Daly City
-            "ROUTE 7": "red",     # Warm Springs/South Fremont - Richmond
-            "ROUTE 8": "red",     # Warm Springs/South Fremont - Richmond
-            "ROUTE 11": "blue",   # Dublin/Pleasanton - Daly City
-            "ROUTE 12": "blue"    # Dublin/Pleasanton - Daly City
-        }
-        return line_colors.get(route_id, "white")
+        color = self.static_gtfs.line_color(route_id) if self.static_gtfs else None
+        return color or LINE_COLORS.get(route_id, "white")
+
+    def destination_for(self, trip_id: str) -> str:
+        """The trip's headsign, or the destination code at the end of its trip_id"""
+        headsign = self.static_gtfs.headsign(trip_id) if self.static_gtfs else None
+        return headsign or trip_id.split("-")[-1]
+
+    def _build_trip_departures(self, trip: TripState, current_time: float) -> Dict[str, Tuple[BARTDeparture, ...]]:
+        """Build the departures a single trip contributes to each subscribed station"""
+        line_color = self.intern(self.get_line_color(trip.route_id))
+        if not self.subscription.wants_line(line_color):
+            return {}
+
+        # Resolve the trip's headsign once per trip rather than per stop
+        static = self.static_gtfs
+        destination = self.intern(self.destination_for(trip.trip_id))
+        departures_by_station = {}
+
+        # Process each stop time
+        for stop_id, event_time, delay in trip.stop_times:
+            station_id = static.station_for(stop_id) if static else stop_id
+            # Skip if we don't have this station in our map, or nobody is showing it
+            if station_id not in self.stations or not self.subscription.wants_station(station_id):
+                continue
+
+            # Only add future departures
+            if int((event_time - current_time) / 60) >= 0:
+                # Create departure object
+                departure = BARTDeparture(
+                    destination_name=destination,
+                    arrival_time=event_time,
+                    platform=self.intern((static.platform(stop_id) if static else None) or DEFAULT_PLATFORM),
+                    direction=DEFAULT_DIRECTION,
+                    line_color=line_color,
+                    train_length=DEFAULT_TRAIN_LENGTH,
+                    delay=delay
+                )
+
+                # Add to station's departures. A trip almost always stops once per
+                # station, so a one-element tuple is far smaller than a list here.
+                existing = departures_by_station.get(station_id)
+                departures_by_station[station_id] = (departure,) if existing is None else existing + (departure,)
+
+        return departures_by_station
+
+    def _refresh_stations(self, station_ids, current_time: float) -> None:
+        """Rebuild the top-k view of ``station_ids`` from the applied trip updates"""
+        max_rows = self._max_rows()
+        for station_id in station_ids:
+            station = self.stations[station_id]
+            departures = [d for d in self.trip_updates.departures_for(station_id) if not d.departed(current_time)]
+            station.set_departures(departures, max_rows)
+            station.last_updated = current_time
+
+    def _apply_payload(self, payload: bytes, current_time: float) -> None:
+        """Apply a trip update payload through the per-entity object graph"""
+        if self.fast_decoder:
+            try:
+                self._apply_records(*decode_feed(payload), current_time)
+                return
+            except ValueError as e:
+                debug.warning(f"Fast decoder couldn't read the trip update feed, using the protobuf parser: {e}")
+                # Whatever was half applied is replaced below, but stations it touched must be redrawn too
+                self._refresh_stations(list(self.stations), current_time)
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.ParseFromString(payload)
+        self._apply_entities(feed, current_time)
+
+    def _apply_entities(self, feed, current_time: float) -> None:
+        """Apply a parsed feed through the per-entity object graph"""
+        self._apply_records(feed.header.incrementality, entity_records(feed), current_time)
+
+    def _apply_records(self, incrementality: int, entities, current_time: float) -> None:
+        """Apply a feed given as entity records, from the protobuf parser or the fast decoder"""
+        # Patch only the trip entities that were added, changed or deleted
+        touched = self.trip_updates.apply_entities(
+            incrementality, entities, lambda trip: self._build_trip_departures(trip, current_time)
+        )
+
+        # Rebuild the top-k view of just the stations those entities stop at
+        self._refresh_stations(touched, current_time)
+
+        debug.log(
+            f"Updated BART departures: {self.trip_updates.added} added, {self.trip_updates.changed} changed, "
+            f"{self.trip_updates.deleted} deleted, {len(touched)} stations touched"
+        )
+
+    def _apply_columnar(self, feed, current_time: float) -> None:
+        """
+        Apply a feed through the columnar store, materializing only the rows a board can show.
+        The store is rebuilt from each feed, so DIFFERENTIAL feeds aren't supported in this mode,
+        and it keeps no per-stop platform or per-trip direction columns.
+        """
+        static = self.static_gtfs
+        self.columnar_departures = ColumnarDepartures.from_feed(
+            feed,
+            self.stations,
+            station_for=static.station_for if static else None,
+            destination_for=self.destination_for,
+        )
+        station_ids = [station_id for station_id in self.stations if self.subscription.wants_station(station_id)]
+        self._refresh_columnar(station_ids, current_time)
+        debug.log(f"Updated BART departures: {len(self.columnar_departures)} stop times stored in columns")
+
+    def _refresh_columnar(self, station_ids, current_time: float) -> None:
+        """Materialize the top rows of ``station_ids`` from the columnar store"""
+        store = self.columnar_departures
+        if store is None:
+            return
+        route_indexes = [
+            index for index, route_id in enumerate(store.routes.values)
+            if self.subscription.wants_line(self.get_line_color(route_id))
+        ]
+        max_rows = self._max_rows()
+        # Keep a few spare rows so trains leaving between polls don't empty the board
+        upcoming = store.top_k(max_rows * 2, current_time, route_indexes)
+        for station_id in station_ids:
+            station = self.stations[station_id]
+            departures = store.materialize(upcoming.get(station_id, []), self._make_columnar_departure)
+            station.set_departures(departures, max_rows)
+            station.last_updated = current_time
+
+    def _make_columnar_departure(self, destination: str, arrival_time: int, route_id: str, delay: int) -> BARTDeparture:
+        return BARTDeparture(
+            destination_name=self.intern(destination),
+            arrival_time=arrival_time,
+            platform=DEFAULT_PLATFORM,
+            direction=DEFAULT_DIRECTION,
+            line_color=self.intern(self.get_line_color(route_id)),
+            train_length=DEFAULT_TRAIN_LENGTH,
+            delay=delay
+        )
 
     def update_departures(self) -> None:
         """Update departure information for all stations"""
-        current_time = time.time()
-        
-        # Only update if enough time has passed since last update
-        if current_time - self.last_update < self.update_frequency:
+        current_time = self.clock()
+
+        # Countdowns run locally between polls; just drop trains that have left
+        self.evict_departed(current_time)
+        self.save_snapshot(current_time)
+        if self.shared_feed is not None:
+            self._update_from_shared_feed(current_time)
             return
-            
+
+        # Only update once the scheduled poll interval has passed
+        if current_time - self.last_update < self.poll_interval:
+            return
+        # Nor while backing off after failures, or while the circuit breaker is open
+        if not self.trip_policy.ready(current_time):
+            return
+        if self.scheduler.full_refresh_due(current_time):
+            debug.info("Daily full refresh of BART departures")
+            self.trip_changes.reset()
+
+        start = time.monotonic()
         try:
             # Make request to BART GTFS Realtime API
-            response = requests.get(self.base_url, params={'api_key': self.api_key})
-            feed = gtfs_realtime_pb2.FeedMessage()
-            feed.ParseFromString(response.content)
-            
-            # Clear existing departure information
-            for station in self.stations.values():
-                station.departures = []
-            
-            # Process each entity in the GTFS feed
-            for entity in feed.entity:
-                if entity.HasField('trip_update'):
-                    trip_update = entity.trip_update
-                    route_id = trip_update.trip.route_id
-                    line_color = self.get_line_color(route_id)
-                    
-                    # Process each stop time update
-                    for stop_time_update in trip_update.stop_time_update:
-                        station_id = stop_time_update.stop_id
-                        
-                        # Skip if we don't have this station in our map
-                        if station_id not in self.stations:
-                            continue
-                            
-                        station = self.stations[station_id]
-                        
-                        # Calculate minutes until arrival
-                        if stop_time_update.HasField('arrival'):
-                            arrival_time = stop_time_update.arrival.time
-                            minutes = int((arrival_time - current_time) / 60)
-                            delay = stop_time_update.arrival.delay
-                        else:
-                            # If no arrival time, use departure time
-                            departure_time = stop_time_update.departure.time
-                            minutes = int((departure_time - current_time) / 60)
-                            delay = stop_time_update.departure.delay
-                        
-                        # Only add future departures
-                        if minutes >= 0:
-                            # Get destination from trip headsign
-                            destination = trip_update.trip.trip_id.split("-")[-1]
-                            
-                            # Create departure object
-                            departure = BARTDeparture(
-                                destination_name=destination,
-                                minutes=minutes,
-                                platform="1",  # Default, would need more GTFS data for actual platform
-                                direction="N",  # Default, would need more GTFS data for actual direction
-                                line_color=line_color,
-                                train_length=10,  # Default, would need more GTFS data for actual train length
-                                delay=delay
-                            )
-                            
-                            # Add to station's departures
-                            station.departures.append(departure)
-            
-            self.last_update = current_time
-            debug.log(f"Successfully updated BART departure information for all stations")
-            
+            response = self.transport.get(
+                self.base_url,
+                headers=self.trip_changes.request_headers(),
+                timeout=self.trip_policy.timeout(),
+                deadline=self.trip_policy.deadline(),
+            )
+            latency = time.monotonic() - start
+            if response.status_code == 304:
+                self.trip_changes.not_modified()
+                self._schedule_next_poll(current_time)
+                self._fetch_succeeded(self.trip_policy, current_time, latency)
+                debug.log(f"BART departures not modified ({self.trip_changes.stats})")
+                return
+            # An error page must not be parsed as an empty feed and wipe the board
+            response.raise_for_status()
+
+            # Skip the parse and rebuild entirely if the feed hasn't changed
+            if not self.trip_changes.has_changed(response.content, response.headers):
+                self._schedule_next_poll(current_time)
+                self._fetch_succeeded(self.trip_policy, current_time, latency)
+                debug.log(f"BART departures unchanged ({self.trip_changes.stats})")
+                return
+
+            if self.columnar_store:
+                feed = gtfs_realtime_pb2.FeedMessage()
+                feed.ParseFromString(response.content)
+                self._apply_columnar(feed, current_time)
+            else:
+                self._apply_payload(response.content, current_time)
+            if self.using_timetable:
+                self._leave_timetable(current_time)
+            self.station_index = self._build_station_index()
+            self.publish_station()
+            self._schedule_next_poll(current_time)
+            self._fetch_succeeded(self.trip_policy, current_time, latency)
+
         except Exception as e:
+            # Don't let a payload we failed to apply be skipped as "unchanged" next poll
+            self.trip_changes.reset()
             self.logger.error(f"Error updating BART departures: {e}")
             debug.error(f"Error updating BART departures: {e}")
+            self._fetch_failed(self.trip_policy, current_time)
+            # Keep counting down the last good departures until they're too old to trust
+            if self.trip_policy.stale(current_time):
+                self.show_timetable(current_time)
+
+    def _update_from_shared_feed(self, current_time: float) -> None:
+        """Take the departures and alerts the host's fetcher last published, if they're new"""
+        record = self.shared_feed.read()
+        if record is None:
+            # Fall back to the timetable if the fetcher stops publishing
+            if not self.using_timetable and self.trip_policy.stale(current_time):
+                self.show_timetable(current_time)
+            return
+        stations = record["stations"]
+        for station_id, station in self.stations.items():
+            if self.subscription.wants_station(station_id):
+                departures = [BARTDeparture._make(fields) for fields in stations.get(station_id, ())]
+                station.set_departures(departures, self._max_rows())
+        if self.alerts.replace(record["alerts"]):
+            debug.log(f"{len(self.alerts.alerts)} BART alerts from the shared feed")
+
+        # The fetcher's fetch times and network state stand in for this board's own
+        self.trip_policy.last_success = record["fetched_at"]
+        self.alert_policy.last_success = record["alerts_at"]
+        self.network_state.down = record["network_down"]
+        self.last_update = current_time
+        # Without a timetable, stale departures are still shown, counting down
+        if self.trip_policy.stale(current_time) and self.show_timetable(current_time):
+            return
+        self.using_timetable = False
+        self.publish_station()
+
+    def _schedule_next_poll(self, current_time: float) -> None:
+        """Record a poll and pick the interval until the next one from the soonest departure on the board"""
+        self.last_update = current_time
+        if not self.update_frequency:
+            return
+        next_departure = min(
+            (
+                station.next_departures[0].arrival_time
+                for station_id, station in self.stations.items()
+                if station.next_departures and self.subscription.wants_station(station_id)
+            ),
+            default=None,
+        )
+        self.poll_interval = self.scheduler.interval(current_time, next_departure)
+
+    def _fetch_succeeded(self, policy: FetchPolicy, current_time: float, latency: float) -> None:
+        policy.record_success(current_time, latency)
+        if self.network_state.record(True):
+            debug.info("BART API reachable again")
+
+    def _fetch_failed(self, policy: FetchPolicy, current_time: float) -> None:
+        delay = policy.record_failure(current_time)
+        debug.warning(f"Next {policy.name} fetch in {delay:.0f}s ({policy})")
+        if self.network_state.record(False):
+            debug.warning(f"BART API unreachable after {self.network_state.down_after} failed fetches")
     
     def get_departures_for_station(self, station_name: str) -> List[BARTDeparture]:
         """Get departures for a specific station"""
@@ -211,47 +770,67 @@ class BARTData:
         self.update_departures()
         
         # Find station by name or abbreviation
-        station = None
-        for s in self.stations.values():
-            if s.name.lower() == station_name.lower() or s.abbreviation.lower() == station_name.lower():
-                station = s
-                break
-        
+        station = self.find_station(station_name)
         if not station:
             debug.error(f"Station '{station_name}' not found")
             return []
-        
-        # Sort departures by minutes
-        departures = sorted(station.departures, key=lambda d: d.minutes)
-        return departures
+        self.subscribe(station)
+
+        return station.ordered_departures()
     
     def get_system_status(self) -> Dict:
-        """Get system-wide alerts and status information"""
+        """
+        Get the alerts relevant to the current station and the system status, publishing
+        a read-only copy to the render thread whenever they change. The last good alerts
+        are served while fetches fail, until they're older than the staleness limit.
+        """
+        current_time = self.clock()
+        # With a shared feed, the alerts arrive with the departures
+        if self.shared_feed is None and self.alert_policy.ready(current_time):
+            self._fetch_alerts(current_time)
+
+        if self.alert_policy.stale(current_time):
+            status = {'alerts': (), 'status': 'unknown', 'ticker': ""}
+        else:
+            station = self.current_station
+            station_id = station.station_id if station else None
+            lines = {departure.line_color for departure in station.departures} if station else ()
+            alerts, ticker = self.alerts.for_station(station_id, lines)
+            status = {'alerts': alerts, 'status': 'alert' if self.alerts.alerts else 'normal', 'ticker': ticker}
+
+        # Unchanged alerts are the same objects, so this is cheap and nothing is republished
+        if status != self.system_status:
+            self.system_status = status
+            self.snapshots.publish(system_status=freeze_status(status))
+        return self.system_status
+
+    def _fetch_alerts(self, current_time: float) -> None:
+        start = time.monotonic()
         try:
-            response = requests.get(self.alert_url, params={'api_key': self.api_key})
-            feed = gtfs_realtime_pb2.FeedMessage()
-            feed.ParseFromString(response.content)
-            
-            alerts = []
-            for entity in feed.entity:
-                if entity.HasField('alert'):
-                    alert = {
-                        'title': entity.alert.header_text.translation[0].text if entity.alert.header_text.translation else "Alert",
-                        'description': entity.alert.description_text.translation[0].text if entity.alert.description_text.translation else "",
-                        'effect': entity.alert.effect,
-                        'cause': entity.alert.cause
-                    }
-                    alerts.append(alert)
-            
-            return {
-                'alerts': alerts,
-                'status': 'normal' if not alerts else 'alert'
-            }
+            response = self.transport.get(
+                self.alert_url,
+                headers=self.alert_changes.request_headers(),
+                timeout=self.alert_policy.timeout(),
+                deadline=self.alert_policy.deadline(),
+            )
+            latency = time.monotonic() - start
+            if response.status_code == 304:
+                self.alert_changes.not_modified()
+            else:
+                response.raise_for_status()
+                # Only a changed payload is parsed and indexed
+                if self.alert_changes.has_changed(response.content, response.headers):
+                    feed = gtfs_realtime_pb2.FeedMessage()
+                    feed.ParseFromString(response.content)
+                    if self.alerts.update(feed):
+                        debug.log(f"{len(self.alerts.alerts)} BART alerts")
+            self._fetch_succeeded(self.alert_policy, current_time, latency)
         except Exception as e:
+            self.alert_changes.reset()
             self.logger.error(f"Error fetching system status: {e}")
             debug.error(f"Error fetching system status: {e}")
-            return {'alerts': [], 'status': 'unknown'}
-    
+            self._fetch_failed(self.alert_policy, current_time)
+
     def get_screen_type(self):
         """Determine which screen type to show based on the current state"""
         from data.screens import ScreenType
@@ -261,15 +840,13 @@ class BARTData:
         
         # If we have network issues, let the main renderer decide
         
-        # If we have a current station with departures, show them
-        if self.current_station and self.current_station.departures:
-            return ScreenType.DEPARTURES
-            
-        # If system is not running (late night), show offday screen
-        # This would need to be implemented with actual BART service hours
-        # For now, assume if there are no departures, it's off hours
-        if self.current_station and not self.current_station.departures:
+        # Outside BART's service hours, show the offday screen
+        if not self.scheduler.calendar.is_open(self.clock()):
             return ScreenType.SYSTEM_OFFDAY
+
+        # Otherwise the station board, even while it's waiting on its next train
+        if self.current_station:
+            return ScreenType.DEPARTURES
             
         # Default to showing system status
-        return ScreenType.ALWAYS_SYSTEM_STATUS
\ No newline at end of file
+        return ScreenType.ALWAYS_SYSTEM_STATUS
@@ -0,0 +1,175 @@
+"""
+Columnar, array-backed departure store.
+
+Instead of one BARTDeparture object per stop_time_update, the whole feed is
+held as parallel arrays (stop, route, destination, arrival epoch, delay) with
+small interned tables for the strings. Countdowns, filtering and per-station
+top-k run over the whole feed at once, and BARTDeparture objects are only
+materialized for the rows a board actually shows.
+
+NumPy is used when it's installed. Without it the same store falls back to the
+standard library ``array`` module and plain Python loops.
+"""
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SECONDS_PER_MINUTE = 60
+
+
+class InternTable:
+    """Maps each distinct value to a small integer index, and back"""
+
+    def __init__(self):
+        self.values: List = []
+        self.indexes: Dict = {}
+
+    def index(self, value) -> int:
+        index = self.indexes.get(value)
+        if index is None:
+            index = len(self.values)
+            self.indexes[value] = index
+            self.values.append(value)
+        return index
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ColumnarDepartures:
+    """A whole trip update feed stored as parallel arrays"""
+
+    def __init__(self, station_ids: Iterable[str], use_numpy: Optional[bool] = None):
+        self.use_numpy = np is not None if use_numpy is None else use_numpy and np is not None
+        self.stations = InternTable()
+        for station_id in station_ids:
+            self.stations.index(station_id)
+        self.routes = InternTable()
+        self.destinations = InternTable()
+
+        self.stop = array("h")
+        self.route = array("h")
+        self.destination = array("h")
+        self.arrival = array("q")
+        self.delay = array("i")
+        self._columns = None
+
+    def __len__(self):
+        return len(self.arrival)
+
+    @classmethod
+    def from_feed(
+        cls,
+        feed,
+        station_ids: Iterable[str],
+        use_numpy: Optional[bool] = None,
+        station_for: Optional[Callable[[str], str]] = None,
+        destination_for: Optional[Callable[[str], str]] = None,
+    ) -> "ColumnarDepartures":
+        """
+        Build a store from every trip update in a parsed FeedMessage.
+        ``station_for`` maps a stop_id to its station and ``destination_for`` a
+        trip_id to its destination; by default stop_ids are station ids and the
+        destination is the end of the trip_id.
+        """
+        store = cls(station_ids, use_numpy)
+        destination_for = destination_for or (lambda trip_id: trip_id.split("-")[-1])
+        station_indexes = store.stations.indexes
+        stop, route, destination = store.stop, store.route, store.destination
+        arrival, delay = store.arrival, store.delay
+
+        for entity in feed.entity:
+            if not entity.HasField("trip_update"):
+                continue
+            trip_update = entity.trip_update
+            route_index = store.routes.index(trip_update.trip.route_id)
+            destination_index = store.destinations.index(destination_for(trip_update.trip.trip_id))
+            for stop_time_update in trip_update.stop_time_update:
+                stop_id = stop_time_update.stop_id
+                station_index = station_indexes.get(station_for(stop_id) if station_for else stop_id)
+                if station_index is None:
+                    continue
+                event = stop_time_update.arrival if stop_time_update.HasField("arrival") else stop_time_update.departure
+                stop.append(station_index)
+                route.append(route_index)
+                destination.append(destination_index)
+                arrival.append(event.time)
+                delay.append(event.delay)
+        return store
+
+    def columns(self):
+        """The arrays as NumPy views (or the raw arrays without NumPy), built once per store"""
+        if self._columns is None:
+            if self.use_numpy:
+                self._columns = tuple(
+                    np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([], dtype=column.typecode)
+                    for column in (self.stop, self.route, self.destination, self.arrival, self.delay)
+                )
+            else:
+                self._columns = (self.stop, self.route, self.destination, self.arrival, self.delay)
+        return self._columns
+
+    def minutes(self, now: float):
+        """Whole minutes until every row's arrival, truncated toward zero like BARTDeparture.minutes_at"""
+        arrival = self.columns()[3]
+        if self.use_numpy:
+            return ((arrival - now) / SECONDS_PER_MINUTE).astype(np.int64)
+        return array("q", (int((t - now) / SECONDS_PER_MINUTE) for t in arrival))
+
+    def top_k(self, k: int, now: float, route_indexes: Optional[List[int]] = None) -> Dict[str, List[int]]:
+        """
+        Row indexes of the ``k`` soonest upcoming trains at every station, soonest first.
+        If ``route_indexes`` is given, only rows on those routes are considered.
+        """
+        stop, route, _, arrival, _ = self.columns()
+        minutes = self.minutes(now)
+        result: Dict[str, List[int]] = {}
+
+        if self.use_numpy:
+            wanted = minutes >= 0
+            if route_indexes is not None:
+                wanted &= np.isin(route, route_indexes)
+            upcoming = np.flatnonzero(wanted)
+            if not len(upcoming):
+                return result
+            # Sort by station, then arrival, and keep the first k rows of each station's run
+            order = upcoming[np.lexsort((arrival[upcoming], stop[upcoming]))]
+            stops = stop[order]
+            starts = np.flatnonzero(np.r_[True, stops[1:] != stops[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                result[self.stations[int(stops[start])]] = order[start : min(end, start + k)].tolist()  # noqa: E203
+            return result
+
+        routes = None if route_indexes is None else set(route_indexes)
+        by_station: Dict[int, List[int]] = {}
+        for row, (station_index, m) in enumerate(zip(stop, minutes)):
+            if m >= 0 and (routes is None or route[row] in routes):
+                by_station.setdefault(station_index, []).append(row)
+        for station_index, rows in by_station.items():
+            rows.sort(key=arrival.__getitem__)
+            result[self.stations[station_index]] = rows[:k]
+        return result
+
+    def materialize(self, rows: List[int], make_departure: Callable) -> List:
+        """
+        Build departure objects for just ``rows``.
+        ``make_departure(destination, arrival_time, route_id, delay)`` creates one departure.
+        """
+        _, route, destination, arrival, delay = self.columns()
+        return [
+            make_departure(
+                self.destinations[int(destination[row])],
+                int(arrival[row]),
+                self.routes[int(route[row])],
+                int(delay[row]),
+            )
+            for row in rows
+        ]
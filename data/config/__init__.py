@@ -8,6 +8,7 @@ import debug
 from data import status
 from data.config.color import Color
 from data.config.layout import Layout
+from data.static_gtfs import LINE_PALETTE
 from data.time_formats import TIME_FORMAT_12H, TIME_FORMAT_24H
 from utils import deep_update
 
@@ -27,6 +28,7 @@ class Config:
         # Preferred Teams/Divisions
         self.preferred_teams = json["preferred"]["teams"]
         self.preferred_divisions = json["preferred"]["divisions"]
+        self.preferred_lines = json["preferred"]["lines"]
 
         # News Ticker
         self.news_ticker_team_offday = json["news_ticker"]["team_offday"]
@@ -71,6 +73,22 @@ class Config:
         self.delay_in_10s_of_seconds = json["preferred_game_update_delay_in_10s_of_seconds"]
 
         self.debug = json["debug"]
+        self.render_fps = json["render_fps"]
+        self.render_backend = json["render_backend"]
+        self.static_gtfs = json["static_gtfs"]
+        self.timetable_fallback = json["timetable_fallback"]
+        self.staleness_limit = json["staleness_limit"]
+        self.network_error_after = json["network_error_after"]
+        self.network_recovery_after = json["network_recovery_after"]
+        self.snapshot_file = json["snapshot_file"]
+        self.snapshot_write_interval = json["snapshot_write_interval"]
+        self.shared_feed = json["shared_feed"]
+        self.fast_decoder = json["fast_decoder"]
+        self.columnar_store = json["columnar_store"]
+        self.replay_file = json["replay_file"]
+        self.replay_realtime = json["replay_realtime"]
+        self.record_file = json["record_file"]
+        self.bart_api_base = json["bart_api_base"]
         self.demo_date = json["demo_date"]
         # Make sure the scrolling speed setting is in range so we don't crash
         try:
@@ -97,6 +115,7 @@ class Config:
         self.check_time_format()
         self.check_preferred_teams()
         self.check_preferred_divisions()
+        self.check_preferred_lines()
 
         # Check the rotation_rates to make sure it's valid and not silly
         self.check_rotate_rates()
@@ -137,6 +156,22 @@ class Config:
             division = self.preferred_divisions
             self.preferred_divisions = [division]
 
+    def check_preferred_lines(self):
+        if not isinstance(self.preferred_lines, str) and not isinstance(self.preferred_lines, list):
+            debug.warning(
+                "preferred lines should be an array of line colors or a single line color string."
+                " Showing every line."
+            )
+            self.preferred_lines = []
+        if isinstance(self.preferred_lines, str):
+            line = self.preferred_lines
+            self.preferred_lines = [line]
+        # Departures carry lowercase palette names
+        self.preferred_lines = [line.lower() for line in self.preferred_lines]
+        unknown = [line for line in self.preferred_lines if line not in LINE_PALETTE]
+        if unknown:
+            debug.warning(f"Unknown preferred lines {unknown}. Line colors are {', '.join(LINE_PALETTE)}.")
+
     def check_time_format(self):
         if self.time_format.lower() == "24h":
             self.time_format = TIME_FORMAT_24H
@@ -0,0 +1,146 @@
+import hashlib
+from typing import Dict, Optional
+
+from google.transit import gtfs_realtime_pb2
+
+# Protobuf wire types used by the GTFS-RT FeedMessage
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+FEED_MESSAGE_HEADER_FIELD = 1
+
+
+def read_varint(buf, pos: int):
+    """Decode a base-128 varint from ``buf`` at ``pos``. Returns (value, new_pos)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def skip_field(buf, pos: int, wire_type: int) -> int:
+    """Skip over a field's value, returning the position just past it"""
+    if wire_type == WIRE_VARINT:
+        _, pos = read_varint(buf, pos)
+        return pos
+    if wire_type == WIRE_FIXED64:
+        return pos + 8
+    if wire_type == WIRE_LENGTH_DELIMITED:
+        length, pos = read_varint(buf, pos)
+        return pos + length
+    if wire_type == WIRE_FIXED32:
+        return pos + 4
+    raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+
+
+def read_feed_header(payload: bytes) -> Optional[gtfs_realtime_pb2.FeedHeader]:
+    """
+    Parse only the FeedHeader out of a serialized FeedMessage.
+
+    The entities are skipped over without being decoded, so this costs a few
+    microseconds regardless of how large the feed is.
+    """
+    pos = 0
+    end = len(payload)
+    try:
+        while pos < end:
+            tag, pos = read_varint(payload, pos)
+            field_number, wire_type = tag >> 3, tag & 0x07
+            if field_number == FEED_MESSAGE_HEADER_FIELD and wire_type == WIRE_LENGTH_DELIMITED:
+                length, pos = read_varint(payload, pos)
+                header = gtfs_realtime_pb2.FeedHeader()
+                header.ParseFromString(payload[pos : pos + length])  # noqa: E203
+                return header
+            pos = skip_field(payload, pos, wire_type)
+    except (IndexError, ValueError):
+        return None
+    return None
+
+
+class FeedPollStats:
+    """Counters describing how much work each poll of a feed actually did"""
+
+    def __init__(self):
+        self.fetched = 0  # polls that downloaded a body and rebuilt from it
+        self.not_modified = 0  # polls answered with 304 Not Modified
+        self.identical = 0  # polls whose body matched the previous payload
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"fetched": self.fetched, "not_modified": self.not_modified, "identical": self.identical}
+
+    def __str__(self):
+        return "fetched={fetched} not_modified={not_modified} identical={identical}".format(**self.as_dict())
+
+
+class FeedChangeDetector:
+    """
+    Detects when a polled GTFS-RT feed hasn't changed since the last poll.
+
+    Two layers are used:
+      1. HTTP validators (ETag / Last-Modified) are replayed as conditional
+         request headers so a cooperating server can answer 304 with no body.
+      2. For full responses, the FeedHeader timestamp is read without decoding
+         the entities. If it didn't move the payload is skipped, otherwise a
+         content hash catches feeds that omit or always bump the timestamp.
+    """
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.timestamp = None
+        self.digest = None
+        self.stats = FeedPollStats()
+
+    def request_headers(self) -> Dict[str, str]:
+        """Conditional request headers for the next poll"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def not_modified(self) -> None:
+        """Record a poll that the server answered with 304 Not Modified"""
+        self.stats.not_modified += 1
+
+    def has_changed(self, payload: bytes, headers=None) -> bool:
+        """
+        Returns True if ``payload`` differs from the last accepted payload.
+        Validators from the response ``headers`` are remembered for the next poll.
+        """
+        if headers is not None:
+            self.etag = headers.get("ETag", self.etag)
+            self.last_modified = headers.get("Last-Modified", self.last_modified)
+
+        # The producer stamps every snapshot it builds, so a matching header
+        # timestamp means the same data even if it was re-serialized
+        header = read_feed_header(payload)
+        timestamp = header.timestamp if header is not None and header.HasField("timestamp") else None
+        if timestamp is not None and timestamp == self.timestamp:
+            self.stats.identical += 1
+            return False
+
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if digest == self.digest:
+            self.stats.identical += 1
+            return False
+
+        self.timestamp = timestamp
+        self.digest = digest
+        self.stats.fetched += 1
+        return True
+
+    def reset(self) -> None:
+        """Forget the last payload so the next poll is always applied"""
+        self.etag = None
+        self.last_modified = None
+        self.timestamp = None
+        self.digest = None
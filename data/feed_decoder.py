@@ -0,0 +1,295 @@
+"""
+Field-selective decoder for GTFS-RT trip update feeds.
+
+The board only reads a handful of fields: the feed's incrementality, each
+entity's id and is_deleted flag, the trip's trip_id and route_id, and each
+stop_time_update's stop_id and arrival or departure time and delay. This
+decoder walks the wire format with the varint helpers from feed_changes and
+reads just those. Everything else, including vehicle descriptors, alerts,
+stop time properties and extensions, is skipped by its length without being
+decoded.
+
+Each entity's trip update is only located at first, and is decoded into a
+TripState only when asked. A feed whose entities didn't change costs one scan
+and one hash per entity.
+
+This pays off where protobuf runs as pure Python, as it does on boards whose
+protobuf has no C extension for their platform: decoding a whole feed is about
+four times faster than the reference parser, and scanning an unchanged one is
+about a hundred times faster. Against the upb or C++ backends it's slower, so
+BARTData only uses it by default when ``protobuf_is_pure_python()``.
+
+Field numbers come from the descriptors generated from gtfs-realtime.proto,
+so they can't drift from the reference parser's. Structure this decoder
+doesn't handle, like a submessage repeated to be merged, raises ValueError so
+the caller can fall back to the reference parser. So does a malformed payload,
+including a field whose length runs past the message it's nested in, whether
+it's found while scanning the feed or while decoding a trip update later.
+"""
+from functools import partial
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from google.transit import gtfs_realtime_pb2
+
+from data.feed_changes import WIRE_LENGTH_DELIMITED, WIRE_VARINT, read_varint, skip_field
+from data.trip_updates import FULL_DATASET, TripState
+
+
+def _field(message, name: str) -> int:
+    return message.DESCRIPTOR.fields_by_name[name].number
+
+
+MESSAGE_HEADER = _field(gtfs_realtime_pb2.FeedMessage, "header")
+MESSAGE_ENTITY = _field(gtfs_realtime_pb2.FeedMessage, "entity")
+HEADER_INCREMENTALITY = _field(gtfs_realtime_pb2.FeedHeader, "incrementality")
+ENTITY_ID = _field(gtfs_realtime_pb2.FeedEntity, "id")
+ENTITY_IS_DELETED = _field(gtfs_realtime_pb2.FeedEntity, "is_deleted")
+ENTITY_TRIP_UPDATE = _field(gtfs_realtime_pb2.FeedEntity, "trip_update")
+TRIP_UPDATE_TRIP = _field(gtfs_realtime_pb2.TripUpdate, "trip")
+TRIP_UPDATE_STOP_TIME_UPDATE = _field(gtfs_realtime_pb2.TripUpdate, "stop_time_update")
+TRIP_ID = _field(gtfs_realtime_pb2.TripDescriptor, "trip_id")
+TRIP_ROUTE_ID = _field(gtfs_realtime_pb2.TripDescriptor, "route_id")
+STOP_TIME_STOP_ID = _field(gtfs_realtime_pb2.TripUpdate.StopTimeUpdate, "stop_id")
+STOP_TIME_ARRIVAL = _field(gtfs_realtime_pb2.TripUpdate.StopTimeUpdate, "arrival")
+STOP_TIME_DEPARTURE = _field(gtfs_realtime_pb2.TripUpdate.StopTimeUpdate, "departure")
+EVENT_DELAY = _field(gtfs_realtime_pb2.TripUpdate.StopTimeEvent, "delay")
+EVENT_TIME = _field(gtfs_realtime_pb2.TripUpdate.StopTimeEvent, "time")
+
+# Tags as they appear on the wire, so fields can be matched without splitting the tag
+_LENGTH_DELIMITED = {
+    name: number << 3 | WIRE_LENGTH_DELIMITED
+    for name, number in (
+        ("header", MESSAGE_HEADER),
+        ("entity", MESSAGE_ENTITY),
+        ("id", ENTITY_ID),
+        ("trip_update", ENTITY_TRIP_UPDATE),
+        ("trip", TRIP_UPDATE_TRIP),
+        ("stop_time_update", TRIP_UPDATE_STOP_TIME_UPDATE),
+        ("trip_id", TRIP_ID),
+        ("route_id", TRIP_ROUTE_ID),
+        ("stop_id", STOP_TIME_STOP_ID),
+        ("arrival", STOP_TIME_ARRIVAL),
+        ("departure", STOP_TIME_DEPARTURE),
+    )
+}
+TAG_HEADER = _LENGTH_DELIMITED["header"]
+TAG_ENTITY = _LENGTH_DELIMITED["entity"]
+TAG_ENTITY_ID = _LENGTH_DELIMITED["id"]
+TAG_TRIP_UPDATE = _LENGTH_DELIMITED["trip_update"]
+TAG_TRIP = _LENGTH_DELIMITED["trip"]
+TAG_STOP_TIME_UPDATE = _LENGTH_DELIMITED["stop_time_update"]
+TAG_TRIP_ID = _LENGTH_DELIMITED["trip_id"]
+TAG_ROUTE_ID = _LENGTH_DELIMITED["route_id"]
+TAG_STOP_ID = _LENGTH_DELIMITED["stop_id"]
+TAG_ARRIVAL = _LENGTH_DELIMITED["arrival"]
+TAG_DEPARTURE = _LENGTH_DELIMITED["departure"]
+TAG_INCREMENTALITY = HEADER_INCREMENTALITY << 3 | WIRE_VARINT
+TAG_IS_DELETED = ENTITY_IS_DELETED << 3 | WIRE_VARINT
+TAG_DELAY = EVENT_DELAY << 3 | WIRE_VARINT
+TAG_TIME = EVENT_TIME << 3 | WIRE_VARINT
+
+def protobuf_is_pure_python() -> bool:
+    """Whether protobuf parses in pure Python rather than in its upb or C++ extension"""
+    try:
+        from google.protobuf.internal import api_implementation
+    except ImportError:
+        return False
+    return api_implementation.Type() == "python"
+
+
+INT64_RANGE = 1 << 64
+MAX_FIELD_NUMBER = (1 << 29) - 1
+SIGN_BIT = 1 << 63
+
+
+class DecodedEntity(NamedTuple):
+    entity_id: str
+    is_deleted: bool
+    fingerprint: Optional[int]  # hash of the trip update's bytes, None if the entity has no trip update
+    decode_trip: Optional[Callable[[], TripState]]
+
+
+def _read_length(buf: bytes, pos: int, end: int) -> Tuple[int, int]:
+    """The (start, stop) of a length-delimited field's value, which has to end inside its parent's ``end``"""
+    length, pos = read_varint(buf, pos)
+    if pos + length > end:
+        raise ValueError("field runs past the end of its message")
+    return pos, pos + length
+
+
+def _skip(buf: bytes, pos: int, tag: int, end: int) -> int:
+    """Skip a field this decoder doesn't read, which has to end inside its parent's ``end``"""
+    if not 0 < tag >> 3 <= MAX_FIELD_NUMBER:
+        raise ValueError(f"invalid field number {tag >> 3}")
+    pos = skip_field(buf, pos, tag & 0x07)
+    if pos > end:
+        raise ValueError("field runs past the end of its message")
+    return pos
+
+
+def _check_end(pos: int, end: int) -> None:
+    # A varint read as the last field of a message may overrun it
+    if pos != end:
+        raise ValueError("field runs past the end of its message")
+
+
+def _read_event(buf: bytes, pos: int, end: int) -> Tuple[int, int]:
+    """(time, delay) of a StopTimeEvent. Negative int32s and int64s are both 64 bit two's complement on the wire."""
+    event_time = delay = 0
+    while pos < end:
+        tag, pos = read_varint(buf, pos)
+        if tag == TAG_TIME:
+            event_time, pos = read_varint(buf, pos)
+            if event_time & SIGN_BIT:
+                event_time -= INT64_RANGE
+        elif tag == TAG_DELAY:
+            delay, pos = read_varint(buf, pos)
+            if delay & SIGN_BIT:
+                delay -= INT64_RANGE
+        else:
+            pos = _skip(buf, pos, tag, end)
+    _check_end(pos, end)
+    return event_time, delay
+
+
+def _read_stop_time_update(buf: bytes, pos: int, end: int) -> Tuple[str, int, int]:
+    """(stop_id, time, delay), using the arrival or the departure if there's no arrival"""
+    stop_id = ""
+    arrival = departure = None
+    while pos < end:
+        tag, pos = read_varint(buf, pos)
+        if tag == TAG_STOP_ID:
+            start, pos = _read_length(buf, pos, end)
+            stop_id = buf[start:pos].decode()
+        elif tag == TAG_ARRIVAL or tag == TAG_DEPARTURE:
+            start, pos = _read_length(buf, pos, end)
+            event = _read_event(buf, start, pos)
+            if tag == TAG_ARRIVAL:
+                _check_once(arrival, "arrival")
+                arrival = event
+            else:
+                _check_once(departure, "departure")
+                departure = event
+        else:
+            pos = _skip(buf, pos, tag, end)
+    _check_end(pos, end)
+    event_time, delay = arrival or departure or (0, 0)
+    return stop_id, event_time, delay
+
+
+def _check_once(previous, name: str) -> None:
+    # The reference parser merges a repeated submessage into the first; no real feed does this
+    if previous is not None:
+        raise ValueError(f"{name} appears more than once")
+
+
+def _read_trip(buf: bytes, pos: int, end: int) -> Tuple[str, str]:
+    """(trip_id, route_id) of a TripDescriptor"""
+    trip_id = route_id = ""
+    while pos < end:
+        tag, pos = read_varint(buf, pos)
+        if tag == TAG_TRIP_ID or tag == TAG_ROUTE_ID:
+            start, pos = _read_length(buf, pos, end)
+            value = buf[start:pos].decode()
+            if tag == TAG_TRIP_ID:
+                trip_id = value
+            else:
+                route_id = value
+        else:
+            pos = _skip(buf, pos, tag, end)
+    _check_end(pos, end)
+    return trip_id, route_id
+
+
+def decode_trip_update(buf: bytes, pos: int, end: int) -> TripState:
+    """The TripState for a TripUpdate message occupying ``buf[pos:end]``. Raises ValueError if it's malformed."""
+    try:
+        return _decode_trip_update(buf, pos, end)
+    except IndexError:
+        raise ValueError("truncated trip update")
+
+
+def _decode_trip_update(buf: bytes, pos: int, end: int) -> TripState:
+    trip = None
+    stop_times: List[Tuple[str, int, int]] = []
+    while pos < end:
+        tag, pos = read_varint(buf, pos)
+        if tag == TAG_STOP_TIME_UPDATE:
+            start, pos = _read_length(buf, pos, end)
+            stop_times.append(_read_stop_time_update(buf, start, pos))
+        elif tag == TAG_TRIP:
+            start, pos = _read_length(buf, pos, end)
+            _check_once(trip, "trip")
+            trip = _read_trip(buf, start, pos)
+        else:
+            pos = _skip(buf, pos, tag, end)
+    _check_end(pos, end)
+    trip_id, route_id = trip or ("", "")
+    return TripState(trip_id, route_id, tuple(stop_times))
+
+
+def _read_entity(buf: bytes, pos: int, end: int) -> DecodedEntity:
+    entity_id = ""
+    is_deleted = False
+    span = None
+    while pos < end:
+        tag, pos = read_varint(buf, pos)
+        if tag == TAG_ENTITY_ID:
+            start, pos = _read_length(buf, pos, end)
+            entity_id = buf[start:pos].decode()
+        elif tag == TAG_IS_DELETED:
+            value, pos = read_varint(buf, pos)
+            is_deleted = bool(value)
+        elif tag == TAG_TRIP_UPDATE:
+            _check_once(span, "trip_update")
+            span = _read_length(buf, pos, end)
+            pos = span[1]
+        else:
+            pos = _skip(buf, pos, tag, end)
+    _check_end(pos, end)
+    if span is None:
+        return DecodedEntity(entity_id, is_deleted, None, None)
+    start, stop = span
+    return DecodedEntity(entity_id, is_deleted, hash(buf[start:stop]), partial(decode_trip_update, buf, start, stop))
+
+
+def _read_entities(payload: bytes, spans: List[Tuple[int, int]]) -> Iterator[DecodedEntity]:
+    try:
+        for start, stop in spans:
+            yield _read_entity(payload, start, stop)
+    except IndexError:
+        raise ValueError("truncated entity")
+
+
+def decode_feed(payload: bytes) -> Tuple[int, Iterator[DecodedEntity]]:
+    """
+    The incrementality of a serialized FeedMessage and an iterator over its
+    entities. Raises ValueError for a malformed payload.
+    """
+    incrementality = FULL_DATASET
+    entities = []
+    pos = 0
+    end = len(payload)
+    try:
+        while pos < end:
+            tag, pos = read_varint(payload, pos)
+            if tag == TAG_ENTITY:
+                span = _read_length(payload, pos, end)
+                entities.append(span)
+                pos = span[1]
+            elif tag == TAG_HEADER:
+                pos, header_end = _read_length(payload, pos, end)
+                while pos < header_end:
+                    header_tag, pos = read_varint(payload, pos)
+                    if header_tag == TAG_INCREMENTALITY:
+                        incrementality, pos = read_varint(payload, pos)
+                    else:
+                        pos = _skip(payload, pos, header_tag, header_end)
+                _check_end(pos, header_end)
+            else:
+                pos = _skip(payload, pos, tag, end)
+        if pos != end:
+            raise ValueError("field runs past the end of the feed")
+    except IndexError:
+        raise ValueError("truncated feed")
+    return incrementality, _read_entities(payload, entities)
@@ -0,0 +1,177 @@
+"""
+When to fetch, how long to wait, and when to give up on an endpoint.
+
+A FetchPolicy sits in front of one endpoint. Failed fetches back off
+exponentially with jitter, enough consecutive failures open a circuit breaker
+that lets a single probe through once it cools down, and request timeouts
+follow the latency percentiles actually observed instead of a fixed guess.
+The last good data keeps being served until it's older than the staleness
+limit. NetworkState adds hysteresis on top, so one failed poll doesn't flip
+the board to the error screen and one lucky poll doesn't flip it back.
+"""
+import random
+from collections import deque
+from typing import Optional, Tuple
+
+from data.transport import CONNECT_TIMEOUT, DEADLINE_HEADROOM, READ_TIMEOUT
+
+BASE_BACKOFF = 2.0  # seconds
+MAX_BACKOFF = 300.0
+FAILURE_THRESHOLD = 5  # consecutive failures before the breaker opens
+BREAKER_COOLDOWN = 120.0  # seconds the breaker stays open before a probe
+STALENESS_LIMIT = 300.0  # seconds the last good data is served after it stops updating
+LATENCY_SAMPLES = 50
+MIN_LATENCY_SAMPLES = 5
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_HEADROOM = 3.0  # timeout is the percentile latency times this
+MIN_READ_TIMEOUT = 2.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class LatencyTracker:
+    """Rolling window of recent request latencies"""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.samples = deque(maxlen=samples)
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class FetchPolicy:
+    """Backoff, circuit breaker, adaptive timeouts and staleness for a single endpoint"""
+
+    def __init__(
+        self,
+        name: str,
+        staleness_limit: float = STALENESS_LIMIT,
+        base_backoff: float = BASE_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        breaker_cooldown: float = BREAKER_COOLDOWN,
+        rng: Optional[random.Random] = None,
+    ):
+        self.name = name
+        self.staleness_limit = staleness_limit
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.rng = rng or random.Random()
+
+        self.latency = LatencyTracker()
+        self.state = CLOSED
+        self.failures = 0  # consecutive
+        self.next_attempt = 0.0
+        self.opened_at = 0.0
+        self.last_success: Optional[float] = None
+
+        # Counters
+        self.attempts = 0
+        self.skipped = 0
+        self.breaker_trips = 0
+
+    def ready(self, now: float) -> bool:
+        """Whether a fetch may be attempted now. A half-open breaker lets exactly one probe through."""
+        if self.state == OPEN:
+            if now - self.opened_at < self.breaker_cooldown:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+        elif self.state == HALF_OPEN or now < self.next_attempt:
+            self.skipped += 1
+            return False
+        self.attempts += 1
+        return True
+
+    def record_success(self, now: float, latency: Optional[float] = None) -> None:
+        if latency is not None:
+            self.latency.record(latency)
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.state = CLOSED
+        self.last_success = now
+
+    def record_failure(self, now: float) -> float:
+        """Count a failed fetch and return the delay before the next attempt"""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.breaker_trips += 1
+            self.state = OPEN
+            self.opened_at = now
+            return self.breaker_cooldown
+
+        # Exponential backoff with "equal jitter": at least half the step, so retries never bunch up near zero
+        step = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+        delay = step / 2 + self.rng.uniform(0, step / 2)
+        self.next_attempt = now + delay
+        return delay
+
+    def timeout(self) -> Optional[Tuple[float, float]]:
+        """
+        (connect, read) timeouts tuned to observed latency, or None to use the
+        transport's defaults until there are enough samples
+        """
+        if len(self.latency) < MIN_LATENCY_SAMPLES:
+            return None
+        read = self.latency.percentile(TIMEOUT_PERCENTILE) * TIMEOUT_HEADROOM
+        return CONNECT_TIMEOUT, min(READ_TIMEOUT, max(MIN_READ_TIMEOUT, read))
+
+    def deadline(self) -> Optional[float]:
+        """Seconds allowed for a whole response, to match the tuned timeouts"""
+        timeout = self.timeout()
+        if timeout is None:
+            return None
+        connect, read = timeout
+        return connect + read * DEADLINE_HEADROOM
+
+    def stale(self, now: float) -> bool:
+        """True once the last good data is older than the staleness limit (or there never was any)"""
+        return self.last_success is None or now - self.last_success > self.staleness_limit
+
+    def __str__(self):
+        return (
+            f"{self.name}: state={self.state} failures={self.failures} attempts={self.attempts} "
+            f"skipped={self.skipped} breaker_trips={self.breaker_trips}"
+        )
+
+
+class NetworkState:
+    """
+    Network-error state with hysteresis: it takes ``down_after`` consecutive
+    failures to report the network down and ``up_after`` consecutive successes
+    to report it back up.
+    """
+
+    def __init__(self, down_after: int = 3, up_after: int = 2):
+        self.down_after = down_after
+        self.up_after = up_after
+        self.down = False
+        self._streak = 0  # consecutive results disagreeing with the current state
+
+    def record(self, success: bool) -> bool:
+        """Record a fetch result and return whether the state changed"""
+        if success != self.down:
+            # Agrees with the current state
+            self._streak = 0
+            return False
+        self._streak += 1
+        if self._streak >= (self.up_after if self.down else self.down_after):
+            self.down = not self.down
+            self._streak = 0
+            return True
+        return False
@@ -0,0 +1,115 @@
+"""
+When to poll the trip updates feed next, from the departures on the board and BART's service hours.
+
+Rather than polling at a fixed rate, the interval follows the nearest
+departure: a train a minute or two out is polled for every few seconds, one
+twenty minutes out only every couple of minutes. Between the end of the
+service day and the next morning's opening nothing is polled at all, except
+once at the configured full refresh time.
+"""
+import datetime
+from typing import Dict, Optional
+
+# First trains by weekday (Monday is 0)
+OPENING_TIMES: Dict[int, datetime.time] = {
+    **{day: datetime.time(5, 0) for day in range(5)},
+    5: datetime.time(6, 0),
+    6: datetime.time(8, 0),
+}
+OPENING_LEAD = 15 * 60.0  # polling resumes this long before the first trains
+END_OF_DAY = "02:00"  # the last trains of a service day run past midnight
+FULL_REFRESH_TIME = "03:00"
+
+MIN_INTERVAL = 10.0  # seconds, with a train about to arrive
+MAX_INTERVAL = 120.0  # with the next train far off
+LEAD_FRACTION = 0.1  # poll interval as a share of the time until the next train
+
+
+def parse_clock_time(value: Optional[str], default: str) -> datetime.time:
+    """A config "HH:MM" time, or ``default`` if it's missing or malformed"""
+    try:
+        return datetime.datetime.strptime(value or default, "%H:%M").time()
+    except ValueError:
+        return datetime.datetime.strptime(default, "%H:%M").time()
+
+
+def _at(day: datetime.date, clock_time: datetime.time) -> float:
+    return datetime.datetime.combine(day, clock_time).timestamp()
+
+
+class ServiceCalendar:
+    """BART's service hours: open from each morning's first train until ``end_of_day`` the next night"""
+
+    def __init__(self, end_of_day: Optional[str] = None, opening_times: Optional[Dict[int, datetime.time]] = None):
+        self.end_of_day = parse_clock_time(end_of_day, END_OF_DAY)
+        self.opening_times = opening_times or OPENING_TIMES
+
+    def is_open(self, now: float) -> bool:
+        return self.next_opening(now) is None
+
+    def next_opening(self, now: float) -> Optional[float]:
+        """Epoch seconds of the next opening if service is closed at ``now``, else None"""
+        today = datetime.date.fromtimestamp(now)
+        opening = _at(today, self.opening_times[today.weekday()])
+        closing = _at(today, self.end_of_day)
+        if self.end_of_day >= self.opening_times[today.weekday()]:
+            # A service day ending before midnight
+            if now >= closing:
+                tomorrow = today + datetime.timedelta(days=1)
+                return _at(tomorrow, self.opening_times[tomorrow.weekday()])
+        elif not closing <= now < opening:
+            return None
+        return opening if now < opening else None
+
+
+class PollScheduler:
+    """Picks the delay until the next trip updates poll"""
+
+    def __init__(
+        self,
+        calendar: ServiceCalendar,
+        full_refresh_time: Optional[str] = None,
+        base_interval: float = 30.0,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+    ):
+        self.calendar = calendar
+        self.full_refresh_time = parse_clock_time(full_refresh_time, FULL_REFRESH_TIME)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.next_full_refresh: Optional[float] = None
+
+    def _full_refresh_after(self, now: float) -> float:
+        today = datetime.date.fromtimestamp(now)
+        refresh = _at(today, self.full_refresh_time)
+        if refresh <= now:
+            refresh = _at(today + datetime.timedelta(days=1), self.full_refresh_time)
+        return refresh
+
+    def full_refresh_due(self, now: float) -> bool:
+        """True once per day, on the first poll at or after the full refresh time"""
+        if self.next_full_refresh is None:
+            self.next_full_refresh = self._full_refresh_after(now)
+            return False
+        if now < self.next_full_refresh:
+            return False
+        self.next_full_refresh = self._full_refresh_after(now)
+        return True
+
+    def interval(self, now: float, next_departure: Optional[float]) -> float:
+        """Seconds until the next poll, given the epoch time of the soonest departure on the board"""
+        if self.next_full_refresh is None:
+            self.next_full_refresh = self._full_refresh_after(now)
+        until_refresh = max(0.0, self.next_full_refresh - now)
+
+        opening = self.calendar.next_opening(now)
+        if opening is not None and opening - now > OPENING_LEAD:
+            # Closed: sleep until just before the first trains, or the full refresh if that's sooner
+            return min(opening - OPENING_LEAD - now, until_refresh)
+
+        if next_departure is None:
+            interval = self.base_interval
+        else:
+            interval = (next_departure - now) * LEAD_FRACTION
+        return min(max(self.min_interval, min(interval, self.max_interval)), until_refresh)
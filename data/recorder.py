@@ -0,0 +1,255 @@
+"""
+Record and replay raw GTFS-RT payloads.
+
+A recording is a compact append-only file: an 8 byte magic header followed by
+one length-prefixed record per successful fetch::
+
+    <d fetched_at> <H endpoint length> <I payload length> <endpoint> <payload>
+
+``RecordingTransport`` wraps a BARTTransport and appends every payload it
+fetches. ``ReplayTransport`` serves a recording back through the same ``get``
+interface, so BARTData runs against it exactly as it would against the network,
+either in real time or as fast as it polls.
+"""
+import math
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from google.protobuf.message import DecodeError
+from google.transit import gtfs_realtime_pb2
+
+MAGIC = b"BARTRC01"
+RECORD_HEADER = struct.Struct("<dHI")
+
+
+class RecordedPayload(NamedTuple):
+    fetched_at: float
+    endpoint: str  # URL path, e.g. /gtfsrt/tripupdate.aspx
+    payload: bytes
+
+
+def endpoint_for(url: str) -> str:
+    return urlsplit(url).path
+
+
+def shift_feed_times(payload: bytes, offset: int) -> bytes:
+    """
+    A GTFS-RT payload with every timestamp in it moved ``offset`` seconds
+    later, or the payload as is if it isn't a feed
+    """
+    feed = gtfs_realtime_pb2.FeedMessage()
+    try:
+        feed.ParseFromString(payload)
+    except DecodeError:
+        return payload
+
+    def shift(message, field):
+        if message.HasField(field):
+            setattr(message, field, getattr(message, field) + offset)
+
+    shift(feed.header, "timestamp")
+    for entity in feed.entity:
+        if entity.HasField("trip_update"):
+            shift(entity.trip_update, "timestamp")
+            for update in entity.trip_update.stop_time_update:
+                for event in (update.arrival, update.departure):
+                    shift(event, "time")
+        if entity.HasField("vehicle"):
+            shift(entity.vehicle, "timestamp")
+        if entity.HasField("alert"):
+            for period in entity.alert.active_period:
+                shift(period, "start")
+                shift(period, "end")
+    return feed.SerializeToString()
+
+
+class PayloadRecorder:
+    """Appends payloads to a recording file, creating it if needed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+            self._file.flush()
+        self.records = 0
+
+    def record(self, endpoint: str, payload: bytes, fetched_at: Optional[float] = None) -> None:
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        name = endpoint.encode("utf-8")
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(fetched_at, len(name), len(payload)))
+            self._file.write(name)
+            self._file.write(payload)
+            # Flush every record so a crash still leaves a usable recording
+            self._file.flush()
+            self.records += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path: str) -> Iterator[RecordedPayload]:
+    """Yield every record in a recording, stopping cleanly at a truncated tail"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a payload recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            fetched_at, name_length, payload_length = RECORD_HEADER.unpack(header)
+            name = f.read(name_length)
+            payload = f.read(payload_length)
+            if len(name) < name_length or len(payload) < payload_length:
+                return
+            yield RecordedPayload(fetched_at, name.decode("utf-8"), payload)
+
+
+class RecordingTransport:
+    """A transport that records the body of every successful response it returns"""
+
+    def __init__(self, transport, recorder: PayloadRecorder):
+        self.transport = transport
+        self.recorder = recorder
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None, **options):
+        response = self.transport.get(url, params=params, headers=headers, **options)
+        if response.status_code == 200:
+            self.recorder.record(endpoint_for(url), response.content)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.transport, name)
+
+    def close(self) -> None:
+        self.recorder.close()
+        self.transport.close()
+
+
+class ReplayResponse:
+    """The parts of requests.Response that BARTData reads"""
+
+    def __init__(self, status_code: int, content: bytes = b"", headers: Optional[Dict] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise IOError(f"Replay response {self.status_code}")
+
+
+class ReplayTransport:
+    """
+    Serves a recording in place of HTTP.
+
+    With ``realtime`` each endpoint returns the latest payload recorded at or
+    before the same offset into the recording as we are into the replay, so a
+    board polling at any rate sees what it would have seen that morning.
+    Otherwise every ``get`` returns that endpoint's next payload, as fast as the
+    caller polls. ``clock()`` reports the recorded wall time, so countdowns are
+    computed against the time the payloads were fetched.
+
+    Once an endpoint runs out of payloads it keeps serving its last one, just
+    as an unchanged live feed would, or starts over if ``loop`` is set. Each
+    loop carries on ``loop_length`` seconds later, clock and the times in the
+    feeds alike, so the replayed day never runs backwards.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False):
+        self.realtime = realtime
+        self.loop = loop
+        self.payloads: Dict[str, List[RecordedPayload]] = {}
+        for record in read_recording(path):
+            self.payloads.setdefault(record.endpoint, []).append(record)
+        # Index of the next payload each endpoint will serve
+        self.positions: Dict[str, int] = {endpoint: 0 for endpoint in self.payloads}
+
+        # Times each endpoint has started over, and its last payload as served
+        self.loops: Dict[str, int] = {endpoint: 0 for endpoint in self.payloads}
+        self._served: Dict[str, tuple] = {}
+
+        fetch_times = [records[0].fetched_at for records in self.payloads.values()]
+        self.recording_start = min(fetch_times) if fetch_times else time.time()
+        self.loop_length = self._loop_length()
+        self.replay_start = time.monotonic()
+        self._recorded_now = self.recording_start
+
+    def _loop_length(self) -> int:
+        """
+        Whole seconds from the start of the recording to one poll interval past
+        its last fetch, so a loop's first payload comes an interval after the
+        previous loop's last
+        """
+        if not self.payloads:
+            return 1
+        end = max(records[-1].fetched_at for records in self.payloads.values())
+        intervals = [
+            (records[-1].fetched_at - records[0].fetched_at) / (len(records) - 1)
+            for records in self.payloads.values()
+            if len(records) > 1
+        ]
+        interval = max(intervals, default=0)
+        return max(1, math.ceil(end - self.recording_start + interval))
+
+    def clock(self) -> float:
+        """The recorded wall time the replay has reached"""
+        if self.realtime:
+            return self.recording_start + (time.monotonic() - self.replay_start)
+        return self._recorded_now
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None, **options) -> ReplayResponse:
+        """Serve the next payload for ``url``'s endpoint. Timeout ``options`` are accepted and ignored."""
+        endpoint = endpoint_for(url)
+        records = self.payloads.get(endpoint)
+        if not records:
+            return ReplayResponse(404)
+
+        position = self.positions[endpoint]
+        if self.realtime:
+            now = self.clock()
+            if self.loop:
+                loops = int((now - self.recording_start) // self.loop_length)
+                if loops != self.loops[endpoint]:
+                    self.loops[endpoint] = loops
+                    position = 0
+            offset = self.loops[endpoint] * self.loop_length
+            while position < len(records) and records[position].fetched_at + offset <= now:
+                position += 1
+            # Before this endpoint's first fetch, serve the first payload anyway
+            index = max(position - 1, 0)
+        else:
+            if position >= len(records) and self.loop:
+                position = 0
+                self.loops[endpoint] += 1
+            offset = self.loops[endpoint] * self.loop_length
+            index = min(position, len(records) - 1)
+            position += 1
+            self._recorded_now = max(self._recorded_now, records[index].fetched_at + offset)
+        self.positions[endpoint] = position
+
+        return ReplayResponse(200, self._payload(endpoint, index, offset))
+
+    def _payload(self, endpoint: str, index: int, offset: int) -> bytes:
+        """The payload at ``index``, shifted ``offset`` seconds later, kept since it's served repeatedly"""
+        served = self._served.get(endpoint)
+        if served is not None and served[:2] == (index, offset):
+            return served[2]
+        payload = self.payloads[endpoint][index].payload
+        if offset:
+            payload = shift_feed_times(payload, offset)
+        self._served[endpoint] = (index, offset, payload)
+        return payload
+
+    def finished(self) -> bool:
+        """True once every endpoint has served its last payload"""
+        return all(self.positions[endpoint] >= len(records) for endpoint, records in self.payloads.items())
+
+    def close(self) -> None:
+        pass
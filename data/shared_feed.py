@@ -0,0 +1,144 @@
+"""
+Parsed departures and alerts shared between the boards on one host.
+
+One fetcher process polls and parses the feeds, and publishes a compact
+per-station record into a memory-mapped file, in /dev/shm where there is one.
+Every board attaches read-only and picks the record up when its version
+changes, so the fetch and parse are paid once per host however many boards run.
+
+File layout: an 8 byte magic, a ``<QI`` header (version, record length), then
+the marshalled record. The version works as a seqlock: the writer makes it odd
+while the record is being rewritten and even again once it's complete, and a
+reader only keeps a copy taken while the version held the same even value.
+
+A plain file is used rather than ``multiprocessing.shared_memory``, whose
+resource tracker unlinks the segment when any attached process exits.
+"""
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Dict, Optional
+
+import debug
+
+MAGIC = b"BARTSF01"
+HEADER = struct.Struct("<QI")
+RECORD_START = len(MAGIC) + HEADER.size
+CAPACITY = 4 * 1024 * 1024  # tmpfs only backs the pages actually written
+MAX_ROWS = 20  # departures kept per station
+READ_ATTEMPTS = 5
+SHARED_FEED_NAME = "bart-feed"
+
+
+def default_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, SHARED_FEED_NAME)
+
+
+def build_record(data) -> Dict:
+    """The shared record for a BARTData instance subscribed to every station"""
+    return {
+        "fetched_at": data.trip_policy.last_success,
+        "alerts_at": data.alert_policy.last_success,
+        "network_down": data.network_state.down,
+        "stations": {
+            station_id: tuple(tuple(departure) for departure in station.ordered_departures()[:MAX_ROWS])
+            for station_id, station in data.stations.items()
+            if station.departures
+        },
+        "alerts": tuple(dict(alert) for alert in data.alerts.alerts),
+    }
+
+
+class SharedFeedWriter:
+    """The fetcher's end: publishes records to ``path``"""
+
+    def __init__(self, path: str, capacity: int = CAPACITY):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < capacity:
+                os.ftruncate(fd, capacity)
+            self._map = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+
+        version = 0
+        if self._map[: len(MAGIC)] == MAGIC:
+            # Carry on from a previous fetcher's version, so readers never see it go backwards
+            version, _ = HEADER.unpack_from(self._map, len(MAGIC))
+            version += version & 1
+        self.version = version
+        self._map[: len(MAGIC)] = MAGIC
+        HEADER.pack_into(self._map, len(MAGIC), version, 0)
+
+    def publish(self, record: Dict) -> int:
+        """Write ``record`` and return its version"""
+        payload = marshal.dumps(record)
+        if RECORD_START + len(payload) > len(self._map):
+            raise ValueError(f"Shared feed record of {len(payload)} bytes doesn't fit in {self.path}")
+        # Odd while the record is incomplete
+        struct.pack_into("<Q", self._map, len(MAGIC), self.version + 1)
+        self._map[RECORD_START : RECORD_START + len(payload)] = payload  # noqa: E203
+        self.version += 2
+        HEADER.pack_into(self._map, len(MAGIC), self.version, len(payload))
+        return self.version
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class SharedFeedReader:
+    """A board's end: reads the latest record from ``path``, attaching once the fetcher has created it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = None  # of the last record read
+        self._map = None
+
+    def _attach(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        if self._map[: len(MAGIC)] != MAGIC:
+            self._map.close()
+            self._map = None
+            return False
+        debug.info(f"Attached to the shared feed at {self.path}")
+        return True
+
+    def read(self) -> Optional[Dict]:
+        """The latest record if it's newer than the last one read, else None"""
+        if self._map is None and not self._attach():
+            return None
+        for _ in range(READ_ATTEMPTS):
+            version, length = HEADER.unpack_from(self._map, len(MAGIC))
+            if version == self.version:
+                return None
+            if version & 1:
+                # Being written
+                time.sleep(0.001)
+                continue
+            if not length:
+                # Nothing published yet
+                return None
+            payload = self._map[RECORD_START : RECORD_START + length]  # noqa: E203
+            if HEADER.unpack_from(self._map, len(MAGIC))[0] != version:
+                continue
+            try:
+                record = marshal.loads(payload)
+            except (EOFError, ValueError, TypeError):
+                continue
+            self.version = version
+            return record
+        return None
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
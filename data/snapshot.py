@@ -0,0 +1,122 @@
+"""
+Immutable, versioned snapshots of everything the renderers draw.
+
+The data layer builds a new snapshot whenever something changes and publishes
+it with a single reference swap. The render thread reads ``publisher.current``
+once per frame and gets a consistent view without taking a lock. It can also
+compare ``version`` to skip work when nothing has changed since the last frame,
+or ``wait`` for the next version instead of polling.
+"""
+import heapq
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional, Tuple
+
+from data.alerts import compose_ticker
+
+# Departures kept past the layout's max_rows, so trains leaving between
+# publishes don't leave empty rows
+SPARE_ROWS = 3
+
+
+class StationSnapshot(NamedTuple):
+    station_id: str
+    name: str
+    departures: Tuple  # soonest first, up to max_rows + SPARE_ROWS
+    scheduled: bool = False  # departures are from the timetable, not the realtime feed
+    saved_at: Optional[float] = None  # set when restored from a saved snapshot, until fresh data arrives
+
+    @classmethod
+    def from_station(cls, station) -> "StationSnapshot":
+        departures = heapq.nsmallest(station.limit + SPARE_ROWS, station.departures, key=lambda d: d.arrival_time)
+        return cls(
+            station.station_id,
+            station.name,
+            tuple(departures),
+            getattr(station, "scheduled", False),
+            getattr(station, "saved_at", None),
+        )
+
+
+class WeatherSnapshot(NamedTuple):
+    temperature: Optional[float]
+    conditions: Optional[str]
+    icon_id: Optional[str]
+
+    @classmethod
+    def from_weather(cls, weather) -> "WeatherSnapshot":
+        temperature = getattr(weather, "temperature", None)
+        if temperature is None:
+            temperature = getattr(weather, "temp", None)
+        icon_id = getattr(weather, "icon_id", None) or getattr(weather, "icon_name", None)
+        return cls(temperature, getattr(weather, "conditions", None), icon_id)
+
+
+def freeze_status(system_status: Optional[Mapping]) -> Optional[Mapping]:
+    """
+    A read-only copy of a system status dict, alerts included. Alerts that are
+    already read-only are shared, and the ticker text is composed if missing.
+    """
+    if system_status is None:
+        return None
+    frozen = dict(system_status)
+    frozen["alerts"] = tuple(
+        alert if isinstance(alert, MappingProxyType) else MappingProxyType(dict(alert))
+        for alert in system_status.get("alerts", ())
+    )
+    if "ticker" not in frozen:
+        frozen["ticker"] = compose_ticker(frozen["alerts"])
+    return MappingProxyType(frozen)
+
+
+class DataSnapshot(NamedTuple):
+    version: int
+    published_at: float
+    station: Optional[StationSnapshot]
+    system_status: Optional[Mapping]
+    weather: Optional[WeatherSnapshot]
+
+    @classmethod
+    def capture(cls, version: int, station=None, system_status=None, weather=None) -> "DataSnapshot":
+        """Build a snapshot straight from live objects"""
+        return cls(
+            version,
+            time.time(),
+            StationSnapshot.from_station(station) if station is not None else None,
+            freeze_status(system_status),
+            WeatherSnapshot.from_weather(weather) if weather is not None else None,
+        )
+
+
+EMPTY_SNAPSHOT = DataSnapshot(0, 0.0, None, None, None)
+
+
+class SnapshotPublisher:
+    """
+    Holds the current DataSnapshot. Writers serialize on a lock; readers just
+    read ``current``, which is always a complete snapshot.
+    """
+
+    def __init__(self):
+        self._snapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+
+    @property
+    def current(self) -> DataSnapshot:
+        return self._snapshot
+
+    def publish(self, **changes) -> DataSnapshot:
+        """Publish a copy of the current snapshot with ``changes`` applied and the version bumped"""
+        with self._lock:
+            previous = self._snapshot
+            snapshot = previous._replace(version=previous.version + 1, published_at=time.time(), **changes)
+            self._snapshot = snapshot
+            self._published.notify_all()
+        return snapshot
+
+    def wait(self, version: int, timeout: float) -> bool:
+        """Block until a snapshot newer than ``version`` is published or ``timeout`` passes. Returns whether one was."""
+        with self._published:
+            return self._published.wait_for(lambda: self._snapshot.version != version, timeout)
@@ -0,0 +1,102 @@
+"""
+The last published snapshot, persisted so a restarted board has something to draw at once.
+
+The station's departures, the system status and the weather are written as
+one marshalled record after an 8 byte magic, replacing the previous file
+atomically. Writes are rate limited, since the board usually runs from an SD
+card. On startup the record is read back and shown, marked with its age, while
+fresh data is fetched.
+"""
+import marshal
+import os
+from typing import Callable, Optional
+
+import debug
+from data.snapshot import DataSnapshot, StationSnapshot, WeatherSnapshot, freeze_status
+
+MAGIC = b"BARTSS01"
+WRITE_INTERVAL = 60.0  # seconds between writes at most
+MAX_AGE = 6 * 60 * 60.0  # older snapshots aren't worth showing
+
+
+class SnapshotStore:
+    """Saves and restores the board's last snapshot at ``path``"""
+
+    def __init__(self, path: str, write_interval: float = WRITE_INTERVAL, max_age: float = MAX_AGE):
+        self.path = path
+        self.write_interval = write_interval
+        self.max_age = max_age
+        self.saved_version: Optional[int] = None
+        self.last_write: Optional[float] = None
+        self.writes = 0
+
+    def save(self, snapshot: DataSnapshot, now: float) -> bool:
+        """
+        Write ``snapshot`` unless it has no departures, was already written, or
+        the last write was less than ``write_interval`` ago. Returns True if it was written.
+        """
+        if snapshot.version == self.saved_version or not snapshot.station or not snapshot.station.departures:
+            return False
+        if self.last_write is not None and now - self.last_write < self.write_interval:
+            return False
+
+        station = snapshot.station
+        status = snapshot.system_status
+        record = {
+            "saved_at": now,
+            "station": (station.station_id, station.name, tuple(map(tuple, station.departures)), station.scheduled),
+            "system_status": None if status is None else _thaw_status(status),
+            "weather": None if snapshot.weather is None else tuple(snapshot.weather),
+        }
+        temporary = self.path + ".tmp"
+        try:
+            with open(temporary, "wb") as f:
+                f.write(MAGIC)
+                marshal.dump(record, f)
+            os.replace(temporary, self.path)
+        except (OSError, ValueError) as e:
+            debug.warning(f"Couldn't save the snapshot to {self.path}: {e}")
+            return False
+        self.saved_version = snapshot.version
+        self.last_write = now
+        self.writes += 1
+        return True
+
+    def load(self, now: float, make_departure: Callable = tuple) -> Optional[DataSnapshot]:
+        """
+        The saved snapshot, with its station marked by ``saved_at``, or None if
+        there isn't a readable one younger than ``max_age``. Departures are
+        rebuilt from their fields with ``make_departure``.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError("not a saved snapshot")
+                record = marshal.load(f)
+            saved_at = record["saved_at"]
+            station_id, name, departures, scheduled = record["station"]
+            station = StationSnapshot(
+                station_id, name, tuple(make_departure(fields) for fields in departures), scheduled, saved_at
+            )
+            weather = record["weather"]
+            snapshot = DataSnapshot(
+                0,
+                saved_at,
+                station,
+                freeze_status(record["system_status"]),
+                None if weather is None else WeatherSnapshot(*weather),
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, KeyError, TypeError) as e:
+            debug.warning(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+        if now - saved_at > self.max_age:
+            return None
+        return snapshot
+
+
+def _thaw_status(status) -> dict:
+    thawed = dict(status)
+    thawed["alerts"] = tuple(dict(alert) for alert in status.get("alerts", ()))
+    return thawed
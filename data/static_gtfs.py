@@ -0,0 +1,175 @@
+"""
+Static GTFS metadata compiled into flat lookup tables.
+
+The importer reads routes.txt, trips.txt, stops.txt and stop_times.txt from a
+local static GTFS zip once, and keeps only what the board needs to resolve
+realtime entities: route -> line color, trip -> route and headsign, and
+stop -> station and platform. The tables are cached next to the zip with
+``marshal``, which loads plain dicts and tuples in a few milliseconds, and the
+cache is rebuilt whenever the zip changes.
+"""
+import csv
+import io
+import marshal
+import os
+import zipfile
+from typing import Dict, Iterator, Optional, Tuple
+
+import debug
+
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".tables"
+
+# Line colors the departures board has palette entries for, with BART's published RGB
+LINE_PALETTE = {
+    "red": (0xED, 0x1C, 0x24),
+    "orange": (0xF8, 0x96, 0x1D),
+    "yellow": (0xFF, 0xE8, 0x00),
+    "green": (0x4D, 0xB8, 0x48),
+    "blue": (0x00, 0xA6, 0xE9),
+}
+# Farthest a route_color may be from a palette color, as RGB distance, and still count as that line
+MAX_COLOR_DISTANCE = 80
+
+# Table attributes, in the order they're cached
+TABLES = ("route_colors", "trips", "stop_stations", "stop_platforms", "stations")
+
+
+def nearest_line_color(hex_color: str) -> Optional[str]:
+    """
+    The palette name closest to a GTFS route_color such as ``FFFF33``, or None
+    if no palette color is within MAX_COLOR_DISTANCE, as for the grey airport line
+    """
+    if not hex_color or len(hex_color) != 6:
+        return None
+    try:
+        rgb = tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))  # noqa: E203
+    except ValueError:
+        return None
+    distances = {name: sum((a - b) ** 2 for a, b in zip(palette, rgb)) for name, palette in LINE_PALETTE.items()}
+    name = min(distances, key=distances.get)
+    return name if distances[name] <= MAX_COLOR_DISTANCE**2 else None
+
+
+def _rows(archive: zipfile.ZipFile, name: str) -> Iterator[Dict[str, str]]:
+    if name not in archive.namelist():
+        return iter(())
+    handle = io.TextIOWrapper(archive.open(name), encoding="utf-8-sig", newline="")
+    return csv.DictReader(handle)
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class StaticGTFS:
+    """Lookup tables compiled from a static GTFS feed. Every lookup is a single dict access."""
+
+    def __init__(
+        self,
+        route_colors: Dict[str, str],
+        trips: Dict[str, Tuple[str, str, str]],
+        stop_stations: Dict[str, str],
+        stop_platforms: Dict[str, str],
+        stations: Dict[str, str],
+    ):
+        self.route_colors = route_colors  # route_id -> palette color name
+        self.trips = trips  # trip_id -> (route_id, headsign)
+        self.stop_stations = stop_stations  # stop_id -> parent station id
+        self.stop_platforms = stop_platforms  # stop_id -> platform code
+        self.stations = stations  # station id -> name
+
+    @classmethod
+    def from_zip(cls, path: str) -> "StaticGTFS":
+        """Compile the tables from a static GTFS zip"""
+        with zipfile.ZipFile(path) as archive:
+            route_colors = {}
+            for row in _rows(archive, "routes.txt"):
+                color = nearest_line_color(row.get("route_color", ""))
+                if color:
+                    route_colors[row["route_id"]] = color
+
+            stop_names = {}
+            stop_stations = {}
+            stop_platforms = {}
+            stations = {}
+            for row in _rows(archive, "stops.txt"):
+                stop_id = row["stop_id"]
+                stop_names[stop_id] = row.get("stop_name", stop_id)
+                location_type = row.get("location_type") or "0"
+                if location_type == "1":
+                    stations[stop_id] = stop_names[stop_id]
+                elif location_type == "0":
+                    stop_stations[stop_id] = row.get("parent_station") or stop_id
+                    if row.get("platform_code"):
+                        stop_platforms[stop_id] = row["platform_code"]
+            if not stations:
+                # Feeds without parent stations use the stops themselves
+                stations = {stop_id: stop_names[stop_id] for stop_id in stop_stations}
+
+            # Trips without a headsign are named after their last stop
+            last_stops: Dict[str, Tuple[int, str]] = {}
+            for row in _rows(archive, "stop_times.txt"):
+                sequence = int(row["stop_sequence"])
+                last = last_stops.get(row["trip_id"])
+                if last is None or sequence > last[0]:
+                    last_stops[row["trip_id"]] = (sequence, row["stop_id"])
+
+            trips = {}
+            for row in _rows(archive, "trips.txt"):
+                trip_id = row["trip_id"]
+                headsign = row.get("trip_headsign", "")
+                if not headsign and trip_id in last_stops:
+                    last_stop = last_stops[trip_id][1]
+                    headsign = stations.get(stop_stations.get(last_stop, last_stop), stop_names.get(last_stop, ""))
+                # direction_id only tells a route's two directions apart, so it isn't a compass direction
+                trips[trip_id] = (row["route_id"], headsign)
+
+        return cls(route_colors, trips, stop_stations, stop_platforms, stations)
+
+    @classmethod
+    def load(cls, path: str, cache_path: Optional[str] = None) -> "StaticGTFS":
+        """
+        Load the tables for ``path`` from the compiled cache, compiling and
+        caching them first if the cache is missing or older than the zip.
+        """
+        cache_path = cache_path or path + CACHE_SUFFIX
+        signature = _signature(path)
+        try:
+            with open(cache_path, "rb") as f:
+                version, cached_signature, tables = marshal.load(f)
+            if version == CACHE_VERSION and tuple(cached_signature) == signature:
+                return cls(*tables)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        debug.info(f"Compiling static GTFS tables from {path}")
+        static = cls.from_zip(path)
+        static.save(cache_path, signature)
+        return static
+
+    def save(self, cache_path: str, signature: Tuple[int, int]) -> None:
+        """Write the compiled cache atomically, so a crash never leaves half a file behind"""
+        tables = tuple(getattr(self, name) for name in TABLES)
+        temporary = cache_path + ".tmp"
+        try:
+            with open(temporary, "wb") as f:
+                marshal.dump((CACHE_VERSION, signature, tables), f)
+            os.replace(temporary, cache_path)
+        except OSError as e:
+            debug.error(f"Couldn't write static GTFS cache {cache_path}: {e}")
+
+    def line_color(self, route_id: str) -> Optional[str]:
+        return self.route_colors.get(route_id)
+
+    def headsign(self, trip_id: str) -> Optional[str]:
+        trip = self.trips.get(trip_id)
+        return trip[1] if trip and trip[1] else None
+
+    def station_for(self, stop_id: str) -> str:
+        """The station a stop (or platform) belongs to"""
+        return self.stop_stations.get(stop_id, stop_id)
+
+    def platform(self, stop_id: str) -> Optional[str]:
+        return self.stop_platforms.get(stop_id)
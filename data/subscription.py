@@ -0,0 +1,33 @@
+from typing import Iterable, Optional
+
+
+class Subscription:
+    """
+    The stations and lines a board actually displays.
+
+    Trip updates for anything outside the subscription are kept only as compact
+    trip state, and departure objects are never built for them. ``None`` means
+    "everything" for either set.
+    """
+
+    def __init__(self, station_ids: Optional[Iterable[str]] = None, line_colors: Optional[Iterable[str]] = None):
+        self.station_ids = set(station_ids) if station_ids else None
+        self.line_colors = {color.lower() for color in line_colors} if line_colors else None
+
+    def wants_station(self, station_id: str) -> bool:
+        return self.station_ids is None or station_id in self.station_ids
+
+    def wants_line(self, line_color: str) -> bool:
+        return self.line_colors is None or line_color in self.line_colors
+
+    def add_station(self, station_id: str) -> bool:
+        """Subscribe to one more station. Returns True if it wasn't already subscribed."""
+        if self.wants_station(station_id):
+            return False
+        self.station_ids.add(station_id)
+        return True
+
+    def __repr__(self):
+        stations = "all" if self.station_ids is None else sorted(self.station_ids)
+        lines = "all" if self.line_colors is None else sorted(self.line_colors)
+        return f"Subscription(stations={stations}, lines={lines})"
@@ -0,0 +1,236 @@
+"""
+Offline timetable compiled from static GTFS, for when the realtime feed is down.
+
+Scheduled departures from stop_times.txt are grouped per (station, service)
+into sorted arrays of seconds past the service day's midnight, with a parallel
+array of small indexes into a label table (route, headsign, platform). Everything is written to one file next to the GTFS zip and
+memory-mapped at startup, so nothing is read until a station is looked up and
+"the next N departures after t" is a bisect over a zero-copy slice.
+
+File layout: an 8 byte magic, a ``<II`` header (metadata length, row count),
+the marshalled metadata, padding to 4 bytes, then the ``i`` time column and
+the label column, both in native byte order. Label indexes are ``H``, or ``I``
+for a feed with more labels than that holds.
+"""
+import bisect
+import csv
+import datetime
+import heapq
+import io
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+import zipfile
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import debug
+from data.static_gtfs import StaticGTFS
+
+MAGIC = b"BARTTT02"
+HEADER = struct.Struct("<II")
+TIMETABLE_SUFFIX = ".timetable"
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+SERVICE_ADDED = 1
+SERVICE_REMOVED = 2
+# Label indexes below this fit the 2 byte label column
+SHORT_LABEL_LIMIT = 1 << 16
+
+
+class ScheduledDeparture(NamedTuple):
+    departure_time: int  # epoch seconds
+    route_id: str
+    headsign: str
+    platform: str
+
+
+def parse_gtfs_time(value: str) -> Optional[int]:
+    """Seconds past midnight for a GTFS ``H:MM:SS`` time, which may run past 24:00"""
+    if not value:
+        return None
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def service_date(value: datetime.date) -> int:
+    """A date as the YYYYMMDD integer GTFS uses"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _rows(archive: zipfile.ZipFile, name: str):
+    if name not in archive.namelist():
+        return iter(())
+    return csv.DictReader(io.TextIOWrapper(archive.open(name), encoding="utf-8-sig", newline=""))
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Timetable:
+    """A compiled, memory-mapped timetable. Build one with ``Timetable.load``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled timetable")
+        meta_length, rows = HEADER.unpack_from(self._map, len(MAGIC))
+        meta_start = len(MAGIC) + HEADER.size
+        meta = marshal.loads(self._map[meta_start : meta_start + meta_length])  # noqa: E203
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was compiled on a {meta['byteorder']}-endian machine")
+
+        self.signature = tuple(meta["signature"])
+        self.services: Dict[str, Tuple[Tuple[int, ...], int, int]] = meta["services"]
+        self.exceptions: Dict[int, Dict[str, int]] = meta["exceptions"]
+        self.labels: List[Tuple[str, str, str]] = meta["labels"]
+        self.index: Dict[str, Dict[str, Tuple[int, int]]] = meta["index"]  # station -> service -> (start, count)
+
+        view = memoryview(self._map)
+        times_start = (meta_start + meta_length + 3) & ~3
+        self.times = view[times_start : times_start + rows * 4].cast("i")  # noqa: E203
+        labels_start = times_start + rows * 4
+        typecode = meta["label_typecode"]
+        labels_end = labels_start + rows * array(typecode).itemsize
+        self.label_indexes = view[labels_start:labels_end].cast(typecode)
+
+    @classmethod
+    def load(cls, gtfs_path: str, static: Optional[StaticGTFS] = None) -> "Timetable":
+        """Map the timetable compiled from ``gtfs_path``, compiling it first if it's missing or stale"""
+        path = gtfs_path + TIMETABLE_SUFFIX
+        signature = _signature(gtfs_path)
+        try:
+            timetable = cls(path)
+            if timetable.signature == signature:
+                return timetable
+            timetable.close()
+        except (OSError, ValueError, EOFError, KeyError, struct.error):
+            pass
+
+        debug.info(f"Compiling timetable from {gtfs_path}")
+        compile_timetable(gtfs_path, path, static or StaticGTFS.load(gtfs_path), signature)
+        return cls(path)
+
+    def close(self) -> None:
+        self.times.release()
+        self.label_indexes.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # A slice is still in use; the map closes when it's collected
+            pass
+
+    def active_services(self, day: datetime.date) -> List[str]:
+        date = service_date(day)
+        active = set()
+        for service_id, (weekdays, start, end) in self.services.items():
+            if start <= date <= end and weekdays[day.weekday()]:
+                active.add(service_id)
+        for service_id, exception in self.exceptions.get(date, {}).items():
+            if exception == SERVICE_ADDED:
+                active.add(service_id)
+            elif exception == SERVICE_REMOVED:
+                active.discard(service_id)
+        return sorted(active)
+
+    def next_departures(self, station_id: str, after: float, count: int) -> List[ScheduledDeparture]:
+        """The next ``count`` scheduled departures from ``station_id`` at or after epoch ``after``"""
+        services = self.index.get(station_id)
+        if not services:
+            return []
+
+        today = datetime.date.fromtimestamp(after)
+        runs = []
+        # Yesterday's service day covers trips running past midnight (times over 24:00)
+        for day in (today - datetime.timedelta(days=1), today):
+            midnight = int(time.mktime(day.timetuple()))
+            seconds = int(after) - midnight
+            for service_id in self.active_services(day):
+                span = services.get(service_id)
+                if span is None:
+                    continue
+                start, rows = span
+                times = self.times[start : start + rows]  # noqa: E203
+                first = bisect.bisect_left(times, seconds)
+                runs.append([(midnight + times[row], start + row) for row in range(first, min(first + count, rows))])
+
+        departures = []
+        for departure_time, row in heapq.merge(*runs):
+            route_id, headsign, platform = self.labels[self.label_indexes[row]]
+            departures.append(ScheduledDeparture(departure_time, route_id, headsign, platform))
+            if len(departures) == count:
+                break
+        return departures
+
+
+def compile_timetable(gtfs_path: str, path: str, static: StaticGTFS, signature: Tuple[int, int]) -> None:
+    """Compile stop_times.txt and the service calendar into a timetable file, atomically"""
+    with zipfile.ZipFile(gtfs_path) as archive:
+        services = {}
+        for row in _rows(archive, "calendar.txt"):
+            weekdays = tuple(int(row.get(day) or 0) for day in WEEKDAYS)
+            services[row["service_id"]] = (weekdays, int(row["start_date"]), int(row["end_date"]))
+
+        exceptions: Dict[int, Dict[str, int]] = {}
+        for row in _rows(archive, "calendar_dates.txt"):
+            exceptions.setdefault(int(row["date"]), {})[row["service_id"]] = int(row["exception_type"])
+
+        trip_services = {}
+        for row in _rows(archive, "trips.txt"):
+            trip_services[row["trip_id"]] = row["service_id"]
+
+        labels: List[Tuple[str, str, str]] = []
+        label_indexes: Dict[Tuple[str, str, str], int] = {}
+        groups: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for row in _rows(archive, "stop_times.txt"):
+            seconds = parse_gtfs_time(row.get("departure_time")) or parse_gtfs_time(row.get("arrival_time"))
+            trip_id = row["trip_id"]
+            service_id = trip_services.get(trip_id)
+            if seconds is None or service_id is None:
+                continue
+            stop_id = row["stop_id"]
+            route_id = static.trips[trip_id][0] if trip_id in static.trips else ""
+            headsign = static.headsign(trip_id) or ""
+            label = (route_id, headsign, static.platform(stop_id) or "")
+            label_index = label_indexes.get(label)
+            if label_index is None:
+                label_index = label_indexes[label] = len(labels)
+                labels.append(label)
+            groups.setdefault((static.station_for(stop_id), service_id), []).append((seconds, label_index))
+
+    times = array("i")
+    # Wider indexes only when the labels wouldn't fit, rather than wrapping around
+    label_column = array("H" if len(labels) <= SHORT_LABEL_LIMIT else "I")
+    index: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    for (station_id, service_id), rows in sorted(groups.items()):
+        rows.sort()
+        index.setdefault(station_id, {})[service_id] = (len(times), len(rows))
+        times.extend(seconds for seconds, _ in rows)
+        label_column.extend(label_index for _, label_index in rows)
+
+    meta = marshal.dumps(
+        {
+            "signature": signature,
+            "byteorder": sys.byteorder,
+            "services": services,
+            "exceptions": exceptions,
+            "labels": labels,
+            "label_typecode": label_column.typecode,
+            "index": index,
+        }
+    )
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(meta), len(times)))
+        f.write(meta)
+        f.write(b"\0" * (-(len(MAGIC) + HEADER.size + len(meta)) % 4))
+        f.write(times.tobytes())
+        f.write(label_column.tobytes())
+    os.replace(temporary, path)
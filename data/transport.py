@@ -0,0 +1,163 @@
+import time
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+from version import SCRIPT_NAME, SCRIPT_VERSION
+
+BART_API_BASE = "https://api.bart.gov"
+CONNECT_TIMEOUT = 3.05  # seconds, slightly over a TCP retransmit window
+READ_TIMEOUT = 10  # seconds
+POOL_SIZE = 4
+READ_CHUNK = 16 * 1024
+# urllib3 releases without read1 block until a whole chunk arrives, so they read smaller ones
+BLOCKING_READ_CHUNK = 1024
+DEADLINE_HEADROOM = 2.0  # a whole response may take this many read timeouts, plus the connect timeout
+
+
+class EndpointStats:
+    """Latency and byte counters for a single endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.bytes = 0  # decoded body bytes
+        self.wire_bytes = 0  # bytes on the wire, before gzip/deflate decoding
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+
+    def record(self, latency: float, body_bytes: int, wire_bytes: int) -> None:
+        self.requests += 1
+        self.bytes += body_bytes
+        self.wire_bytes += wire_bytes
+        self.total_latency += latency
+        self.last_latency = latency
+
+    def average_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    def __str__(self):
+        return "requests={} failures={} bytes={} wire_bytes={} avg_latency={:.3f}s".format(
+            self.requests, self.failures, self.bytes, self.wire_bytes, self.average_latency()
+        )
+
+
+def _arrived_chunks(response: requests.Response) -> Iterator[bytes]:
+    """
+    A streamed body in chunks of whatever has arrived, up to READ_CHUNK bytes,
+    rather than waiting for each chunk to fill. urllib3 errors are raised as
+    requests exceptions, as iter_content raises them.
+    """
+    raw = response.raw
+    if not hasattr(raw, "read1"):
+        yield from response.iter_content(BLOCKING_READ_CHUNK)
+        return
+    try:
+        while True:
+            chunk = raw.read1(READ_CHUNK, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except SSLError as e:
+        raise requests.exceptions.SSLError(e)
+
+
+class BARTTransport:
+    """
+    Shared HTTP layer for every BART API endpoint.
+
+    A single requests.Session keeps connections to api.bart.gov alive between
+    polls so each request skips the TCP and TLS handshakes, negotiates gzip/deflate,
+    and always applies explicit connect/read timeouts.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = connect_timeout + read_timeout * DEADLINE_HEADROOM
+        self.stats: Dict[str, EndpointStats] = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+                "User-Agent": f"{SCRIPT_NAME}/{SCRIPT_VERSION}",
+            }
+        )
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        deadline: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        GET ``url`` with the API key attached, recording latency and bytes for its endpoint.
+        ``timeout`` overrides the (connect, read) timeouts and ``deadline`` the cap
+        on the whole response in seconds, which a read timeout alone doesn't
+        enforce for a body arriving a few bytes at a time.
+        """
+        query = {"api_key": self.api_key}
+        if params:
+            query.update(params)
+
+        stats = self.endpoint_stats(url)
+        start = time.monotonic()
+        try:
+            response = self.session.get(
+                url, params=query, headers=headers, timeout=timeout or self.timeout, stream=True
+            )
+            body = self._read_before(response, start + (deadline or self.deadline))
+        except requests.RequestException:
+            stats.failures += 1
+            raise
+
+        wire_bytes = int(response.headers.get("Content-Length", len(body)))
+        stats.record(time.monotonic() - start, len(body), wire_bytes)
+        return response
+
+    @staticmethod
+    def _read_before(response: requests.Response, deadline: float) -> bytes:
+        """Read a streamed body, giving up if it isn't complete by ``deadline`` (monotonic)"""
+        chunks = []
+        try:
+            for chunk in _arrived_chunks(response):
+                chunks.append(chunk)
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"Response from {response.url} not complete before its deadline")
+        finally:
+            response.close()
+        # Make the body available as response.content, as a non-streamed request would
+        response._content = b"".join(chunks)
+        return response._content
+
+    def endpoint_stats(self, url: str) -> EndpointStats:
+        """Counters for the endpoint serving ``url``, keyed by its path"""
+        endpoint = urlsplit(url).path
+        if endpoint not in self.stats:
+            self.stats[endpoint] = EndpointStats()
+        return self.stats[endpoint]
+
+    def close(self) -> None:
+        self.session.close()
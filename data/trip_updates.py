@@ -0,0 +1,171 @@
+from functools import partial
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Set, Tuple
+
+from google.transit import gtfs_realtime_pb2
+
+FULL_DATASET = gtfs_realtime_pb2.FeedHeader.FULL_DATASET
+DIFFERENTIAL = gtfs_realtime_pb2.FeedHeader.DIFFERENTIAL
+
+
+class TripState(NamedTuple):
+    """
+    Compact trip-level state for one trip update entity: every stop, whether or
+    not any board currently shows it. Departures can be rebuilt from this
+    without refetching or reparsing the feed.
+    """
+
+    trip_id: str
+    route_id: str
+    stop_times: Tuple[Tuple[str, int, int], ...]  # (stop_id, event epoch, delay)
+
+
+def trip_state_from_entity(entity: gtfs_realtime_pb2.FeedEntity) -> TripState:
+    """Flatten a trip update entity, using the arrival time or the departure time if there's no arrival"""
+    trip_update = entity.trip_update
+    stop_times = []
+    for stop_time_update in trip_update.stop_time_update:
+        event = stop_time_update.arrival if stop_time_update.HasField("arrival") else stop_time_update.departure
+        stop_times.append((stop_time_update.stop_id, event.time, event.delay))
+    return TripState(trip_update.trip.trip_id, trip_update.trip.route_id, tuple(stop_times))
+
+
+# Builds {station_id: departures} from a single trip's state
+TripBuilder = Callable[[TripState], Dict[str, Sequence]]
+
+# (entity id, is_deleted, fingerprint of its trip update or None without one, decodes the TripState)
+EntityRecord = Tuple[str, bool, Optional[int], Optional[Callable[[], TripState]]]
+
+
+def entity_records(feed: gtfs_realtime_pb2.FeedMessage) -> Iterable[EntityRecord]:
+    """The entities of a parsed feed as records for ``TripUpdateApplier.apply_entities``"""
+    for entity in feed.entity:
+        if entity.HasField("trip_update"):
+            fingerprint = hash(entity.SerializeToString())
+            yield entity.id, entity.is_deleted, fingerprint, partial(trip_state_from_entity, entity)
+        else:
+            yield entity.id, entity.is_deleted, None, None
+
+
+class TripUpdateApplier:
+    """
+    Applies GTFS-RT trip update feeds one entity at a time.
+
+    Each entity's trip state and departures are kept keyed by ``entity.id`` so a
+    new feed only has to rebuild the entities that were added, changed or
+    deleted, and only the stations those entities stop at are reported as touched.
+
+    DIFFERENTIAL feeds are applied as patches: entities replace the previous
+    entity with the same id, and ``is_deleted`` entities are removed.
+    FULL_DATASET feeds are diffed against the previous feed, so entities that
+    didn't change cost one serialization and nothing else.
+
+    ``apply_entities`` takes entity records rather than a parsed feed, so a
+    decoder that fingerprints entities straight from the payload can skip
+    decoding the ones that didn't change.
+    """
+
+    def __init__(self):
+        self.fingerprints: Dict[str, int] = {}
+        self.trips: Dict[str, TripState] = {}
+        self.contributions: Dict[str, Dict[str, Sequence]] = {}
+        self.by_station: Dict[str, Dict[str, Sequence]] = {}
+
+        # Counters from the most recent apply()
+        self.added = 0
+        self.changed = 0
+        self.deleted = 0
+
+    def apply(self, feed: gtfs_realtime_pb2.FeedMessage, build: TripBuilder) -> Set[str]:
+        """Apply ``feed`` and return the ids of the stations whose departures changed"""
+        return self.apply_entities(feed.header.incrementality, entity_records(feed), build)
+
+    def apply_entities(self, incrementality: int, entities: Iterable[EntityRecord], build: TripBuilder) -> Set[str]:
+        """Apply a feed given as entity records, returning the ids of the stations whose departures changed"""
+        self.added = self.changed = self.deleted = 0
+        touched = set()
+
+        if incrementality == DIFFERENTIAL:
+            for entity_id, is_deleted, fingerprint, decode in entities:
+                if is_deleted:
+                    touched |= self._remove(entity_id)
+                elif fingerprint is not None:
+                    touched |= self._upsert(entity_id, fingerprint, decode, build)
+            return touched
+
+        seen = set()
+        for entity_id, _, fingerprint, decode in entities:
+            if fingerprint is None:
+                continue
+            seen.add(entity_id)
+            touched |= self._upsert(entity_id, fingerprint, decode, build)
+
+        for entity_id in [entity_id for entity_id in self.contributions if entity_id not in seen]:
+            touched |= self._remove(entity_id)
+        return touched
+
+    def rebuild(self, build: TripBuilder) -> Set[str]:
+        """
+        Rebuild every trip's departures from its stored state, e.g. after the
+        set of displayed stations changed. Returns the touched station ids.
+        """
+        touched = set(self.by_station)
+        self.contributions.clear()
+        self.by_station.clear()
+        for entity_id, trip in self.trips.items():
+            touched |= self._attach(entity_id, build(trip))
+        return touched
+
+    def departures_for(self, station_id: str) -> list:
+        """All departures currently contributed to ``station_id``, unordered"""
+        departures = []
+        for entity_departures in self.by_station.get(station_id, {}).values():
+            departures.extend(entity_departures)
+        return departures
+
+    def clear(self) -> None:
+        self.fingerprints.clear()
+        self.trips.clear()
+        self.contributions.clear()
+        self.by_station.clear()
+
+    def _upsert(
+        self, entity_id: str, fingerprint: int, decode: Callable[[], TripState], build: TripBuilder
+    ) -> Set[str]:
+        previous = self.fingerprints.get(entity_id)
+        if previous == fingerprint:
+            return set()
+
+        trip = decode()
+        if previous is None:
+            self.added += 1
+            touched = set()
+        else:
+            self.changed += 1
+            touched = self._detach(entity_id)
+
+        self.fingerprints[entity_id] = fingerprint
+        self.trips[entity_id] = trip
+        return touched | self._attach(entity_id, build(trip))
+
+    def _remove(self, entity_id: str) -> Set[str]:
+        if entity_id not in self.trips:
+            return set()
+        self.deleted += 1
+        touched = self._detach(entity_id)
+        del self.fingerprints[entity_id]
+        del self.trips[entity_id]
+        return touched
+
+    def _attach(self, entity_id: str, contribution: Dict[str, Sequence]) -> Set[str]:
+        self.contributions[entity_id] = contribution
+        for station_id, departures in contribution.items():
+            self.by_station.setdefault(station_id, {})[entity_id] = departures
+        return set(contribution)
+
+    def _detach(self, entity_id: str) -> Set[str]:
+        contribution = self.contributions.pop(entity_id, {})
+        for station_id in contribution:
+            station_entities = self.by_station.get(station_id)
+            if station_entities is not None:
+                station_entities.pop(entity_id, None)
+        return set(contribution)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Fetch the BART feeds once for every board on this host.
+
+Polls trip updates and alerts for every station and publishes the parsed
+departures into a shared memory file. Boards configured with
+"shared_feed": "<path>" read from it instead of polling the API themselves.
+
+Usage: python feed_fetcher.py [--path /dev/shm/bart-feed] [--api-key KEY] [--api-base URL] [--refresh-rate 30]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import debug
+from data.bart import BARTData
+from data.shared_feed import SharedFeedWriter, build_record, default_path
+from data.subscription import Subscription
+
+LOOP_INTERVAL = 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=default_path(), help="Shared memory file to publish to")
+    parser.add_argument("--api-key", default="", help="BART API key")
+    parser.add_argument("--api-base", help="Fetch from another server, e.g. a local stand-in")
+    parser.add_argument("--refresh-rate", type=int, default=30, help="Seconds between polls while trains run")
+    parser.add_argument("--end-of-day", default=None, help="When the service day ends, HH:MM")
+    parser.add_argument("--full-refresh-time", default=None, help="Daily full refresh, HH:MM")
+    args = parser.parse_args()
+
+    config = SimpleNamespace(
+        bart_api_key=args.api_key,
+        bart_api_base=args.api_base,
+        api_refresh_rate=args.refresh_rate,
+        preferred_stations=None,
+        end_of_day=args.end_of_day,
+        full_refresh_time=args.full_refresh_time,
+    )
+    data = BARTData(config)
+    # Every station, since any board may show any of them
+    data.subscription = Subscription()
+    # Some train is always about to arrive somewhere, so poll at the refresh rate rather than faster
+    data.scheduler.min_interval = data.update_frequency
+
+    writer = SharedFeedWriter(args.path)
+    debug.info(f"Publishing BART departures to {args.path}")
+    published = None
+    try:
+        while True:
+            data.update_departures()
+            data.get_system_status()
+            state = (
+                data.trip_changes.stats.fetched,
+                data.alerts.version,
+                data.network_state.down,
+                data.trip_policy.last_success,
+                data.alert_policy.last_success,
+            )
+            if state != published:
+                writer.publish(build_record(data))
+                published = state
+            time.sleep(LOOP_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        data.transport.close()
+
+
+if __name__ == "__main__":
+    main()
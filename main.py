@@ -54,9 +54,8 @@ def main(matrix, config_base):
     # Create a new data object to manage the BART data
     # This will fetch initial data from BART API
     data = Data(config)
-    # create render thread
+    # create render thread, which can draw a restored snapshot straight away
     render = threading.Thread(target=__render_main, args=[matrix, data], name="render_thread", daemon=True)
-    time.sleep(1)
     render.start()
     screen = data.get_screen_type()
     if screen == ScreenType.ALWAYS_NEWS:
@@ -22,6 +22,9 @@ GREEN = (0, 165, 81)  # BART green line
 ORANGE = (250, 146, 0)  # BART orange line
 LIGHT_BLUE = (0, 118, 206)  # BART blue line
 
+# Where to fetch live data from; --api-base points this at a local stand-in server
+API_BASE = "https://api.bart.gov"
+
 class PygameSimulator:
     """Simulator for BART LED Matrix display using Pygame"""
     
@@ -88,7 +91,7 @@ class PygameSimulator:
 
 def fetch_live_departures(api_key, station):
     """Fetch live departure data from the BART GTFS Realtime API."""
-    url = f"https://api.bart.gov/gtfsrt/tripupdates.aspx?key={api_key}"
+    url = f"{API_BASE}/gtfsrt/tripupdate.aspx?key={api_key}"
     response = requests.get(url)
     if response.status_code == 200:
         feed = gtfs_realtime_pb2.FeedMessage()
@@ -205,6 +208,7 @@ def render_network_error(display):
 # Update the main function to pass API key and station
 def main():
     """Main function to run the simulator"""
+    global API_BASE
     parser = argparse.ArgumentParser(description="Pygame BART Board Simulator")
     parser.add_argument('--mode', type=str, default='departures',
                         choices=['departures', 'system_status', 'offday', 'network_error', 'cycle'],
@@ -215,8 +219,11 @@ def main():
                         help='Display height in pixels (Default: 32)')
     parser.add_argument('--scale', type=int, default=10,
                         help='Display scale factor (Default: 10)')
+    parser.add_argument('--api-base', type=str, default=API_BASE,
+                        help='BART API server, e.g. a local stand-in (Default: https://api.bart.gov)')
 
     args = parser.parse_args()
+    API_BASE = args.api_base
 
     # Hardcoded API key and station
     api_key = "MW9S-E7SL-26DU-VV8V"
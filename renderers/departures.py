@@ -1,6 +1,8 @@
 from PIL import Image
 import debug
 import time
+from renderers.frame_pacing import next_tick
+from renderers.layers import StaticLayer, fill
 from utils import center_text_position
 
 class DepartureRenderer:
@@ -12,43 +14,133 @@ class DepartureRenderer:
         self.colors = colors
         self.coords = coords
         self.canvas = matrix.CreateFrameCanvas()
+
+        # Upcoming rows from the last snapshot version we rendered
+        self.version = None
+        self.upcoming = []
+
+        # Header bars, drawn once; only the header text and the rows are redrawn, when they change
+        self.layer = None
         
-    def render(self):
+    def render(self, now=None):
         """Render the current station departure board"""
-        station = self.data.current_station
+        # Read one consistent snapshot for the whole frame
+        snapshot = self.data.snapshot
+        station = snapshot.station
         if not station:
             return
-            
-        # Clear the canvas
-        self.canvas.Clear()
+
+        # Every countdown on this frame is derived from the same clock reading
+        if now is None:
+            now = self.data.clock()
+        departures = self._upcoming_departures(snapshot, now)
+        layer = self._static_layer()
+
+        # The column labels sit on the static layer, so they're drawn whenever it's pasted
+        if layer.paste(self.canvas):
+            self._draw_departure_header()
         
         # Draw the station header
-        self._draw_station_header(station.name)
-        
-        # Draw the departure list header
-        self._draw_departure_header()
+        time_text = self._header_time_text(now, station.scheduled, station.saved_at)
+        if layer.update(self.canvas, "header", self._header_box(), (station.name, time_text)):
+            self._draw_station_header(station.name, now, station.scheduled, station.saved_at)
         
         # Draw departure rows
-        self._draw_departures(station.departures)
+        rows = departures[:self._max_rows()]
+        content = (station.scheduled, tuple(self._row_content(departure, now) for departure in rows))
+        if layer.update(self.canvas, "rows", self._rows_box(), content):
+            self._draw_departures(departures, now, station.scheduled)
         
         # Update the canvas
+        shown = self.canvas
         self.canvas = self.matrix.SwapOnVSync(self.canvas)
+        layer.swapped(shown, self.canvas)
+
+    def invalidate(self):
+        """Repaint every canvas in full, once other screens have drawn on them"""
+        if self.layer is not None:
+            self.layer.invalidate()
+
+    def _static_layer(self):
+        """The header bars as a bitmap, built once for this layout, colors and canvas size"""
+        if self.layer is None or self.layer.image.size != (self.canvas.width, self.canvas.height):
+            station_header = self.coords["station"]["header"]
+            departure_header = self.coords["departures"]["header"]
+            self.layer = StaticLayer(
+                self.canvas.width,
+                self.canvas.height,
+                [
+                    (self._box(station_header), self.colors["station"]["header"]["background"]),
+                    (self._box(departure_header), self.colors["departures"]["header"]["background"]),
+                ],
+            )
+        return self.layer
+
+    @staticmethod
+    def _box(coords):
+        return coords["x"], coords["y"], coords["width"], coords["height"]
+
+    def _header_box(self):
+        return self._box(self.coords["station"]["header"])
+
+    def _rows_box(self):
+        """Everything below the column labels"""
+        header = self.coords["departures"]["header"]
+        top = header["y"] + header["height"]
+        return 0, top, self.canvas.width, self.canvas.height - top
+
+    @staticmethod
+    def _row_content(departure, now):
+        """What a row shows, which is all that decides whether it's redrawn"""
+        return (
+            departure.line_color,
+            departure.destination_name,
+            departure.minutes_at(now),
+            departure.delay > 60,
+            departure.platform,
+        )
+
+    def fingerprint(self, now):
+        """Everything render(now) would draw that can change: the snapshot, the header time and each row's minutes"""
+        snapshot = self.data.snapshot
+        station = snapshot.station
+        if not station:
+            return None
+        departures = self._upcoming_departures(snapshot, now)[:self._max_rows()]
+        return (
+            snapshot.version,
+            self._header_time_text(now, station.scheduled, station.saved_at),
+            tuple(departure.minutes_at(now) for departure in departures),
+        )
+
+    def next_change(self, now):
+        """When the next row's countdown ticks over or the header's time or age changes, None without a station"""
+        snapshot = self.data.snapshot
+        station = snapshot.station
+        if not station:
+            return None
+        departures = self._upcoming_departures(snapshot, now)[:self._max_rows()]
+        changes = [departure.next_change_at(now) for departure in departures]
+        if station.saved_at is not None:
+            changes.append(station.saved_at + next_tick(now - station.saved_at, 1 / 60))
+        elif not station.scheduled:
+            # Local minutes start on UTC minute boundaries
+            changes.append(next_tick(now, 1 / 60))
+        return min(changes, default=None)
+
+    def _upcoming_departures(self, snapshot, now):
+        """Trains that haven't left yet. Only refiltered on a new snapshot or when the first train leaves."""
+        if snapshot.version != self.version or (self.upcoming and self.upcoming[0].departed(now)):
+            self.upcoming = [d for d in snapshot.station.departures if not d.departed(now)]
+            self.version = snapshot.version
+        return self.upcoming
         
-    def _draw_station_header(self, station_name):
-        """Draw the station name and current time at the top of the display"""
-        # Draw header background
-        header_coords = self.coords["station"]["header"]
-        header_color = self.colors["station"]["header"]["background"]
-        for x in range(header_coords["width"]):
-            for y in range(header_coords["height"]):
-                self.canvas.SetPixel(
-                    header_coords["x"] + x,
-                    header_coords["y"] + y,
-                    header_color["r"],
-                    header_color["g"],
-                    header_color["b"]
-                )
-                
+    def _draw_station_header(self, station_name, now, scheduled=False, saved_at=None):
+        """
+        Draw the station name and current time at the top of the display, or "Sched" for
+        timetable departures and the age of departures restored from a saved snapshot
+        """
+        # The header background comes from the static layer
         # Draw station name
         name_color = self.colors["station"]["header"]["text"]
         name_coords = self.coords["station"]["name"]
@@ -68,10 +160,7 @@ class DepartureRenderer:
         time_color = self.colors["station"]["header"]["text"]
         time_coords = self.coords["station"]["time"]
         time_font = self.data.font.get_font(time_coords.get("font_name", "5x7"))
-        time_text = time.strftime("%H:%M" if self.data.config.time_format == "24h" else "%I:%M %p")
-        if self.data.config.time_format != "24h":
-            # Remove leading zero from 12-hour format
-            time_text = time_text.lstrip("0")
+        time_text = self._header_time_text(now, scheduled, saved_at)
             
         self.canvas.SetFont(time_font)
         self.canvas.DrawText(
@@ -84,22 +173,28 @@ class DepartureRenderer:
             time_color["b"]
         )
         
+    def _header_time_text(self, now, scheduled=False, saved_at=None):
+        """The clock time, or "Sched" for timetable departures, or the age of a restored snapshot"""
+        if saved_at is not None:
+            return self._age_text(now - saved_at)
+        if scheduled:
+            return "Sched"
+        time_text = time.strftime("%H:%M" if self.data.config.time_format == "24h" else "%I:%M %p", time.localtime(now))
+        if self.data.config.time_format != "24h":
+            # Remove leading zero from 12-hour format
+            time_text = time_text.lstrip("0")
+        return time_text
+
+    @staticmethod
+    def _age_text(seconds):
+        """A short age like "4m ago" or "2h ago" """
+        minutes = max(0, int(seconds // 60))
+        if minutes < 60:
+            return f"{minutes}m ago"
+        return f"{minutes // 60}h ago"
+
     def _draw_departure_header(self):
-        """Draw the column headers for departure information"""
-        header_coords = self.coords["departures"]["header"]
-        header_color = self.colors["departures"]["header"]["background"]
-        
-        # Draw header background
-        for x in range(header_coords["width"]):
-            for y in range(header_coords["height"]):
-                self.canvas.SetPixel(
-                    header_coords["x"] + x,
-                    header_coords["y"] + y,
-                    header_color["r"],
-                    header_color["g"],
-                    header_color["b"]
-                )
-                
+        """Draw the column headers for departure information, over the static layer's header bar"""
         # Draw header text
         text_color = self.colors["departures"]["header"]["text"]
         font = self.data.font.get_font(self.coords.get("defaults", {}).get("font_name", "4x6"))
@@ -141,7 +236,7 @@ class DepartureRenderer:
             text_color["b"]
         )
         
-    def _draw_departures(self, departures):
+    def _draw_departures(self, departures, now, scheduled=False):
         """Draw the departure rows showing trains"""
         if not departures:
             # No departures to show
@@ -154,7 +249,7 @@ class DepartureRenderer:
         self.canvas.SetFont(font)
         
         # Limit to max rows configured
-        max_rows = rows_config.get("max_rows", 3)
+        max_rows = self._max_rows()
         departures_to_show = departures[:max_rows]
         
         for i, departure in enumerate(departures_to_show):
@@ -175,15 +270,14 @@ class DepartureRenderer:
                 {"r": 255, "g": 255, "b": 255}
             )
             
-            for x in range(line_coords["width"]):
-                for y in range(line_coords["height"]):
-                    self.canvas.SetPixel(
-                        line_coords["x"] + x,
-                        line_coords["y"] + y + y_offset,
-                        line_color["r"],
-                        line_color["g"],
-                        line_color["b"]
-                    )
+            fill(
+                self.canvas,
+                line_coords["x"],
+                line_coords["y"] + y_offset,
+                line_coords["width"],
+                line_coords["height"],
+                line_color
+            )
                     
             # Draw destination
             dest_coords = rows_config["destination"]
@@ -206,9 +300,14 @@ class DepartureRenderer:
             min_coords = rows_config["minutes"]
             
             # Choose color based on minutes remaining
-            if departure.minutes == 0:
+            minutes = departure.minutes_at(now)
+            if scheduled:
+                # Timetable times aren't live, so don't signal boarding or delays
+                minute_colors = self.colors["departures"]["minutes"]
+                min_color = minute_colors.get("scheduled", minute_colors["normal"])
+            elif minutes == 0:
                 min_color = self.colors["departures"]["minutes"]["boarding"]
-            elif departure.minutes <= 1:
+            elif minutes <= 1:
                 min_color = self.colors["departures"]["minutes"]["arriving"]
             elif departure.delay > 60:  # If delayed more than a minute
                 min_color = self.colors["departures"]["minutes"]["delayed"]
@@ -216,10 +315,10 @@ class DepartureRenderer:
                 min_color = self.colors["departures"]["minutes"]["normal"]
                 
             # Format minutes text
-            if departure.minutes == 0:
+            if minutes == 0:
                 min_text = "Now"
             else:
-                min_text = str(departure.minutes)
+                min_text = str(minutes)
                 
             self.canvas.DrawText(
                 self.canvas,
@@ -244,6 +343,9 @@ class DepartureRenderer:
                 plat_color["b"]
             )
             
+    def _max_rows(self):
+        return self.coords["departures"]["rows"].get("max_rows", 3)
+
     def _draw_no_departures(self):
         """Display a message when no departures are available"""
         message = "No departures"
@@ -0,0 +1,135 @@
+"""
+Frame pacing for the render loop.
+
+Each frame the active renderer describes what it would draw as a fingerprint:
+a small tuple of everything on screen that can change, like the snapshot
+version, the clock's minute and the scroll offset. A frame whose fingerprint
+matches the last one drawn is skipped, draw and swap both, and the loop never
+runs faster than the FPS cap. A static board then costs a fingerprint per
+frame instead of a redraw, and leaves the CPU to the matrix refresh thread.
+
+Renderers also say when their output next changes on its own: the next
+minute, scroll step or animation frame. Between frames the loop sleeps until
+that deadline, or until new data is published, rather than waking at the frame
+rate to find nothing changed.
+"""
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+import debug
+
+DEFAULT_FPS = 30
+MAX_FPS = 120
+REPORT_INTERVAL = 60  # seconds between frame rate reports in the debug log
+# Longest sleep between frames, so state that isn't published as a snapshot, like
+# the network going down or the service day ending, still switches screens promptly
+MAX_IDLE = 1.0
+
+
+def next_tick(now: float, rate: float) -> float:
+    """The next time ``int(now * rate)`` changes, e.g. the next minute for a rate of 1/60"""
+    return (math.floor(now * rate) + 1) / rate
+
+
+class ScreenStats:
+    """Frames, draws and CPU time spent on one screen type since the last report"""
+
+    __slots__ = ("frames", "drawn", "cpu", "wall")
+
+    def __init__(self):
+        self.frames = 0
+        self.drawn = 0
+        self.cpu = 0.0
+        self.wall = 0.0
+
+    def __repr__(self):
+        if not self.wall:
+            return "no frames"
+        return (
+            f"{self.frames / self.wall:.1f} fps, {self.drawn / self.wall:.1f} drawn/s, "
+            f"{100 * self.cpu / self.wall:.1f}% CPU"
+        )
+
+
+class FramePacer:
+    """Caps the frame rate and skips frames whose content hasn't changed"""
+
+    def __init__(
+        self,
+        fps: float = DEFAULT_FPS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        cpu_clock: Callable[[], float] = time.process_time,
+    ):
+        if not 0 < fps <= MAX_FPS:
+            debug.warning(f"render_fps should be between 1 and {MAX_FPS}. Using {DEFAULT_FPS}.")
+            fps = DEFAULT_FPS
+        self.frame_time = 1.0 / fps
+        self.clock = clock
+        self.sleep = sleep
+        self.cpu_clock = cpu_clock
+
+        self.screen = None
+        self.fingerprint = None
+        self.stats: Dict[str, ScreenStats] = {}
+        self.reported_at = clock()
+        # Other stats logged and reset along with the frame rates, like the text cache's
+        self.reports: List[Callable[[], object]] = []
+
+    def frame(
+        self,
+        screen: str,
+        fingerprint: Optional[Hashable],
+        draw: Callable[[], None],
+        next_change: Optional[float] = None,
+        wait: Optional[Callable[[float], object]] = None,
+    ) -> bool:
+        """
+        Run one frame of ``screen``: ``draw()`` unless ``fingerprint`` matches the
+        last frame drawn. A None fingerprint always draws. Returns whether the
+        frame was drawn.
+
+        Then sleep out the rest of the frame, and on until ``next_change``
+        seconds from the start of the frame, when the screen's content next
+        changes on its own, or None if it only changes with new data. ``wait``
+        is called with the remaining time and should return early when new
+        data arrives. It defaults to sleeping.
+        """
+        start = self.clock()
+        cpu_start = self.cpu_clock()
+        drawn = fingerprint is None or fingerprint != self.fingerprint or screen != self.screen
+        if drawn:
+            draw()
+            self.screen = screen
+            self.fingerprint = fingerprint
+
+        stats = self.stats.get(screen)
+        if stats is None:
+            stats = self.stats[screen] = ScreenStats()
+        stats.frames += 1
+        stats.drawn += drawn
+        stats.cpu += self.cpu_clock() - cpu_start
+
+        remaining = start + self.frame_time - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        idle = MAX_IDLE if next_change is None else min(next_change, MAX_IDLE)
+        remaining = start + idle - self.clock()
+        if remaining > 0:
+            (wait or self.sleep)(remaining)
+        stats.wall += self.clock() - start
+
+        if self.clock() - self.reported_at >= REPORT_INTERVAL:
+            self.report()
+        return drawn
+
+    def report(self) -> Dict[str, ScreenStats]:
+        """Log and reset the per-screen frame rates"""
+        stats, self.stats = self.stats, {}
+        self.reported_at = self.clock()
+        for screen, screen_stats in stats.items():
+            debug.log(f"Render {screen}: {screen_stats}")
+        for report in self.reports:
+            report()
+        return stats
@@ -0,0 +1,250 @@
+"""
+NumPy framebuffer render backend.
+
+With the direct backend every pixel, line and glyph is its own call into the
+matrix driver. Here screens draw into an H x W x 3 uint8 framebuffer instead:
+rectangles are slice fills, lines are drawn as one index array, and text is
+blitted from glyph masks rasterized once per font from the BDF files, or
+from whole strings kept in a TextCache. The finished frame goes to the matrix
+in one SetImage call.
+
+FramebufferMatrix stands in for the driver's matrix and FramebufferCanvas for
+its canvases, so renderers draw the same way on either backend. Without a
+matrix it runs headless, keeping the last frame for tests and benchmarks.
+
+NumPy is needed for this backend. Without it the direct backend is used.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import bdfparser
+from PIL import Image
+
+import debug
+from renderers.text_cache import TextCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FONT_DIRS = ("assets/fonts/patched", "submodules/matrix/fonts")
+# Drawn in place of glyphs a font doesn't have
+REPLACEMENT_CODEPOINTS = (0xFFFD, ord("?"))
+
+# (mask, x offset, y offset from the baseline to the top row, advance)
+Glyph = Tuple["np.ndarray", int, int, int]
+
+
+class BitmapFont:
+    """A BDF font whose glyphs are rasterized into boolean masks the first time they're drawn"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bdf = bdfparser.Font(path)
+        self.glyphs: Dict[int, Optional[Glyph]] = {}
+
+    def glyph(self, codepoint: int) -> Optional[Glyph]:
+        """The glyph for ``codepoint``, or None if the font doesn't have it"""
+        try:
+            return self.glyphs[codepoint]
+        except KeyError:
+            pass
+        glyph = None
+        if codepoint in self.bdf.glyphs:
+            bdf_glyph = self.bdf.glyphbycp(codepoint)
+            meta = bdf_glyph.meta
+            advance = meta["dwx0"]
+            mask = np.array(bdf_glyph.draw().todata(2), dtype=bool).reshape(meta["bbh"], meta["bbw"])
+            # Like the driver, pixels past the advance width are dropped
+            mask = mask[:, : max(0, advance - meta["bbxoff"])]
+            glyph = (mask, meta["bbxoff"], -meta["bbh"] - meta["bbyoff"], advance)
+        self.glyphs[codepoint] = glyph
+        return glyph
+
+    def drawable_glyph(self, codepoint: int) -> Optional[Glyph]:
+        """The glyph for ``codepoint``, or the font's replacement character"""
+        glyph = self.glyph(codepoint)
+        if glyph is None:
+            for replacement in REPLACEMENT_CODEPOINTS:
+                glyph = self.glyph(replacement)
+                if glyph is not None:
+                    break
+        return glyph
+
+    def CharacterWidth(self, char: int) -> int:
+        """The advance width of ``char``, -1 if the font doesn't have it, like the driver's fonts"""
+        glyph = self.glyph(char)
+        return -1 if glyph is None else glyph[3]
+
+
+class BitmapFonts:
+    """Bitmap fonts by name, from the same directories as the layout's BDF fonts"""
+
+    def __init__(self):
+        self.fonts: Dict[str, BitmapFont] = {}
+
+    def get_font(self, name: str) -> BitmapFont:
+        font = self.fonts.get(name)
+        if font is None:
+            for font_dir in FONT_DIRS:
+                path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", font_dir, f"{name}.bdf"))
+                if os.path.isfile(path):
+                    font = self.fonts[name] = BitmapFont(path)
+                    break
+            else:
+                raise ValueError(f"Font {name} not found in {', '.join(FONT_DIRS)}")
+        return font
+
+
+def _clip(start: int, length: int, limit: int) -> Tuple[int, int]:
+    """The part of [start, start + length) inside [0, limit)"""
+    return max(start, 0), min(start + length, limit)
+
+
+class FramebufferCanvas:
+    """A canvas backed by a NumPy framebuffer, with the drawing calls renderers use on driver canvases"""
+
+    def __init__(self, width: int, height: int, text_cache: Optional[TextCache] = None):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        self.font: Optional[BitmapFont] = None
+        # Without a cache text is drawn glyph by glyph
+        self.text_cache = text_cache
+
+    def Clear(self):
+        self.pixels.fill(0)
+
+    def Fill(self, r, g, b):
+        self.pixels[:] = (r, g, b)
+
+    def SetPixel(self, x, y, r, g, b):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y, x] = (r, g, b)
+
+    def FillRect(self, x, y, width, height, r, g, b):
+        left, right = _clip(x, width, self.width)
+        top, bottom = _clip(y, height, self.height)
+        if left < right and top < bottom:
+            self.pixels[top:bottom, left:right] = (r, g, b)
+
+    def SetImage(self, image, x=0, y=0, unsafe=True):
+        """Copy a PIL image onto the framebuffer, clipped to its edges"""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        left, right = _clip(x, image.width, self.width)
+        top, bottom = _clip(y, image.height, self.height)
+        if left < right and top < bottom:
+            source = np.asarray(image)
+            self.pixels[top:bottom, left:right] = source[top - y : bottom - y, left - x : right - x]
+
+    def DrawLine(self, x0, y0, x1, y1, r, g, b):
+        """Draw a line between two points, both included"""
+        if x0 == x1 or y0 == y1:
+            self.FillRect(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1, r, g, b)
+            return
+        steps = max(abs(x1 - x0), abs(y1 - y0)) + 1
+        xs = np.rint(np.linspace(x0, x1, steps)).astype(np.intp)
+        ys = np.rint(np.linspace(y0, y1, steps)).astype(np.intp)
+        visible = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.pixels[ys[visible], xs[visible]] = (r, g, b)
+
+    def SetFont(self, font: BitmapFont):
+        self.font = font
+
+    def DrawText(self, canvas, text, x, y, r, g, b):
+        """
+        Draw ``text`` in the font from SetFont with its baseline at ``y``.
+        Returns the text's width. ``canvas`` is ignored, matching the call
+        renderers make on driver canvases.
+        """
+        color = (r, g, b)
+        if self.text_cache is not None:
+            bitmap = self.text_cache.get(self.font, text, color)
+            if bitmap is not None:
+                self._copy(bitmap.pixels, bitmap.mask, x + bitmap.x_offset, y + bitmap.y_offset)
+                return bitmap.advance
+
+        start = x
+        for char in text:
+            glyph = self.font.drawable_glyph(ord(char))
+            if glyph is None:
+                continue
+            mask, x_offset, y_offset, advance = glyph
+            self._blit(mask, x + x_offset, y + y_offset, color)
+            x += advance
+        return x - start
+
+    def _blit(self, mask, x, y, color):
+        """Set the pixels of ``mask`` with its top left corner at (x, y)"""
+        height, width = mask.shape
+        left, right = _clip(x, width, self.width)
+        top, bottom = _clip(y, height, self.height)
+        if left < right and top < bottom:
+            self.pixels[top:bottom, left:right][mask[top - y : bottom - y, left - x : right - x]] = color
+
+    def _copy(self, pixels, mask, x, y):
+        """Copy ``pixels`` where ``mask`` is set, with their top left corner at (x, y)"""
+        height, width = mask.shape[:2]
+        left, right = _clip(x, width, self.width)
+        top, bottom = _clip(y, height, self.height)
+        if left < right and top < bottom:
+            source = (slice(top - y, bottom - y), slice(left - x, right - x))
+            np.copyto(self.pixels[top:bottom, left:right], pixels[source], where=mask[source])
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.pixels, "RGB")
+
+
+class FramebufferMatrix:
+    """
+    Hands out framebuffer canvases in place of the driver's, and pushes each
+    swapped frame to ``matrix`` in one SetImage call. Without a matrix, frames
+    are only kept in ``frame``. Its canvases share one text cache.
+    """
+
+    def __init__(self, matrix=None, width: Optional[int] = None, height: Optional[int] = None):
+        self.matrix = matrix
+        self.width = matrix.width if width is None else width
+        self.height = matrix.height if height is None else height
+        self.driver_canvas = matrix.CreateFrameCanvas() if matrix is not None else None
+        self.frame: Optional[FramebufferCanvas] = None
+        self.text_cache = TextCache()
+
+    def CreateFrameCanvas(self) -> FramebufferCanvas:
+        return FramebufferCanvas(self.width, self.height, self.text_cache)
+
+    def SwapOnVSync(self, canvas: FramebufferCanvas, framerate_fraction=1) -> FramebufferCanvas:
+        """
+        Show ``canvas``. It's handed back with its pixels intact rather than
+        swapped for another buffer, since the driver keeps its own copy.
+        """
+        self.frame = canvas
+        if self.matrix is not None:
+            self.driver_canvas.SetImage(canvas.to_image(), 0, 0)
+            self.driver_canvas = self.matrix.SwapOnVSync(self.driver_canvas)
+        return canvas
+
+    def __getattr__(self, name):
+        # Everything else, like brightness and Clear, is the driver's
+        if self.matrix is None:
+            raise AttributeError(name)
+        return getattr(self.matrix, name)
+
+
+def framebuffer_matrix(matrix, config):
+    """
+    ``matrix`` wrapped in a FramebufferMatrix if the config's render_backend
+    asks for one and NumPy is installed, otherwise ``matrix`` as is
+    """
+    backend = getattr(config, "render_backend", "direct")
+    if backend == "direct":
+        return matrix
+    if backend != "framebuffer":
+        debug.warning(f"Unknown render_backend {backend!r}. Drawing directly to the matrix.")
+        return matrix
+    if np is None:
+        debug.warning("The framebuffer render_backend needs NumPy. Drawing directly to the matrix.")
+        return matrix
+    return FramebufferMatrix(matrix)
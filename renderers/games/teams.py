@@ -1,4 +1,5 @@
 from driver import graphics
+from renderers.layers import fill
 
 ABSOLUTE = "absolute"
 RELATIVE = "relative"
@@ -39,20 +40,14 @@ def render_team_banner(
     accent_coords["home"] = layout.coords("teams.accent.home")
 
     for team in ["away", "home"]:
-        for x in range(bg_coords[team]["width"]):
-            for y in range(bg_coords[team]["height"]):
-                color = away_team_color if team == "away" else home_team_color
-                x_offset = bg_coords[team]["x"]
-                y_offset = bg_coords[team]["y"]
-                canvas.SetPixel(x + x_offset, y + y_offset, color["r"], color["g"], color["b"])
+        color = away_team_color if team == "away" else home_team_color
+        coords = bg_coords[team]
+        fill(canvas, coords["x"], coords["y"], coords["width"], coords["height"], color)
 
     for team in ["away", "home"]:
-        for x in range(accent_coords[team]["width"]):
-            for y in range(accent_coords[team]["height"]):
-                color = away_team_accent if team == "away" else home_team_accent
-                x_offset = accent_coords[team]["x"]
-                y_offset = accent_coords[team]["y"]
-                canvas.SetPixel(x + x_offset, y + y_offset, color["r"], color["g"], color["b"])
+        color = away_team_accent if team == "away" else home_team_accent
+        coords = accent_coords[team]
+        fill(canvas, coords["x"], coords["y"], coords["width"], coords["height"], color)
 
     use_full_team_names = can_use_full_team_names(
         canvas, full_team_names, short_team_names_for_runs_hits, [home_team, away_team]
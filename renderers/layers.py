@@ -0,0 +1,88 @@
+"""
+Pre-rendered static layers and dirty-region redraws.
+
+Backgrounds that rarely change, like header bars, are drawn once into a PIL
+image and pasted onto a canvas with a single SetImage call instead of a Python
+SetPixel loop. The dynamic parts of a screen are split into regions, each
+redrawn only when its content changes: the region's background is restored
+from the layer and its content drawn over it.
+
+The matrix is double buffered and SwapOnVSync hands back the previous front
+buffer with its pixels intact, so what has been drawn is tracked per buffer.
+The driver wraps the buffer in a new canvas object on every swap, so buffers
+are told apart by swap parity rather than by canvas: renderers report each
+swap with ``swapped``. A backend that hands back the canvas it was given has
+a single buffer. A buffer another renderer has drawn on since has to be
+pasted over in full, so renderers ``invalidate`` their layer when their
+screen comes back.
+"""
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# (x, y, width, height)
+Box = Tuple[int, int, int, int]
+
+
+@lru_cache(maxsize=64)
+def _solid(width: int, height: int, rgb: Tuple[int, int, int]) -> Image.Image:
+    return Image.new("RGB", (width, height), rgb)
+
+
+def fill(canvas, x: int, y: int, width: int, height: int, color) -> None:
+    """Fill a rectangle with a color dict ({"r", "g", "b"}) in one call"""
+    if width <= 0 or height <= 0:
+        return
+    if hasattr(canvas, "FillRect"):
+        canvas.FillRect(x, y, width, height, color["r"], color["g"], color["b"])
+    else:
+        canvas.SetImage(_solid(width, height, (color["r"], color["g"], color["b"])), x, y)
+
+
+class StaticLayer:
+    """A background of filled rectangles, drawn once and pasted onto canvases"""
+
+    def __init__(self, width: int, height: int, rects: Iterable[Tuple[Box, dict]]):
+        self.image = Image.new("RGB", (width, height))
+        draw = ImageDraw.Draw(self.image)
+        for (x, y, rect_width, rect_height), color in rects:
+            draw.rectangle((x, y, x + rect_width - 1, y + rect_height - 1), fill=(color["r"], color["g"], color["b"]))
+        self._crops: Dict[Box, Image.Image] = {}
+        # Per buffer, {region: content last drawn there}, or None until the layer is pasted
+        self._drawn: List[Optional[Dict[str, Hashable]]] = [None, None]
+        # The buffer being drawn on, flipped by every double buffered swap
+        self.buffer = 0
+
+    def paste(self, canvas) -> bool:
+        """Paste the whole layer onto ``canvas`` unless it's already there. Returns whether it was pasted."""
+        if self._drawn[self.buffer] is not None:
+            return False
+        canvas.SetImage(self.image, 0, 0)
+        self._drawn[self.buffer] = {}
+        return True
+
+    def update(self, canvas, region: str, box: Box, content: Hashable) -> bool:
+        """
+        Whether ``region`` of ``canvas`` needs drawing to show ``content``. If it
+        does, its background is restored first. Call after ``paste``.
+        """
+        drawn = self._drawn[self.buffer]
+        if region in drawn and drawn[region] == content:
+            return False
+        crop = self._crops.get(box)
+        if crop is None:
+            x, y, width, height = box
+            crop = self._crops[box] = self.image.crop((x, y, x + width, y + height))
+        canvas.SetImage(crop, box[0], box[1])
+        drawn[region] = content
+        return True
+
+    def swapped(self, shown, returned) -> None:
+        """Record a SwapOnVSync that showed ``shown`` and handed back ``returned`` to draw on next"""
+        if returned is not shown:
+            self.buffer ^= 1
+
+    def invalidate(self) -> None:
+        """Forget what's on every buffer, after other renderers have drawn on them"""
+        self._drawn = [None, None]
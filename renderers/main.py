@@ -4,6 +4,8 @@ from data.screens import ScreenType
 
 import debug
 from renderers.departures import DepartureRenderer
+from renderers.frame_pacing import DEFAULT_FPS, FramePacer
+from renderers.framebuffer import BitmapFonts, FramebufferMatrix, framebuffer_matrix
 from renderers.offday import OffdayRenderer
 from renderers.system_status import SystemStatusRenderer
 from renderers.scrollingtext import ScrollingText
@@ -13,6 +15,10 @@ class MainRenderer:
     """The main renderer that determines what to render on the matrix"""
 
     def __init__(self, matrix, data):
+        # With the framebuffer backend, screens draw into NumPy framebuffers with their own bitmap fonts
+        matrix = framebuffer_matrix(matrix, data.config)
+        if isinstance(matrix, FramebufferMatrix):
+            data.font = BitmapFonts()
         self.matrix = matrix
         self.data = data
         
@@ -29,44 +35,59 @@ class MainRenderer:
         
         # Record whether we're showing the network error screen
         self.showing_network_error = False
+        self.screen = None
+        self.warned_news = False
+
+        # Frames are capped at render_fps and only drawn when their content changes
+        self.pacer = FramePacer(getattr(data.config, "render_fps", DEFAULT_FPS))
+        if isinstance(matrix, FramebufferMatrix):
+            self.pacer.reports.append(matrix.text_cache.report)
 
     def render(self):
         """Main loop to render the correct screen based on current state"""
         while True:
-            if self.data.network_issues:
-                if not self.showing_network_error:
-                    debug.warning("Network issues detected. Showing error screen.")
-                self.showing_network_error = True
-                self.network_renderer.render()
-                continue
-            else:
-                self.showing_network_error = False
-            
-            # Determine which screen to show
-            screen = self.data.get_screen_type()
-            if screen == ScreenType.ALWAYS_SYSTEM_STATUS:
-                self._render_system_status()
-            elif screen == ScreenType.ALWAYS_NEWS:
-                self._render_news()
-            elif screen == ScreenType.SYSTEM_OFFDAY or screen == ScreenType.PREFERRED_STATION_OFFDAY:
-                self._render_offday()
-            else:
-                # Default to departure display
-                self._render_departures()
-
-    def _render_departures(self):
-        """Render the departure board screen"""
-        self.departure_renderer.render()
-
-    def _render_system_status(self):
-        """Render the system status screen"""
-        self.system_status_renderer.render()
+            self.render_frame()
 
-    def _render_news(self):
-        """Render the news ticker screen"""
-        debug.info("News render not implemented yet, showing offday instead")
-        self._render_offday()
+    def render_frame(self):
+        """Render one paced frame of the screen the current state calls for"""
+        name, renderer = self._current_screen()
+        if name != self.screen:
+            # Other screens have drawn on the canvases the departures board only redraws in part
+            self.departure_renderer.invalidate()
+            self.screen = name
+        # Every renderer reads the same clock as the data layer, so countdowns match
+        now = self.data.clock()
+        version = self.data.snapshot.version
+        next_change = renderer.next_change(now)
+        self.pacer.frame(
+            name,
+            renderer.fingerprint(now),
+            lambda: renderer.render(now),
+            None if next_change is None else next_change - now,
+            # Wake as soon as the data layer publishes something new
+            lambda timeout: self.data.snapshots.wait(version, timeout),
+        )
 
-    def _render_offday(self):
-        """Render the offday screen"""
-        self.offday_renderer.render()
+    def _current_screen(self):
+        """The name and renderer of the screen to show"""
+        # With a timetable to fall back on, the departures board shows scheduled trains instead
+        if self.data.network_issues and not getattr(self.data, "using_timetable", False):
+            if not self.showing_network_error:
+                debug.warning("Network issues detected. Showing error screen.")
+            self.showing_network_error = True
+            return "network_error", self.network_renderer
+        self.showing_network_error = False
+        
+        # Determine which screen to show
+        screen = self.data.get_screen_type()
+        if screen == ScreenType.ALWAYS_SYSTEM_STATUS:
+            return "system_status", self.system_status_renderer
+        elif screen == ScreenType.ALWAYS_NEWS:
+            if not self.warned_news:
+                debug.info("News render not implemented yet, showing offday instead")
+                self.warned_news = True
+            return "offday", self.offday_renderer
+        elif screen == ScreenType.SYSTEM_OFFDAY or screen == ScreenType.PREFERRED_STATION_OFFDAY:
+            return "offday", self.offday_renderer
+        # Default to departure display
+        return "departures", self.departure_renderer
@@ -3,8 +3,11 @@ from utils import center_text_position
 from PIL import Image
 import debug
 import time
+from renderers.frame_pacing import next_tick
+from renderers.layers import fill
 
 NETWORK_ERROR_TEXT = "!"
+ANIMATION_RATE = 2  # dot steps per second
 
 
 def render_network_error(canvas, layout, colors):
@@ -15,9 +18,7 @@ def render_network_error(canvas, layout, colors):
     bg_color = colors.color("network.background")
 
     # Fill in the background so it's clearly visible
-    for x in range(bg_coords["width"]):
-        for y in range(bg_coords["height"]):
-            canvas.SetPixel(x + bg_coords["x"], y + bg_coords["y"], bg_color["r"], bg_color["g"], bg_color["b"])
+    fill(canvas, bg_coords["x"], bg_coords["y"], bg_coords["width"], bg_coords["height"], bg_color)
     text = NETWORK_ERROR_TEXT
     x = center_text_position(text, coords["text"]["x"], font["size"]["width"])
     graphics.DrawText(canvas, font["font"], x, coords["text"]["y"], text_color, text)
@@ -33,7 +34,7 @@ class NetworkErrorRenderer:
         self.coords = coords
         self.canvas = matrix.CreateFrameCanvas()
         
-    def render(self):
+    def render(self, now=None):
         """Render the network error display"""
         # Clear the canvas
         self.canvas.Clear()
@@ -41,12 +42,24 @@ class NetworkErrorRenderer:
         # Draw error icon or symbol (could be added later)
         
         # Draw error message
-        self._draw_error_message()
+        self._draw_error_message(time.time() if now is None else now)
         
         # Update the canvas
         self.canvas = self.matrix.SwapOnVSync(self.canvas)
+
+    def fingerprint(self, now):
+        """Only the animated dots change"""
+        return self._animation_frame(now)
+
+    def next_change(self, now):
+        """The dots' next step"""
+        return next_tick(now, ANIMATION_RATE)
+
+    @staticmethod
+    def _animation_frame(now):
+        return int(now * ANIMATION_RATE) % 4
         
-    def _draw_error_message(self):
+    def _draw_error_message(self, now):
         """Display the network error message"""
         # Draw the title
         title = "Network Error"
@@ -92,8 +105,7 @@ class NetworkErrorRenderer:
         )
         
         # Add a visual indicator that updates
-        animation_frame = int(time.time() * 2) % 4
-        dots = "." * animation_frame
+        dots = "." * self._animation_frame(now)
         self.canvas.DrawText(
             self.canvas,
             dots,
@@ -10,6 +10,7 @@ from data.config.layout import Layout
 from data.headlines import Headlines
 from data.weather import Weather
 from renderers import scrollingtext
+from renderers.frame_pacing import next_tick
 from utils import center_text_position
 
 import debug
@@ -24,8 +25,13 @@ class OffdayRenderer:
         self.coords = coords
         self.canvas = matrix.CreateFrameCanvas()
         
-    def render(self):
+    def render(self, now=None):
         """Render the offday screen"""
+        # Read one consistent snapshot for the whole frame
+        snapshot = self.data.snapshot
+        if now is None:
+            now = time.time()
+
         # Clear the canvas
         self.canvas.Clear()
         
@@ -33,16 +39,26 @@ class OffdayRenderer:
         self._draw_header()
         
         # Draw the current time
-        self._draw_time()
+        self._draw_time(now)
         
         # Draw the weather
-        self._draw_weather()
+        self._draw_weather(snapshot.weather)
         
         # Draw scrolling text with news/alerts if available
-        self._draw_scrolling_text()
+        self._draw_scrolling_text(snapshot.system_status, now)
         
         # Update the canvas
         self.canvas = self.matrix.SwapOnVSync(self.canvas)
+
+    def fingerprint(self, now):
+        """Everything render(now) would draw that can change: the snapshot, the time and the ticker's scroll offset"""
+        snapshot = self.data.snapshot
+        text = self._ticker_text(snapshot.system_status)
+        return snapshot.version, self._time_text(now), text, self._scroll_position(text, now)
+
+    def next_change(self, now):
+        """The ticker's next scroll step or the next minute, whichever is first"""
+        return min(next_tick(now, self.data.config.scrolling_speed), next_tick(now, 1 / 60))
         
     def _draw_header(self):
         """Draw a header indicating that no trains are running"""
@@ -66,19 +82,22 @@ class OffdayRenderer:
             color["b"]
         )
         
-    def _draw_time(self):
-        """Draw the current time"""
-        # Get defaults
-        font = self.data.font.get_font("6x9")
-        self.canvas.SetFont(font)
-        
-        # Format time based on config
+    def _time_text(self, now):
+        """The time at ``now``, formatted based on config"""
         time_format = "%H:%M" if self.data.config.time_format == "24h" else "%I:%M %p"
-        time_text = time.strftime(time_format)
+        time_text = time.strftime(time_format, time.localtime(now))
         
         if self.data.config.time_format != "24h":
             # Remove leading zero from 12-hour format
             time_text = time_text.lstrip("0")
+        return time_text
+        
+    def _draw_time(self, now):
+        """Draw the current time"""
+        # Get defaults
+        font = self.data.font.get_font("6x9")
+        self.canvas.SetFont(font)
+        time_text = self._time_text(now)
             
         # Draw time centered
         color = self.colors["offday"]["time"]
@@ -96,14 +115,13 @@ class OffdayRenderer:
             color["b"]
         )
         
-    def _draw_weather(self):
+    def _draw_weather(self, weather):
         """Draw weather information if available"""
-        if not hasattr(self.data, 'weather') or not self.data.weather:
+        if not weather:
             return
             
         # Format weather data
         try:
-            weather = self.data.weather
             conditions = weather.conditions
             temperature = f"{int(weather.temperature)}°"
             
@@ -159,21 +177,31 @@ class OffdayRenderer:
         except Exception as e:
             debug.error(f"Error rendering weather: {e}")
             
-    def _draw_scrolling_text(self):
-        """Draw scrolling news/alerts text at the bottom of the screen"""
-        # Get text to display
+    def _ticker_text(self, status):
+        """News, else the alerts ticker, else BART's service hours"""
         text = ""
         if hasattr(self.data, 'news_ticker') and self.data.news_ticker:
             text = self.data.news_ticker.text
             
-        if not text and hasattr(self.data, 'system_status') and self.data.system_status:
-            status = self.data.system_status
-            if 'alerts' in status and status['alerts']:
-                text = " | ".join([alert['title'] for alert in status['alerts']])
+        if not text and status:
+            text = status.get('ticker', "")
                 
         if not text:
             # Default message
             text = "BART service hours: Weekdays 5am-12am, Sat 6am-12am, Sun 8am-9pm"
+        return text
+        
+    def _scroll_position(self, text, now):
+        """How far the ticker has scrolled at ``now``"""
+        coords = self.coords["offday"]["scrolling_text"]
+        font = self.data.font.get_font("4x6")
+        text_width = font.CharacterWidth(ord('A')) * len(text)
+        return int(now * self.data.config.scrolling_speed) % (text_width + coords["width"])
+        
+    def _draw_scrolling_text(self, status, now):
+        """Draw scrolling news/alerts text at the bottom of the screen"""
+        # Get text to display
+        text = self._ticker_text(status)
             
         # Render scrolling text
         if text:
@@ -185,8 +213,7 @@ class OffdayRenderer:
             self.canvas.SetFont(font)
             
             # Calculate position based on the current scroll offset
-            text_width = font.CharacterWidth(ord('A')) * len(text)
-            scroll_position = int(time.time() * self.data.config.scrolling_speed) % (text_width + coords["width"])
+            scroll_position = self._scroll_position(text, now)
             
             self.canvas.DrawText(
                 self.canvas,
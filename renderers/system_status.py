@@ -1,6 +1,7 @@
 from PIL import Image
 import debug
 import time
+from renderers.frame_pacing import next_tick
 from utils import center_text_position
 from data.screens import ScreenType
 
@@ -14,9 +15,13 @@ class SystemStatusRenderer:
         self.coords = coords
         self.canvas = matrix.CreateFrameCanvas()
         
-    def render(self):
+    def render(self, now=None):
         """Render the system status display"""
-        system_status = self.data.system_status
+        # Read one consistent snapshot for the whole frame
+        snapshot = self.data.snapshot
+        system_status = snapshot.system_status
+        if now is None:
+            now = time.time()
         
         # Clear the canvas
         self.canvas.Clear()
@@ -25,10 +30,29 @@ class SystemStatusRenderer:
         self._draw_header()
         
         # Draw the status information
-        self._draw_status(system_status)
+        self._draw_status(system_status, now)
         
         # Update the canvas
         self.canvas = self.matrix.SwapOnVSync(self.canvas)
+
+    def fingerprint(self, now):
+        """Everything render(now) would draw that can change: the snapshot and the ticker's scroll offset"""
+        snapshot = self.data.snapshot
+        ticker = self._ticker(snapshot.system_status)
+        return snapshot.version, self._scroll_position(ticker, now) if ticker else None
+
+    def next_change(self, now):
+        """The ticker's next scroll step, or None without a ticker"""
+        if not self._ticker(self.data.snapshot.system_status):
+            return None
+        return next_tick(now, self.data.config.scrolling_speed)
+
+    @staticmethod
+    def _ticker(status):
+        """The alert ticker text, if the status screen shows one"""
+        if not status or status.get('status') == 'unknown':
+            return None
+        return status.get('ticker')
         
     def _draw_header(self):
         """Draw the header with "BART System Status" text"""
@@ -53,7 +77,7 @@ class SystemStatusRenderer:
             color["b"]
         )
         
-    def _draw_status(self, status):
+    def _draw_status(self, status, now):
         """Draw the actual status information"""
         if not status or status.get('status') == 'unknown':
             self._draw_unknown_status()
@@ -87,12 +111,10 @@ class SystemStatusRenderer:
             color["b"]
         )
         
-        # Display alert details if any
-        alerts = status.get('alerts', [])
-        if alerts and len(alerts) > 0:
-            # Combine alert titles into scrolling text
-            scroll_text = " | ".join([alert['title'] for alert in alerts])
-            self._draw_scrolling_alert(scroll_text)
+        # Display alert details if any, the ticker text is composed when the alerts change
+        ticker = self._ticker(status)
+        if ticker:
+            self._draw_scrolling_alert(ticker, now)
             
     def _draw_unknown_status(self):
         """Display message when status is unknown"""
@@ -116,7 +138,14 @@ class SystemStatusRenderer:
             color["b"]
         )
         
-    def _draw_scrolling_alert(self, text):
+    def _scroll_position(self, text, now):
+        """How far the ticker has scrolled at ``now``"""
+        coords = self.coords["system_status"]["scrolling_text"]
+        font = self.data.font.get_font("4x6")
+        text_width = font.CharacterWidth(ord('A')) * len(text)
+        return int(now * self.data.config.scrolling_speed) % (text_width + coords["width"])
+
+    def _draw_scrolling_alert(self, text, now):
         """Display scrolling alert text at the bottom of the screen"""
         if not text:
             return
@@ -129,8 +158,7 @@ class SystemStatusRenderer:
         self.canvas.SetFont(font)
         
         # Calculate position based on the current scroll offset
-        text_width = font.CharacterWidth(ord('A')) * len(text)
-        scroll_position = int(time.time() * self.data.config.scrolling_speed) % (text_width + coords["width"])
+        scroll_position = self._scroll_position(text, now)
         
         self.canvas.DrawText(
             self.canvas,
@@ -0,0 +1,122 @@
+"""
+LRU cache of rasterized text for the framebuffer backend.
+
+Most strings on the board rarely change: station names, column labels,
+destinations. Rather than blitting a string glyph by glyph every time it's
+drawn, the whole string is rasterized once per font and color into a bitmap
+and a mask, and later draws are one masked copy. Memory is bounded: the least
+recently drawn strings are evicted once the cached bitmaps pass ``max_bytes``.
+"""
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+import debug
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_MAX_BYTES = 256 * 1024
+# Rough cost of an entry besides its arrays: key, tuple and array headers
+ENTRY_OVERHEAD = 256
+
+
+class TextBitmap(NamedTuple):
+    """A string rasterized in one color"""
+
+    pixels: "np.ndarray"  # H x W x 3, the text's color wherever mask is set
+    mask: "np.ndarray"  # H x W x 1, broadcasting over the color channels
+    x_offset: int  # from the pen position to the bitmap's left edge
+    y_offset: int  # from the baseline to the bitmap's top row
+    advance: int  # the width DrawText returns
+
+    @property
+    def nbytes(self) -> int:
+        return self.pixels.nbytes + self.mask.nbytes + ENTRY_OVERHEAD
+
+
+def rasterize(font, text: str, color: Tuple[int, int, int]) -> TextBitmap:
+    """``text`` in ``font`` and ``color`` as one bitmap, empty if no glyph has any pixels"""
+    placed = []
+    x = 0
+    for char in text:
+        glyph = font.drawable_glyph(ord(char))
+        if glyph is None:
+            continue
+        mask, x_offset, y_offset, advance = glyph
+        if mask.any():
+            placed.append((mask, x + x_offset, y_offset))
+        x += advance
+    if not placed:
+        return TextBitmap(np.empty((0, 0, 3), dtype=np.uint8), np.empty((0, 0, 1), dtype=bool), 0, 0, x)
+
+    left = min(glyph_x for _, glyph_x, _ in placed)
+    top = min(glyph_y for _, _, glyph_y in placed)
+    right = max(glyph_x + mask.shape[1] for mask, glyph_x, _ in placed)
+    bottom = max(glyph_y + mask.shape[0] for mask, _, glyph_y in placed)
+    combined = np.zeros((bottom - top, right - left, 1), dtype=bool)
+    for mask, glyph_x, glyph_y in placed:
+        height, width = mask.shape
+        combined[glyph_y - top : glyph_y - top + height, glyph_x - left : glyph_x - left + width, 0] |= mask
+    pixels = np.empty((bottom - top, right - left, 3), dtype=np.uint8)
+    pixels[:] = color
+    return TextBitmap(pixels, combined, left, top, x)
+
+
+class TextCache:
+    """Rasterized strings keyed by (font, text, color), least recently drawn evicted first"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Hashable, TextBitmap]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, font, text: str, color: Tuple[int, int, int]) -> Optional[TextBitmap]:
+        """
+        The bitmap for ``text``, rasterized on a miss. Returns None when the
+        string alone is bigger than the cache, to be drawn glyph by glyph.
+        """
+        key = (font, text, color)
+        try:
+            bitmap = self.entries[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return bitmap
+
+        self.misses += 1
+        bitmap = rasterize(font, text, color)
+        if bitmap.nbytes > self.max_bytes:
+            return None
+        self.entries[key] = bitmap
+        self.nbytes += bitmap.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+        return bitmap
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.nbytes = 0
+
+    def __repr__(self):
+        lookups = self.hits + self.misses
+        hit_rate = 100 * self.hits / lookups if lookups else 0
+        return (
+            f"{len(self.entries)} strings, {self.nbytes // 1024} KiB, {hit_rate:.1f}% hits, "
+            f"{self.misses} misses, {self.evictions} evictions"
+        )
+
+    def report(self) -> Tuple[int, int, int]:
+        """Log and reset the hit, miss and eviction counts"""
+        counts = (self.hits, self.misses, self.evictions)
+        debug.log(f"Text cache: {self}")
+        self.hits = self.misses = self.evictions = 0
+        return counts
@@ -19,6 +19,7 @@ except ImportError:
     sys.exit(1)
 
 from data.bart import BARTData, BARTStation, BARTDeparture
+from data.snapshot import DataSnapshot
 from data.config import Config
 from data.screens import ScreenType
 from renderers.departures import DepartureRenderer
@@ -34,6 +35,8 @@ class MockData:
         self.network_issues = False
         self.scrolling_finished = True
         self.test_mode = test_mode
+        self.snapshot_version = 0
+        self.clock = time.time
         
         # Create font helper (simplified for testing)
         self.font = FontHelper()
@@ -53,13 +56,14 @@ class MockData:
         self.current_station = BARTStation("Powell St", "POWL", "POWL")
         
         # Create some mock departures
-        self.current_station.departures = [
-            BARTDeparture("Antioch", 4, "1", "N", "yellow", 10),
-            BARTDeparture("Richmond", 7, "2", "N", "red", 10),
-            BARTDeparture("Berryessa", 12, "1", "S", "green", 8, delay=60),
-            BARTDeparture("SFO Airport", 18, "2", "S", "yellow", 10),
-            BARTDeparture("Dublin/Pleasanton", 22, "1", "E", "blue", 6)
-        ]
+        now = time.time()
+        self.current_station.set_departures([
+            BARTDeparture("Antioch", now + 4 * 60, "1", "N", "yellow", 10),
+            BARTDeparture("Richmond", now + 7 * 60, "2", "N", "red", 10),
+            BARTDeparture("Berryessa", now + 12 * 60, "1", "S", "green", 8, delay=60),
+            BARTDeparture("SFO Airport", now + 18 * 60, "2", "S", "yellow", 10),
+            BARTDeparture("Dublin/Pleasanton", now + 22 * 60, "1", "E", "blue", 6)
+        ])
         
     def _init_system_status_data(self):
         """Initialize mock system status data"""
@@ -89,6 +93,17 @@ class MockData:
         self.network_issues = True
         self.current_station = None
         
+    @property
+    def snapshot(self):
+        """Snapshot of the mock data, as the renderers read it. Mock data can change at any time."""
+        self.snapshot_version += 1
+        return DataSnapshot.capture(
+            self.snapshot_version,
+            getattr(self, 'current_station', None),
+            getattr(self, 'system_status', None),
+            getattr(self, 'weather', None)
+        )
+
     def get_screen_type(self):
         """Return the screen type based on test mode"""
         if self.test_mode == "departures":
@@ -0,0 +1,185 @@
+"""
+Fakes and fixtures shared by the tests and benchmarks: board configs, small
+GTFS-RT and static GTFS feeds, a stand-in for BARTTransport and an in-memory
+matrix that counts drawing calls.
+"""
+import time
+import zipfile
+from types import SimpleNamespace
+
+from google.transit import gtfs_realtime_pb2
+
+from data.recorder import ReplayResponse
+
+TRIP_UPDATES = "/gtfsrt/tripupdate.aspx"
+ALERTS = "/gtfsrt/alerts.aspx"
+
+COORDINATES = "coordinates/w64h32.json.example"
+COLORS = "colors/scoreboard.json.example"
+
+
+def make_config(**overrides):
+    config = SimpleNamespace(bart_api_key="", api_refresh_rate=30, preferred_stations=["WCRK"])
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def trip_payload(now, minutes):
+    """A feed with one train reaching Walnut Creek ``minutes`` and a half from ``now``"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = int(now)
+    entity = feed.entity.add()
+    entity.id = "T1"
+    entity.trip_update.trip.trip_id = "T1-MLBR"
+    entity.trip_update.trip.route_id = "ROUTE 1"
+    update = entity.trip_update.stop_time_update.add()
+    update.stop_id = "WCRK"
+    update.arrival.time = int(now) + minutes * 60 + 30
+    return feed.SerializeToString()
+
+
+def alerts_feed(*alerts):
+    """A FeedMessage with one alert per (entity id, title, stop ids, route ids)"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    for entity_id, title, stop_ids, route_ids in alerts:
+        entity = feed.entity.add()
+        entity.id = entity_id
+        entity.alert.header_text.translation.add(text=title, language="en")
+        for stop_id in stop_ids:
+            entity.alert.informed_entity.add(stop_id=stop_id)
+        for route_id in route_ids:
+            entity.alert.informed_entity.add(route_id=route_id)
+    return feed
+
+
+SYSTEM = ("1", "Elevator outages", (), ())
+STATION = ("2", "Escalator closed at Walnut Creek", ("WCRK_2",), ())
+LINE = ("3", "Delays on the yellow line", (), ("1",))
+ELSEWHERE = ("4", "Millbrae platform closed", ("MLBR",), ("7",))
+
+GTFS_FILES = {
+    "routes.txt": [
+        "route_id,route_short_name,route_color",
+        "1,Yellow-S,FFFF33",
+        "7,Red-N,FF0000",
+        "20,Grey,D5CFA3",
+    ],
+    "stops.txt": [
+        "stop_id,stop_name,location_type,parent_station,platform_code",
+        "WCRK,Walnut Creek,1,,",
+        "WCRK_1,Walnut Creek,0,WCRK,1",
+        "WCRK_2,Walnut Creek,0,WCRK,2",
+        "MLBR,Millbrae,1,,",
+        "MLBR_1,Millbrae,0,MLBR,1",
+        "OAKL,Oakland International Airport,0,,",
+    ],
+    "trips.txt": [
+        "route_id,service_id,trip_id,trip_headsign,direction_id",
+        "1,WKDY,T100,San Francisco International Airport / Millbrae,1",
+        "7,WKDY,T200,,0",
+    ],
+    "stop_times.txt": [
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence",
+        "T100,07:00:00,07:00:30,WCRK_2,1",
+        "T100,07:40:00,07:40:00,MLBR_1,2",
+        "T200,08:00:00,08:00:30,MLBR_1,1",
+        "T200,08:40:00,08:40:00,WCRK_1,2",
+    ],
+}
+
+
+def write_gtfs(path, files=None):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, lines in (files or GTFS_FILES).items():
+            archive.writestr(name, "\n".join(lines) + "\n")
+
+
+class FakeTransport:
+    """
+    Stands in for BARTTransport, serving ``responses`` in turn and starting
+    over after the last. Payloads are served as 200 responses. ``alerts``, if
+    given, answers alert requests instead. Requests fail while ``up`` is False,
+    take ``latency`` seconds, and are counted. Without responses any request is
+    a test failure. ``now`` fixes the clock.
+    """
+
+    def __init__(self, responses=(), alerts=None, latency=0.0, now=None):
+        self.responses = [ReplayResponse(200, r) if isinstance(r, bytes) else r for r in responses]
+        self.alerts = ReplayResponse(200, alerts) if isinstance(alerts, bytes) else alerts
+        self.latency = latency
+        self.now = now
+        self.up = True
+        self.requests = 0
+
+    def clock(self):
+        return time.time() if self.now is None else self.now
+
+    def get(self, url, params=None, headers=None, **options):
+        self.requests += 1
+        if not self.responses:
+            raise AssertionError(f"unexpected request for {url}")
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.up:
+            raise IOError("connection refused")
+        if self.alerts is not None and url.endswith(ALERTS):
+            return self.alerts
+        return self.responses[(self.requests - 1) % len(self.responses)]
+
+    def close(self):
+        pass
+
+
+class FakeFont:
+    def __init__(self, name):
+        self.width = int(name.split("x")[0])
+
+    def CharacterWidth(self, char):
+        return self.width
+
+
+class FakeFonts:
+    def get_font(self, name):
+        return FakeFont(name)
+
+
+class FakeCanvas:
+    """Counts drawing calls instead of lighting LEDs"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.width = matrix.width
+        self.height = matrix.height
+
+    def Clear(self):
+        self.matrix.calls += 1
+
+    def SetPixel(self, x, y, r, g, b):
+        self.matrix.calls += 1
+
+    def SetImage(self, image, x=0, y=0):
+        self.matrix.calls += 1
+
+    def SetFont(self, font):
+        self.matrix.calls += 1
+
+    def DrawText(self, canvas, text, x, y, r, g, b):
+        self.matrix.calls += 1
+
+
+class FakeMatrix:
+    def __init__(self, width=64, height=32):
+        self.width = width
+        self.height = height
+        self.swaps = 0
+        self.calls = 0
+
+    def CreateFrameCanvas(self):
+        return FakeCanvas(self)
+
+    def SwapOnVSync(self, canvas):
+        self.swaps += 1
+        return canvas
@@ -0,0 +1,58 @@
+import unittest
+
+from data.alerts import AlertIndex
+from data.bart import BARTData
+from tests.helpers import ELSEWHERE, LINE, STATION, SYSTEM, FakeTransport, alerts_feed, make_config
+
+
+class TestAlertIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AlertIndex(lambda stop_id: stop_id.split("_")[0], {"1": "yellow", "7": "red"}.get)
+
+    def test_station_gets_only_relevant_alerts(self):
+        self.assertTrue(self.index.update(alerts_feed(SYSTEM, STATION, LINE, ELSEWHERE)))
+
+        alerts, ticker = self.index.for_station("WCRK", ["yellow"])
+        self.assertEqual([alert["id"] for alert in alerts], ["1", "2", "3"])
+        self.assertEqual(ticker, "Elevator outages | Escalator closed at Walnut Creek | Delays on the yellow line")
+        self.assertEqual([alert["id"] for alert in self.index.for_station("MLBR")[0]], ["1", "4"])
+        self.assertEqual([alert["id"] for alert in self.index.for_station("ORIN", ["red"])[0]], ["1", "4"])
+        self.assertIs(self.index.for_station("WCRK", ["yellow", "yellow"]), self.index.for_station("WCRK", ["yellow"]))
+
+    def test_unchanged_alerts_are_reused(self):
+        self.index.update(alerts_feed(SYSTEM, STATION))
+        first = self.index.alerts
+        self.assertFalse(self.index.update(alerts_feed(SYSTEM, STATION)))
+        self.assertIs(self.index.alerts, first)
+
+        # Only the edited alert is rebuilt
+        self.assertTrue(self.index.update(alerts_feed(SYSTEM, ("2", "Escalator reopened", ("WCRK_2",), ()))))
+        self.assertIs(self.index.alerts[0], first[0])
+        self.assertEqual(self.index.alerts[1]["title"], "Escalator reopened")
+        self.assertEqual(self.index.version, 2)
+
+    def test_duplicates_are_dropped(self):
+        self.index.update(alerts_feed(SYSTEM, ("9", *SYSTEM[1:]), STATION))
+        self.assertEqual([alert["id"] for alert in self.index.alerts], ["1", "2"])
+
+
+class TestBoardAlerts(unittest.TestCase):
+    def test_unchanged_payload_is_not_republished(self):
+        payload = alerts_feed(SYSTEM, ELSEWHERE).SerializeToString()
+        data = BARTData(make_config())
+        data.transport = FakeTransport([payload, payload])
+
+        status = data.get_system_status()
+        self.assertEqual(status["status"], "alert")
+        self.assertEqual(status["ticker"], "Elevator outages")
+        version = data.snapshot.version
+
+        data.alert_policy.next_attempt = 0
+        data.get_system_status()
+        self.assertEqual(data.snapshot.version, version)
+        self.assertEqual(data.alert_changes.stats.identical, 1)
+        self.assertEqual(data.snapshot.system_status["ticker"], "Elevator outages")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import tracemalloc
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from data.bart import BARTData, BARTDeparture, BARTStation
+from data.subscription import Subscription
+from data.trip_updates import trip_state_from_entity
+from tests.helpers import make_config
+
+
+class TestStationIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = BARTData(make_config())
+
+    def test_find_station_by_abbreviation_and_name(self):
+        self.assertIs(self.data.find_station("embr"), self.data.stations["EMBR"])
+        self.assertIs(self.data.find_station("Powell St."), self.data.stations["POWL"])
+        self.assertIs(self.data.find_station("  civic center/un plaza "), self.data.stations["CIVC"])
+
+    def test_find_station_unknown(self):
+        self.assertIsNone(self.data.find_station("Atlantis"))
+
+
+class TestStationDepartures(unittest.TestCase):
+    now = 1700000000
+
+    def make_station(self, *minutes):
+        station = BARTStation("Walnut Creek", "WCRK", "WCRK")
+        departures = [BARTDeparture("Dest", self.now + m * 60 + 10, "1", "N", "yellow", 10) for m in minutes]
+        station.set_departures(departures, limit=3)
+        return station
+
+    def test_top_k_view(self):
+        station = self.make_station(12, 3, 25, 0, 7)
+        self.assertEqual([d.minutes_at(self.now) for d in station.next_departures], [0, 3, 7])
+        self.assertEqual([d.minutes_at(self.now) for d in station.ordered_departures()], [0, 3, 7, 12, 25])
+
+    def test_countdown_between_polls(self):
+        departure = self.make_station(5).next_departures[0]
+        self.assertEqual(departure.minutes_at(self.now), 5)
+        self.assertEqual(departure.minutes_at(self.now + 120), 3)
+        self.assertEqual(departure.minutes_at(self.now + 310), 0)
+        self.assertFalse(departure.departed(self.now + 310))
+        self.assertTrue(departure.departed(self.now + 400))
+
+    def test_evict_departed(self):
+        station = self.make_station(12, 3, 25, 0, 7)
+        self.assertFalse(station.evict_departed(self.now + 60))
+        self.assertTrue(station.evict_departed(self.now + 5 * 60))
+        self.assertEqual([d.minutes_at(self.now) for d in station.next_departures], [7, 12, 25])
+        self.assertEqual(len(station.departures), 3)
+
+
+class TestTripUpdateApplier(unittest.TestCase):
+    def setUp(self):
+        self.data = BARTData(make_config())
+        self.data.subscription = Subscription()
+        self.now = 1700000000
+
+    def make_feed(self, trips, incrementality=None, deleted=()):
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.header.gtfs_realtime_version = "2.0"
+        if incrementality is not None:
+            feed.header.incrementality = incrementality
+        for trip_id, stops in trips.items():
+            entity = feed.entity.add()
+            entity.id = trip_id
+            entity.trip_update.trip.trip_id = trip_id
+            entity.trip_update.trip.route_id = "ROUTE 1"
+            for stop_id, minutes in stops:
+                update = entity.trip_update.stop_time_update.add()
+                update.stop_id = stop_id
+                update.arrival.time = self.now + minutes * 60 + 30
+        for trip_id in deleted:
+            entity = feed.entity.add()
+            entity.id = trip_id
+            entity.is_deleted = True
+        return feed
+
+    def apply(self, feed):
+        return self.data.trip_updates.apply(feed, lambda trip: self.data._build_trip_departures(trip, self.now))
+
+    def test_full_dataset_diff(self):
+        touched = self.apply(self.make_feed({"T1-MLBR": [("WCRK", 3), ("ORIN", 6)], "T2-PITT": [("MONT", 2)]}))
+        self.assertEqual(touched, {"WCRK", "ORIN", "MONT"})
+
+        # Unchanged T1, changed T2, new T3
+        touched = self.apply(
+            self.make_feed({"T1-MLBR": [("WCRK", 3), ("ORIN", 6)], "T2-PITT": [("EMBR", 4)], "T3-DALY": [("WCRK", 9)]})
+        )
+        self.assertEqual(touched, {"MONT", "EMBR", "WCRK"})
+        applier = self.data.trip_updates
+        self.assertEqual((applier.added, applier.changed, applier.deleted), (1, 1, 0))
+        self.assertEqual(applier.departures_for("MONT"), [])
+        self.assertEqual(sorted(d.minutes_at(self.now) for d in applier.departures_for("WCRK")), [3, 9])
+
+        # Trips missing from a full feed are removed
+        touched = self.apply(self.make_feed({"T3-DALY": [("WCRK", 9)]}))
+        self.assertEqual(touched, {"WCRK", "ORIN", "EMBR"})
+        self.assertEqual(applier.deleted, 2)
+
+    def test_differential(self):
+        differential = gtfs_realtime_pb2.FeedHeader.DIFFERENTIAL
+        self.apply(self.make_feed({"T1-MLBR": [("WCRK", 3)], "T2-PITT": [("MONT", 2)]}))
+
+        touched = self.apply(self.make_feed({"T3-DALY": [("ORIN", 5)]}, incrementality=differential))
+        self.assertEqual(touched, {"ORIN"})
+        self.assertEqual(len(self.data.trip_updates.departures_for("WCRK")), 1)
+
+        touched = self.apply(self.make_feed({}, incrementality=differential, deleted=["T1-MLBR"]))
+        self.assertEqual(touched, {"WCRK"})
+        self.assertEqual(self.data.trip_updates.departures_for("WCRK"), [])
+        self.assertEqual(len(self.data.trip_updates.departures_for("MONT")), 1)
+
+
+class TestSubscription(unittest.TestCase):
+    make_feed = TestTripUpdateApplier.make_feed
+    apply = TestTripUpdateApplier.apply
+
+    def setUp(self):
+        self.data = BARTData(make_config(preferred_stations=["WCRK", "Orinda"], preferred_lines=["Yellow"]))
+        self.now = 1700000000
+
+    def test_only_subscribed_stations_and_lines_are_built(self):
+        self.assertEqual(self.data.subscription.station_ids, {"WCRK", "ORIN"})
+        feed = self.make_feed({"T1-MLBR": [("WCRK", 3), ("ORIN", 6), ("ROCK", 9)]})
+        red = feed.entity.add()
+        red.id = "T2-RICH"
+        red.trip_update.trip.trip_id = "T2-RICH"
+        red.trip_update.trip.route_id = "ROUTE 7"
+        stop = red.trip_update.stop_time_update.add()
+        stop.stop_id = "WCRK"
+        stop.arrival.time = self.now + 120
+
+        self.assertEqual(self.apply(feed), {"WCRK", "ORIN"})
+        self.assertEqual(len(self.data.trip_updates.departures_for("WCRK")), 1)
+        self.assertEqual(self.data.trip_updates.departures_for("ROCK"), [])
+
+    def test_subscribe_without_refetch(self):
+        self.data._apply_entities(self.make_feed({"T1-MLBR": [("WCRK", 3), ("ROCK", 9)]}), self.now)
+        rockridge = self.data.stations["ROCK"]
+        self.assertEqual(rockridge.departures, [])
+
+        self.data.subscribe(rockridge, self.now)
+        self.assertEqual([d.destination_name for d in rockridge.next_departures], ["MLBR"])
+
+
+class TestDepartureMemory(unittest.TestCase):
+    # Bytes allocated per departure, including its share of the per-trip containers
+    BUDGET = 300
+
+    def test_departure_memory_budget(self):
+        data = BARTData(make_config())
+        data.subscription = Subscription()
+        now = 1700000000
+        station_ids = list(data.stations)
+        feed = gtfs_realtime_pb2.FeedMessage()
+        for trip in range(100):
+            entity = feed.entity.add()
+            entity.id = str(trip)
+            entity.trip_update.trip.trip_id = f"{trip}-MLBR"
+            entity.trip_update.trip.route_id = "ROUTE 1"
+            for stop in range(10):
+                update = entity.trip_update.stop_time_update.add()
+                update.stop_id = station_ids[(trip + stop) % len(station_ids)]
+                update.arrival.time = now + 60 + trip * 7 + stop * 120
+
+        trips = [trip_state_from_entity(entity) for entity in feed.entity]
+
+        tracemalloc.start()
+        try:
+            built = [data._build_trip_departures(trip, now) for trip in trips]
+            allocated, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        departures = [d for contribution in built for group in contribution.values() for d in group]
+        self.assertEqual(len(departures), 1000)
+        self.assertLess(allocated / len(departures), self.BUDGET)
+
+        # Identical strings are shared rather than copied per departure
+        self.assertEqual(len({id(d.destination_name) for d in departures}), 1)
+        self.assertEqual(len({id(d.line_color) for d in departures}), 1)
+
+    def test_departure_is_immutable(self):
+        departure = BARTDeparture("MLBR", 1700000000, "1", "N", "yellow", 10)
+        with self.assertRaises(AttributeError):
+            departure.delay = 60
+        self.assertFalse(hasattr(departure, "__dict__"))
+        self.assertFalse(hasattr(BARTStation("Walnut Creek", "WCRK", "WCRK"), "__dict__"))
@@ -0,0 +1,49 @@
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from data import columnar
+from data.columnar import ColumnarDepartures
+
+NOW = 1700000000
+
+
+def make_feed():
+    feed = gtfs_realtime_pb2.FeedMessage()
+    trips = {
+        "1-MLBR": ("ROUTE 1", [("WCRK", 300), ("ORIN", 600), ("ROCK", 800)]),
+        "2-PITT": ("ROUTE 2", [("ORIN", -200), ("WCRK", 100), ("XXXX", 50)]),
+        "3-SFIA": ("ROUTE 1", [("WCRK", 30), ("ORIN", 900)]),
+    }
+    for trip_id, (route_id, stops) in trips.items():
+        entity = feed.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.trip.route_id = route_id
+        for stop_id, offset in stops:
+            update = entity.trip_update.stop_time_update.add()
+            update.stop_id = stop_id
+            update.departure.time = NOW + offset
+            update.departure.delay = 60
+    return feed
+
+
+class TestColumnarDepartures(unittest.TestCase):
+    def check_store(self, use_numpy):
+        store = ColumnarDepartures.from_feed(make_feed(), ["WCRK", "ORIN", "ROCK"], use_numpy=use_numpy)
+        self.assertEqual(len(store), 7)
+        self.assertEqual(len(store.destinations), 3)
+        self.assertEqual(list(store.minutes(NOW)), [5, 10, 13, -3, 1, 0, 15])
+
+        top = store.top_k(2, NOW)
+        self.assertEqual(top, {"WCRK": [5, 4], "ORIN": [1, 6], "ROCK": [2]})
+
+        departures = store.materialize(top["WCRK"], lambda *row: row)
+        self.assertEqual(departures, [("SFIA", NOW + 30, "ROUTE 1", 60), ("PITT", NOW + 100, "ROUTE 2", 60)])
+
+    @unittest.skipIf(columnar.np is None, "NumPy not installed")
+    def test_numpy(self):
+        self.check_store(use_numpy=True)
+
+    def test_array_fallback(self):
+        self.check_store(use_numpy=False)
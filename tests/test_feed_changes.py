@@ -0,0 +1,48 @@
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from data.feed_changes import FeedChangeDetector, read_feed_header
+
+
+def make_payload(timestamp, trip_ids=("T1",)):
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    if timestamp is not None:
+        feed.header.timestamp = timestamp
+    for trip_id in trip_ids:
+        entity = feed.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+    return feed.SerializeToString()
+
+
+class TestFeedChanges(unittest.TestCase):
+    def test_read_feed_header(self):
+        header = read_feed_header(make_payload(1700000000, trip_ids=("A", "B", "C")))
+        self.assertEqual(header.timestamp, 1700000000)
+        self.assertIsNone(read_feed_header(b"\xff\xff"))
+
+    def test_identical_payload_is_skipped(self):
+        detector = FeedChangeDetector()
+        self.assertTrue(detector.has_changed(make_payload(100)))
+        self.assertFalse(detector.has_changed(make_payload(100)))
+        self.assertTrue(detector.has_changed(make_payload(101)))
+        self.assertEqual(detector.stats.as_dict(), {"fetched": 2, "not_modified": 0, "identical": 1})
+
+    def test_hash_used_without_timestamp(self):
+        detector = FeedChangeDetector()
+        self.assertTrue(detector.has_changed(make_payload(None, ("A",))))
+        self.assertFalse(detector.has_changed(make_payload(None, ("A",))))
+        self.assertTrue(detector.has_changed(make_payload(None, ("B",))))
+
+    def test_conditional_headers(self):
+        detector = FeedChangeDetector()
+        self.assertEqual(detector.request_headers(), {})
+        detector.has_changed(make_payload(1), {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertEqual(
+            detector.request_headers(),
+            {"If-None-Match": '"abc"', "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"},
+        )
+        detector.reset()
+        self.assertEqual(detector.request_headers(), {})
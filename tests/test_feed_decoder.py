@@ -0,0 +1,160 @@
+import time
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from benchmarks.synthetic import TIME_MODES, build_feed
+from data import feed_decoder
+from data.bart import BARTData
+from data.feed_decoder import decode_feed
+from data.trip_updates import DIFFERENTIAL, FULL_DATASET, trip_state_from_entity
+from tests.helpers import FakeTransport, make_config, trip_payload
+
+
+def decoded(feed):
+    incrementality, entities = decode_feed(feed.SerializeToString())
+    return incrementality, list(entities)
+
+
+class TestFeedDecoder(unittest.TestCase):
+    def test_matches_the_protobuf_parser(self):
+        for time_mode in TIME_MODES:
+            feed = build_feed(50, 8, now=1700000000, unknown_share=0.2, time_mode=time_mode)
+            incrementality, entities = decoded(feed)
+            self.assertEqual(incrementality, FULL_DATASET)
+            self.assertEqual([entity.entity_id for entity in entities], [entity.id for entity in feed.entity])
+            for entity, reference in zip(entities, feed.entity):
+                self.assertEqual(entity.decode_trip(), trip_state_from_entity(reference), time_mode)
+
+    def test_negative_values_and_skipped_fields(self):
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.header.gtfs_realtime_version = "2.0"
+        entity = feed.entity.add()
+        entity.id = "T1"
+        entity.trip_update.trip.trip_id = "T1-MLBR"
+        entity.trip_update.trip.start_date = "20240305"
+        entity.trip_update.vehicle.label = "10 car"
+        update = entity.trip_update.stop_time_update.add()
+        update.stop_sequence = 4
+        update.stop_id = "WCRK"
+        update.arrival.delay = -45
+        update.arrival.time = 1700000000
+        update.arrival.uncertainty = 30
+        vehicle = feed.entity.add()
+        vehicle.id = "V1"
+        vehicle.vehicle.position.latitude = 37.9
+        vehicle.vehicle.position.longitude = -122.1
+
+        _, entities = decoded(feed)
+        self.assertEqual(entities[0].decode_trip(), trip_state_from_entity(feed.entity[0]))
+        self.assertEqual(entities[0].decode_trip().stop_times, (("WCRK", 1700000000, -45),))
+        self.assertEqual((entities[1].fingerprint, entities[1].decode_trip), (None, None))
+
+    def test_differential_feed(self):
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.header.gtfs_realtime_version = "2.0"
+        feed.header.incrementality = DIFFERENTIAL
+        entity = feed.entity.add()
+        entity.id = "T1"
+        entity.is_deleted = True
+        incrementality, entities = decoded(feed)
+        self.assertEqual(incrementality, DIFFERENTIAL)
+        self.assertTrue(entities[0].is_deleted)
+
+    def test_fingerprint_follows_the_trip_update(self):
+        first = decoded(build_feed(3, 4, now=1700000000, seed=1))[1]
+        again = decoded(build_feed(3, 4, now=1700000000, seed=1))[1]
+        other = decoded(build_feed(3, 4, now=1700000000, seed=2))[1]
+        self.assertEqual([e.fingerprint for e in first], [e.fingerprint for e in again])
+        self.assertNotEqual([e.fingerprint for e in first], [e.fingerprint for e in other])
+
+    def test_malformed_payloads(self):
+        payload = build_feed(3, 4, now=1700000000).SerializeToString()
+        with self.assertRaises(ValueError):
+            decode_feed(payload[:-5])
+
+        # A second arrival, which the protobuf parser would merge into the first, is left to that parser
+        _, entities = decode_feed(_repeated_arrival_payload())
+        with self.assertRaises(ValueError):
+            next(entities).decode_trip()
+
+    def test_lengths_past_the_parent_message(self):
+        # A trip update claiming to end before or after its entity does; the protobuf parser rejects both
+        for delta in (-2, 2):
+            payload = _resize_trip_update(trip_payload(1700000000, 5), delta)
+            with self.assertRaises(ValueError):
+                _, entities = decode_feed(payload)
+                for entity in entities:
+                    entity.decode_trip()
+
+    def test_truncated_trip_update(self):
+        # The trip update's last stop time update ends mid varint, past the end of the buffer
+        payload = _field(feed_decoder.TAG_ENTITY, _field(feed_decoder.TAG_TRIP_UPDATE, b"\x12\x02\x0a\x80"))
+        _, entities = decode_feed(payload)
+        with self.assertRaises(ValueError):
+            next(entities).decode_trip()
+        with self.assertRaises(ValueError):
+            feed_decoder.decode_trip_update(b"\x12\x80", 0, 3)
+
+    def test_field_numbers_come_from_the_descriptors(self):
+        self.assertEqual(feed_decoder.MESSAGE_ENTITY, 2)
+        self.assertEqual(feed_decoder.TAG_ENTITY, 0x12)
+        self.assertEqual(feed_decoder.TAG_TIME, 2 << 3)
+
+
+def _field(tag, value):
+    return bytes([tag, len(value)]) + value
+
+
+def _repeated_arrival_payload():
+    """A feed whose only stop time update has two arrivals"""
+    arrival = _field(feed_decoder.TAG_ARRIVAL, bytes([feed_decoder.TAG_TIME, 1]))
+    trip = _field(feed_decoder.TAG_TRIP, _field(feed_decoder.TAG_TRIP_ID, b"T1-MLBR"))
+    update = _field(feed_decoder.TAG_STOP_TIME_UPDATE, _field(feed_decoder.TAG_STOP_ID, b"WCRK") + arrival + arrival)
+    entity = _field(feed_decoder.TAG_ENTITY_ID, b"T1") + _field(feed_decoder.TAG_TRIP_UPDATE, trip + update)
+    return _field(feed_decoder.TAG_ENTITY, entity)
+
+
+def _resize_trip_update(payload, delta):
+    """``payload`` with its first trip update's length changed by ``delta`` and nothing else"""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    length = feed.entity[0].trip_update.ByteSize()
+    tag = bytes([feed_decoder.TAG_TRIP_UPDATE, length])
+    return payload.replace(tag, bytes([feed_decoder.TAG_TRIP_UPDATE, length + delta]), 1)
+
+
+class TestBoardWithFastDecoder(unittest.TestCase):
+    def test_same_departures_as_the_protobuf_parser(self):
+        now = time.time()
+        boards = {}
+        for fast_decoder in (False, True):
+            data = BARTData(make_config(fast_decoder=fast_decoder))
+            data.transport = FakeTransport([trip_payload(now, 5)])
+            data.update_departures()
+            boards[fast_decoder] = [(d.destination_name, d.minutes_at(now)) for d in data.stations["WCRK"].departures]
+        self.assertEqual(boards[True], boards[False])
+        self.assertEqual([minutes for _, minutes in boards[True]], [5])
+
+    def test_falls_back_to_the_protobuf_parser(self):
+        data = BARTData(make_config(fast_decoder=True))
+        data.transport = FakeTransport([_repeated_arrival_payload()])
+        data.update_departures()
+        self.assertEqual(len(data.trip_updates.trips), 1)
+        self.assertEqual(data.trip_policy.failures, 0)
+
+    def test_corrupt_lengths_are_rejected_like_the_protobuf_parser(self):
+        now = time.time()
+        for delta in (-2, 2):
+            for fast_decoder in (False, True):
+                with self.subTest(delta=delta, fast_decoder=fast_decoder):
+                    data = BARTData(make_config(fast_decoder=fast_decoder))
+                    payload = _resize_trip_update(trip_payload(now, 5), delta)
+                    data.transport = FakeTransport([payload])
+                    data.update_departures()
+                    self.assertEqual(data.stations["WCRK"].departures, [])
+                    self.assertEqual(data.trip_updates.trips, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import random
+import unittest
+
+from data.bart import BARTData
+from data.fetch_policy import CLOSED, HALF_OPEN, OPEN, FetchPolicy, LatencyTracker, NetworkState
+from data.transport import CONNECT_TIMEOUT
+from tests.helpers import FakeTransport, make_config, trip_payload
+
+
+class TestFetchPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = FetchPolicy("test", failure_threshold=4, breaker_cooldown=60, rng=random.Random(1))
+
+    def test_backoff_grows_with_jitter(self):
+        delays = [self.policy.record_failure(0) for _ in range(3)]
+        for failures, delay in enumerate(delays, 1):
+            step = 2.0 * 2 ** (failures - 1)
+            self.assertTrue(step / 2 <= delay <= step, (failures, delay))
+        self.assertFalse(self.policy.ready(delays[-1] - 0.01))
+        self.assertTrue(self.policy.ready(delays[-1]))
+
+    def test_circuit_breaker(self):
+        for _ in range(4):
+            self.policy.record_failure(100)
+        self.assertEqual(self.policy.state, OPEN)
+        self.assertFalse(self.policy.ready(159))
+
+        # One probe after the cooldown; a failed probe reopens the breaker
+        self.assertTrue(self.policy.ready(160))
+        self.assertEqual(self.policy.state, HALF_OPEN)
+        self.assertFalse(self.policy.ready(160))
+        self.policy.record_failure(160)
+        self.assertEqual(self.policy.state, OPEN)
+        self.assertEqual(self.policy.breaker_trips, 2)
+
+        self.assertTrue(self.policy.ready(220))
+        self.policy.record_success(220, 0.1)
+        self.assertEqual(self.policy.state, CLOSED)
+        self.assertTrue(self.policy.ready(220))
+
+    def test_timeouts_follow_latency(self):
+        self.assertIsNone(self.policy.timeout())
+        for latency in (0.5, 0.6, 0.7, 0.8, 1.0):
+            self.policy.record_success(0, latency)
+        self.assertEqual(self.policy.timeout(), (CONNECT_TIMEOUT, 3.0))
+        self.assertEqual(self.policy.deadline(), CONNECT_TIMEOUT + 6.0)
+
+        tracker = LatencyTracker(samples=3)
+        for latency in (9, 1, 2, 3):
+            tracker.record(latency)
+        self.assertEqual(tracker.percentile(50), 2)
+
+    def test_staleness(self):
+        self.assertTrue(self.policy.stale(0))
+        self.policy.record_success(1000)
+        self.assertFalse(self.policy.stale(1300))
+        self.assertTrue(self.policy.stale(1301))
+
+
+class TestNetworkState(unittest.TestCase):
+    def test_hysteresis(self):
+        state = NetworkState(down_after=3, up_after=2)
+        for result in (False, False, True, False, False):
+            state.record(result)
+        self.assertFalse(state.down)
+        self.assertTrue(state.record(False))
+        self.assertTrue(state.down)
+
+        self.assertFalse(state.record(True))
+        state.record(False)
+        self.assertFalse(state.record(True))
+        self.assertTrue(state.record(True))
+        self.assertFalse(state.down)
+
+
+class TestResilientFetching(unittest.TestCase):
+    now = 1700000000
+
+    def setUp(self):
+        self.data = BARTData(make_config(api_refresh_rate=1))
+        self.transport = FakeTransport([trip_payload(self.now, 10)])
+        self.data.transport = self.transport
+        self.data.clock = lambda: self.now
+
+    def poll(self, seconds):
+        """Poll every half second for ``seconds``, like the main loop"""
+        for _ in range(int(seconds * 2)):
+            self.data.update_departures()
+            self.now += 0.5
+
+    def test_outage_backs_off_and_keeps_last_good_departures(self):
+        self.poll(1)
+        station = self.data.stations["WCRK"]
+        self.assertEqual(len(station.departures), 1)
+
+        self.transport.up = False
+        requests = self.transport.requests
+        self.poll(120)
+        # A retry storm would have made ~240 requests
+        self.assertLess(self.transport.requests - requests, 10)
+        self.assertTrue(self.data.network_issues)
+        self.assertEqual(len(station.departures), 1)
+
+        self.transport.up = True
+        self.poll(180)
+        self.assertFalse(self.data.network_issues)
+
+    def test_single_failure_does_not_flag_the_network(self):
+        self.poll(1)
+        self.transport.up = False
+        self.poll(1)
+        self.assertFalse(self.data.network_issues)
+
+    def test_system_status_served_until_stale(self):
+        self.data.transport = FakeTransport([b""])
+        self.assertEqual(self.data.get_system_status()["status"], "normal")
+        self.data.transport.up = False
+        self.now += 60
+        self.assertEqual(self.data.get_system_status()["status"], "normal")
+        self.now += 600
+        self.assertEqual(self.data.get_system_status()["status"], "unknown")
+        self.assertEqual(self.data.snapshot.system_status["status"], "unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import time
+import unittest
+
+from data.bart import BARTData
+from renderers.departures import DepartureRenderer
+from renderers.frame_pacing import DEFAULT_FPS, MAX_IDLE, FramePacer, next_tick
+from tests.helpers import COLORS, COORDINATES, FakeFonts, FakeMatrix, FakeTransport, make_config, trip_payload
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+class TestFramePacer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pacer = FramePacer(10, clock=self.clock, sleep=self.clock.sleep, cpu_clock=self.clock)
+        self.draws = []
+
+    def frame(self, screen, fingerprint):
+        # Content that could change any time, like a fast scroll, only waits out the frame
+        return self.pacer.frame(screen, fingerprint, lambda: self.draws.append(fingerprint), next_change=0)
+
+    def test_unchanged_frames_are_skipped(self):
+        self.assertTrue(self.frame("departures", (1, "5:04")))
+        self.assertFalse(self.frame("departures", (1, "5:04")))
+        self.assertTrue(self.frame("departures", (1, "5:05")))
+        # Another screen with the same fingerprint still has to be drawn
+        self.assertTrue(self.frame("offday", (1, "5:05")))
+        self.assertTrue(self.frame("offday", None))
+        self.assertTrue(self.frame("offday", None))
+        self.assertEqual(len(self.draws), 5)
+
+    def test_frame_rate_is_capped(self):
+        for _ in range(20):
+            self.frame("departures", (1,))
+        self.assertAlmostEqual(self.clock.now, 2.0)
+        stats = self.pacer.report()["departures"]
+        self.assertEqual((stats.frames, stats.drawn), (20, 1))
+        self.assertAlmostEqual(stats.frames / stats.wall, 10)
+
+    def test_sleeps_until_the_next_change(self):
+        self.frame("departures", (1,))
+        self.assertAlmostEqual(self.clock.now, 0.1)
+        self.pacer.frame("departures", (1,), lambda: None, next_change=0.5)
+        self.assertAlmostEqual(self.clock.now, 0.6)
+        # Content that only changes with new data still wakes up to notice other state
+        self.pacer.frame("departures", (1,), lambda: None)
+        self.assertAlmostEqual(self.clock.now, 0.6 + MAX_IDLE)
+        # A change already due still waits out the frame
+        self.pacer.frame("departures", (1,), lambda: None, next_change=-1)
+        self.assertAlmostEqual(self.clock.now, 0.7 + MAX_IDLE)
+
+    def test_new_data_cuts_the_sleep_short(self):
+        waits = []
+        self.pacer.frame("departures", (1,), lambda: None, next_change=30, wait=waits.append)
+        self.assertEqual(waits, [MAX_IDLE - 0.1])
+
+    def test_next_tick(self):
+        self.assertEqual(next_tick(125, 1 / 60), 180)
+        self.assertEqual(next_tick(10.2, 2), 10.5)
+        self.assertEqual(next_tick(10.5, 2), 11)
+
+    def test_bad_fps_falls_back_to_the_default(self):
+        self.assertEqual(FramePacer(0).frame_time, 1.0 / DEFAULT_FPS)
+
+
+class TestDepartureFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.now = time.time()
+        data = BARTData(make_config(time_format="24h"))
+        data.transport = FakeTransport([trip_payload(self.now, 5)])
+        data.font = FakeFonts()
+        data.update_departures()
+        with open(COORDINATES) as f:
+            coords = json.load(f)
+        with open(COLORS) as f:
+            colors = json.load(f)
+        self.data = data
+        self.matrix = FakeMatrix()
+        self.renderer = DepartureRenderer(self.matrix, data, colors, coords)
+
+    def test_changes_with_the_countdown_and_snapshot(self):
+        fingerprint = self.renderer.fingerprint(self.now)
+        self.assertEqual(self.renderer.fingerprint(self.now + 1), fingerprint)
+        # The train's countdown ticks over from 5 to 4 minutes
+        self.assertNotEqual(self.renderer.fingerprint(self.now + 31), fingerprint)
+        self.data.publish_station()
+        self.assertNotEqual(self.renderer.fingerprint(self.now), fingerprint)
+
+    def test_next_change_is_the_next_countdown_tick(self):
+        departure = self.data.snapshot.station.departures[0]
+        # 5m30s out: 5 until 5m, then 0 lasts until a minute after arrival
+        self.assertEqual(departure.next_change_at(self.now), departure.arrival_time - 300)
+        self.assertEqual(departure.next_change_at(departure.arrival_time - 10), departure.arrival_time + 60)
+        next_minute = next_tick(self.now, 1 / 60)
+        self.assertEqual(self.renderer.next_change(self.now), min(departure.arrival_time - 300, next_minute))
+
+    def test_paced_board_swaps_only_on_change(self):
+        pacer = FramePacer(DEFAULT_FPS, clock=FakeClock(), sleep=lambda seconds: None)
+        for second in range(10):
+            now = self.now + second
+            pacer.frame("departures", self.renderer.fingerprint(now), lambda: self.renderer.render(now))
+        self.assertLessEqual(self.matrix.swaps, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from PIL import Image
+from RGBMatrixEmulator.graphics import Color, Font
+
+from data.bart import BARTData
+from renderers.departures import DepartureRenderer
+from renderers.framebuffer import BitmapFonts, FramebufferCanvas, FramebufferMatrix, framebuffer_matrix
+from tests.helpers import COLORS, COORDINATES, FakeMatrix, FakeTransport, make_config, trip_payload
+
+
+class PixelRecorder:
+    """Collects the pixels a driver font draws"""
+
+    def __init__(self):
+        self.pixels = set()
+
+    def SetPixel(self, x, y, r, g, b):
+        if 0 <= x < 64 and 0 <= y < 32:
+            self.pixels.add((x, y))
+
+
+def lit(canvas):
+    ys, xs = canvas.pixels.any(axis=2).nonzero()
+    return set(zip(xs.tolist(), ys.tolist()))
+
+
+class TestFramebufferCanvas(unittest.TestCase):
+    def setUp(self):
+        self.canvas = FramebufferCanvas(64, 32)
+
+    def test_text_matches_the_driver_fonts(self):
+        fonts = BitmapFonts()
+        for name in ("4x6", "5x7", "6x9", "6x13"):
+            with self.subTest(font=name):
+                driver_font = Font()
+                driver_font.LoadFont(fonts.get_font(name).path)
+                recorder = PixelRecorder()
+                x = 1
+                for char in "Dest gy 12:05一":
+                    x += driver_font.DrawGlyph(recorder, x, 20, Color(255, 255, 255), ord(char))
+
+                self.canvas.Clear()
+                self.canvas.SetFont(fonts.get_font(name))
+                width = self.canvas.DrawText(self.canvas, "Dest gy 12:05一", 1, 20, 255, 255, 255)
+                self.assertEqual(width, x - 1)
+                self.assertEqual(lit(self.canvas), recorder.pixels)
+                self.assertEqual(fonts.get_font(name).CharacterWidth(ord("A")), driver_font.CharacterWidth(ord("A")))
+                self.assertEqual(fonts.get_font(name).CharacterWidth(0x4E00), -1)
+
+    def test_drawing_is_clipped_to_the_buffer(self):
+        self.canvas.SetFont(BitmapFonts().get_font("6x9"))
+        self.canvas.DrawText(self.canvas, "Walnut Creek", -7, 3, 255, 0, 0)
+        self.canvas.DrawText(self.canvas, "Walnut Creek", 40, 36, 255, 0, 0)
+        self.canvas.FillRect(60, -2, 10, 4, 0, 255, 0)
+        self.canvas.SetImage(Image.new("RGB", (8, 8), (0, 0, 255)), -4, 28)
+        self.canvas.SetPixel(64, 0, 255, 255, 255)
+        self.assertEqual(self.canvas.pixels[0:2, 60:64].tolist(), [[[0, 255, 0]] * 4] * 2)
+        self.assertEqual(self.canvas.pixels[28:32, 0:4].tolist(), [[[0, 0, 255]] * 4] * 4)
+        self.assertTrue(lit(self.canvas))
+
+    def test_lines(self):
+        self.canvas.DrawLine(0, 0, 5, 0, 255, 0, 0)
+        self.canvas.DrawLine(3, 4, 3, 1, 255, 0, 0)
+        self.canvas.DrawLine(-2, -2, 2, 2, 255, 0, 0)
+        expected = {(x, 0) for x in range(6)} | {(3, y) for y in range(1, 5)} | {(x, x) for x in range(3)}
+        self.assertEqual(lit(self.canvas), expected)
+
+
+class RecordingMatrix(FakeMatrix):
+    def __init__(self):
+        super().__init__()
+        self.images = []
+
+    def CreateFrameCanvas(self):
+        return SimpleNamespace(SetImage=lambda image, x, y: self.images.append(image.copy()))
+
+
+class TestFramebufferMatrix(unittest.TestCase):
+    def test_frames_go_to_the_matrix_in_one_call(self):
+        # Half past the hour, so the header's clock reads the same for both frames
+        now = 1700001000.0
+        data = BARTData(make_config(time_format="24h"))
+        data.transport = FakeTransport([trip_payload(now, 5)])
+        data.clock = lambda: now
+        data.font = BitmapFonts()
+        data.update_departures()
+        with open(COORDINATES) as f:
+            coords = json.load(f)
+        with open(COLORS) as f:
+            colors = json.load(f)
+        matrix = RecordingMatrix()
+        framebuffer = FramebufferMatrix(matrix)
+        renderer = DepartureRenderer(framebuffer, data, colors, coords)
+
+        renderer.render(now)
+        renderer.render(now + 31)
+        self.assertEqual(matrix.swaps, 2)
+        self.assertEqual([image.size for image in matrix.images], [(64, 32), (64, 32)])
+        header = colors["station"]["header"]["background"]
+        self.assertEqual(matrix.images[0].getpixel((63, 0)), (header["r"], header["g"], header["b"]))
+        # Only the row's countdown changed
+        self.assertNotEqual(matrix.images[0].tobytes(), matrix.images[1].tobytes())
+        self.assertEqual(matrix.images[0].crop((0, 0, 64, 8)).tobytes(), matrix.images[1].crop((0, 0, 64, 8)).tobytes())
+
+    def test_backend_from_config(self):
+        matrix = FakeMatrix()
+        self.assertIs(framebuffer_matrix(matrix, SimpleNamespace(render_backend="direct")), matrix)
+        self.assertIs(framebuffer_matrix(matrix, SimpleNamespace(render_backend="gpu")), matrix)
+        self.assertIs(framebuffer_matrix(matrix, SimpleNamespace()), matrix)
+        framebuffer = framebuffer_matrix(matrix, SimpleNamespace(render_backend="framebuffer"))
+        self.assertIsInstance(framebuffer, FramebufferMatrix)
+        self.assertEqual((framebuffer.width, framebuffer.height), (64, 32))
+        self.assertEqual(framebuffer.swaps, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import time
+import unittest
+
+from data.bart import BARTData
+from renderers.departures import DepartureRenderer
+from renderers.layers import StaticLayer, fill
+from tests.helpers import (
+    COLORS,
+    COORDINATES,
+    FakeCanvas,
+    FakeFonts,
+    FakeMatrix,
+    FakeTransport,
+    make_config,
+    trip_payload,
+)
+
+RED = {"r": 255, "g": 0, "b": 0}
+BLUE = {"r": 0, "g": 0, "b": 255}
+
+
+class RecordingCanvas:
+    width = 8
+    height = 4
+
+    def __init__(self):
+        self.images = []
+
+    def SetImage(self, image, x=0, y=0):
+        self.images.append((image.size, x, y))
+
+
+class DoubleBufferedMatrix(FakeMatrix):
+    """Swaps between two canvases like the real matrix"""
+
+    def __init__(self):
+        super().__init__()
+        self.back = FakeCanvas(self)
+
+    def SwapOnVSync(self, canvas):
+        self.swaps += 1
+        self.back, canvas = canvas, self.back
+        return canvas
+
+
+class WrappingMatrix(FakeMatrix):
+    """Hands back a new canvas object on every swap, like the driver's wrappers around its two buffers"""
+
+    def SwapOnVSync(self, canvas):
+        self.swaps += 1
+        return FakeCanvas(self)
+
+
+class TestStaticLayer(unittest.TestCase):
+    def setUp(self):
+        self.layer = StaticLayer(8, 4, [((0, 0, 8, 1), RED), ((0, 3, 8, 1), BLUE)])
+        self.canvas = RecordingCanvas()
+
+    def test_layer_is_drawn_once(self):
+        self.assertEqual(self.layer.image.getpixel((3, 0)), (255, 0, 0))
+        self.assertEqual(self.layer.image.getpixel((3, 1)), (0, 0, 0))
+        self.assertEqual(self.layer.image.getpixel((3, 3)), (0, 0, 255))
+        self.assertTrue(self.layer.paste(self.canvas))
+        self.assertFalse(self.layer.paste(self.canvas))
+        # The other buffer, behind a new wrapper, then this one again behind another
+        back = RecordingCanvas()
+        self.layer.swapped(self.canvas, back)
+        self.assertTrue(self.layer.paste(back))
+        front = RecordingCanvas()
+        self.layer.swapped(back, front)
+        self.assertFalse(self.layer.paste(front))
+        self.assertEqual(self.canvas.images, [((8, 4), 0, 0)])
+        self.assertEqual(back.images, [((8, 4), 0, 0)])
+
+    def test_single_buffer(self):
+        self.layer.paste(self.canvas)
+        box = (0, 1, 8, 2)
+        self.layer.update(self.canvas, "rows", box, ("5",))
+        self.layer.swapped(self.canvas, self.canvas)
+        self.assertFalse(self.layer.paste(self.canvas))
+        self.assertTrue(self.layer.update(self.canvas, "rows", box, ("4",)))
+        self.layer.swapped(self.canvas, self.canvas)
+        self.assertFalse(self.layer.update(self.canvas, "rows", box, ("4",)))
+
+    def test_regions_are_restored_only_when_their_content_changes(self):
+        self.layer.paste(self.canvas)
+        box = (0, 1, 8, 2)
+        self.assertTrue(self.layer.update(self.canvas, "rows", box, ("5",)))
+        self.assertFalse(self.layer.update(self.canvas, "rows", box, ("5",)))
+        self.assertTrue(self.layer.update(self.canvas, "rows", box, ("4",)))
+        self.assertEqual(self.canvas.images[1:], [((8, 2), 0, 1), ((8, 2), 0, 1)])
+
+        self.layer.invalidate()
+        self.assertTrue(self.layer.paste(self.canvas))
+        self.assertTrue(self.layer.update(self.canvas, "rows", box, ("4",)))
+
+    def test_fill(self):
+        fill(self.canvas, 2, 1, 3, 2, RED)
+        fill(self.canvas, 2, 1, 0, 2, RED)
+        self.assertEqual(self.canvas.images, [((3, 2), 2, 1)])
+
+
+class TestDepartureLayers(unittest.TestCase):
+    matrix_class = DoubleBufferedMatrix
+
+    def setUp(self):
+        self.now = time.time()
+        data = BARTData(make_config(time_format="24h"))
+        data.transport = FakeTransport([trip_payload(self.now, 5)])
+        data.font = FakeFonts()
+        data.update_departures()
+        with open(COORDINATES) as f:
+            coords = json.load(f)
+        with open(COLORS) as f:
+            colors = json.load(f)
+        self.matrix = self.matrix_class()
+        self.renderer = DepartureRenderer(self.matrix, data, colors, coords)
+
+    def calls(self, now):
+        calls = self.matrix.calls
+        self.renderer.render(now)
+        return self.matrix.calls - calls
+
+    def test_unchanged_regions_are_not_redrawn(self):
+        full = self.calls(self.now)
+        self.assertLess(full, 30)
+        self.assertEqual(self.calls(self.now), full)  # the second buffer
+        self.assertEqual(self.calls(self.now), 0)
+        # The row's countdown ticks from 5 to 4, the header clock stays put
+        self.assertLess(self.calls(self.now + 31), full)
+
+        self.renderer.invalidate()
+        self.assertEqual(self.calls(self.now + 31), full)
+        self.assertEqual(len(self.renderer.layer._drawn), 2)
+
+
+class TestWrappedBufferLayers(TestDepartureLayers):
+    matrix_class = WrappingMatrix
+
+
+if __name__ == "__main__":
+    unittest.main()
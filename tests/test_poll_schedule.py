@@ -0,0 +1,71 @@
+import datetime
+import unittest
+
+from data.bart import BARTData
+from data.poll_schedule import MAX_INTERVAL, MIN_INTERVAL, OPENING_LEAD, PollScheduler, ServiceCalendar
+from data.screens import ScreenType
+from tests.helpers import FakeTransport, make_config, trip_payload
+
+TUESDAY = datetime.date(2024, 3, 5)
+SATURDAY = datetime.date(2024, 3, 9)
+
+
+def at(hours, minutes=0, day=TUESDAY):
+    return datetime.datetime.combine(day, datetime.time(hours, minutes)).timestamp()
+
+
+class TestServiceCalendar(unittest.TestCase):
+    def test_service_hours(self):
+        calendar = ServiceCalendar("02:00")
+        self.assertTrue(calendar.is_open(at(12)))
+        self.assertTrue(calendar.is_open(at(1, 30)))  # the last trains of Monday's service
+        self.assertEqual(calendar.next_opening(at(3)), at(5))
+        self.assertEqual(calendar.next_opening(at(3, day=SATURDAY)), at(6, day=SATURDAY))
+        self.assertIsNone(calendar.next_opening(at(5)))
+
+    def test_end_of_day_before_midnight(self):
+        calendar = ServiceCalendar("23:30")
+        self.assertTrue(calendar.is_open(at(23)))
+        self.assertEqual(calendar.next_opening(at(23, 45)), at(5, day=TUESDAY + datetime.timedelta(days=1)))
+        self.assertEqual(calendar.next_opening(at(0, 15)), at(5))
+
+
+class TestPollScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = PollScheduler(ServiceCalendar("02:00"), "03:00", base_interval=30)
+
+    def test_interval_follows_the_nearest_departure(self):
+        self.assertEqual(self.scheduler.interval(at(12), at(12, 1)), MIN_INTERVAL)
+        self.assertEqual(self.scheduler.interval(at(12), at(12, 5)), 30)
+        self.assertEqual(self.scheduler.interval(at(12), at(12, 20)), MAX_INTERVAL)
+        self.assertEqual(self.scheduler.interval(at(12), None), 30)
+
+    def test_closed_hours_wait_for_the_full_refresh_then_the_opening(self):
+        self.assertEqual(self.scheduler.interval(at(2, 30), None), at(3) - at(2, 30))
+        self.assertTrue(self.scheduler.full_refresh_due(at(3)))
+        self.assertFalse(self.scheduler.full_refresh_due(at(3, 1)))
+        self.assertEqual(self.scheduler.interval(at(3), None), at(5) - OPENING_LEAD - at(3))
+        # Polling resumes shortly before the first trains
+        self.assertEqual(self.scheduler.interval(at(4, 50), None), 30)
+
+
+class TestBoardPolling(unittest.TestCase):
+    def make_data(self, now):
+        data = BARTData(make_config(end_of_day="02:00", full_refresh_time="03:00"))
+        data.transport = FakeTransport([trip_payload(now, 30)])
+        return data
+
+    def poll_overnight(self, data, start, end):
+        now = start
+        while now < end:
+            data.clock = lambda: now
+            data.update_departures()
+            now += 0.5
+
+    def test_overnight_polls_are_rare(self):
+        data = self.make_data(at(2, 5))
+        self.poll_overnight(data, at(2, 5), at(4, 30))
+        # One poll on waking and one full refresh, where the old fixed 30s rate made 290
+        self.assertEqual(data.transport.requests, 2)
+        self.assertEqual(data.scheduler.next_full_refresh, at(3, day=TUESDAY + datetime.timedelta(days=1)))
+        self.assertEqual(data.get_screen_type(), ScreenType.SYSTEM_OFFDAY)
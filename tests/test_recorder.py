@@ -0,0 +1,129 @@
+import os
+import tempfile
+import time
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from data.bart import BARTData
+from data.recorder import (
+    PayloadRecorder,
+    RecordingTransport,
+    ReplayResponse,
+    ReplayTransport,
+    read_recording,
+    shift_feed_times,
+)
+from tests.helpers import ALERTS, TRIP_UPDATES, FakeTransport, make_config, trip_payload
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".rec")
+        os.close(handle)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def record(self, *records):
+        recorder = PayloadRecorder(self.path)
+        for endpoint, payload, fetched_at in records:
+            recorder.record(endpoint, payload, fetched_at)
+        recorder.close()
+
+    def test_round_trip_and_append(self):
+        self.record((TRIP_UPDATES, b"first", 100.0))
+        self.record((ALERTS, b"", 101.0), (TRIP_UPDATES, b"second", 130.5))
+
+        records = list(read_recording(self.path))
+        self.assertEqual(
+            [(r.endpoint, r.payload, r.fetched_at) for r in records],
+            [(TRIP_UPDATES, b"first", 100.0), (ALERTS, b"", 101.0), (TRIP_UPDATES, b"second", 130.5)],
+        )
+
+    def test_truncated_tail_is_ignored(self):
+        self.record((TRIP_UPDATES, b"complete", 100.0), (TRIP_UPDATES, b"interrupted", 130.0))
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+
+        self.assertEqual([r.payload for r in read_recording(self.path)], [b"complete"])
+
+    def test_recording_transport_skips_failed_responses(self):
+        transport = FakeTransport([ReplayResponse(200, b"feed"), ReplayResponse(304), ReplayResponse(500, b"oops")])
+        recording = RecordingTransport(transport, PayloadRecorder(self.path))
+        for _ in range(3):
+            recording.get("https://api.bart.gov" + TRIP_UPDATES)
+        recording.close()
+
+        self.assertEqual([r.payload for r in read_recording(self.path)], [b"feed"])
+
+    def test_fast_replay_serves_each_payload_then_holds_the_last(self):
+        self.record((TRIP_UPDATES, b"a", 100.0), (TRIP_UPDATES, b"b", 130.0), (ALERTS, b"x", 101.0))
+        replay = ReplayTransport(self.path)
+
+        self.assertEqual(replay.clock(), 100.0)
+        self.assertEqual(replay.get("https://api.bart.gov" + TRIP_UPDATES).content, b"a")
+        self.assertEqual(replay.get("https://api.bart.gov" + TRIP_UPDATES).content, b"b")
+        self.assertEqual(replay.clock(), 130.0)
+        self.assertEqual(replay.get("https://api.bart.gov" + TRIP_UPDATES).content, b"b")
+        self.assertFalse(replay.finished())
+        replay.get("https://api.bart.gov" + ALERTS)
+        self.assertTrue(replay.finished())
+        self.assertEqual(replay.get("https://api.bart.gov/api/stn.aspx").status_code, 404)
+
+    def test_realtime_replay_follows_the_recording_offset(self):
+        self.record((TRIP_UPDATES, b"a", 100.0), (TRIP_UPDATES, b"b", 130.0))
+        replay = ReplayTransport(self.path, realtime=True)
+
+        replay.replay_start -= 10
+        self.assertEqual(replay.get(TRIP_UPDATES).content, b"a")
+        replay.replay_start -= 25
+        self.assertEqual(replay.get(TRIP_UPDATES).content, b"b")
+
+    def test_looping_moves_the_clock_and_feed_times_on(self):
+        self.record((TRIP_UPDATES, trip_payload(1000, 5), 1000.0), (TRIP_UPDATES, trip_payload(1030, 2), 1030.0))
+        replay = ReplayTransport(self.path, loop=True)
+        self.assertEqual(replay.loop_length, 60)
+        for _ in range(2):
+            replay.get(TRIP_UPDATES)
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.ParseFromString(replay.get(TRIP_UPDATES).content)
+        self.assertEqual(replay.clock(), 1060.0)
+        self.assertEqual(feed.header.timestamp, 1060)
+        self.assertEqual(feed.entity[0].trip_update.stop_time_update[0].arrival.time, 1000 + 330 + 60)
+        # Payloads that aren't feeds are served as recorded
+        self.assertEqual(shift_feed_times(b"<stations/>", 60), b"<stations/>")
+
+    def test_bart_data_keeps_departures_while_looping(self):
+        self.record((TRIP_UPDATES, trip_payload(1000, 5), 1000.0), (TRIP_UPDATES, trip_payload(1030, 2), 1030.0))
+        for realtime in (False, True):
+            with self.subTest(realtime=realtime):
+                data = BARTData(make_config(replay_file=self.path, replay_realtime=realtime, demo_mode=True))
+                replay = data.transport
+                boards = []
+                # Two loops and a bit, polling just after each recorded fetch
+                for step in range(5):
+                    if realtime:
+                        replay.replay_start = time.monotonic() - (step * 30 + 1)
+                        data.last_update = 0
+                    data.update_departures()
+                    now = data.clock()
+                    boards.append([d.minutes_at(now) for d in data.snapshot.station.departures])
+                self.assertEqual(boards, [[5], [2], [5], [2], [5]])
+
+    def test_bart_data_replays_departures(self):
+        self.record((TRIP_UPDATES, trip_payload(1000, 5), 1000.0), (TRIP_UPDATES, trip_payload(1030, 2), 1030.0))
+        data = BARTData(make_config(replay_file=self.path, replay_realtime=False))
+        station = data.stations["WCRK"]
+
+        data.update_departures()
+        self.assertEqual([d.minutes_at(data.clock()) for d in station.ordered_departures()], [5])
+        data.update_departures()
+        self.assertEqual([d.minutes_at(data.clock()) for d in station.ordered_departures()], [2])
+        self.assertEqual(data.snapshot.station.departures[0].minutes_at(data.clock()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+
+from data.bart import BARTData
+from data.shared_feed import MAGIC, SharedFeedReader, SharedFeedWriter, build_record
+from data.subscription import Subscription
+from tests.helpers import SYSTEM, FakeTransport, alerts_feed, make_config, trip_payload
+
+
+class TestSharedFeedFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "bart-feed")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_reader_sees_each_version_once(self):
+        reader = SharedFeedReader(self.path)
+        self.assertIsNone(reader.read())  # no fetcher yet
+
+        writer = SharedFeedWriter(self.path, capacity=4096)
+        self.assertIsNone(reader.read())  # nothing published yet
+        writer.publish({"stations": {"WCRK": ((1, 2),)}})
+        self.assertEqual(reader.read(), {"stations": {"WCRK": ((1, 2),)}})
+        self.assertIsNone(reader.read())
+        writer.publish({"stations": {}})
+        self.assertEqual(reader.read(), {"stations": {}})
+
+        with self.assertRaises(ValueError):
+            writer.publish({"stations": {"WCRK": ("x" * 5000,)}})
+        writer.close()
+        reader.close()
+
+    def test_record_being_written_is_skipped(self):
+        writer = SharedFeedWriter(self.path, capacity=4096)
+        writer.publish({"a": 1})
+        struct.pack_into("<Q", writer._map, len(MAGIC), writer.version + 1)
+        self.assertIsNone(SharedFeedReader(self.path).read())
+        writer.close()
+
+    def test_restarted_fetcher_keeps_counting(self):
+        writer = SharedFeedWriter(self.path, capacity=4096)
+        version = writer.publish({"a": 1})
+        writer.close()
+        self.assertGreater(SharedFeedWriter(self.path, capacity=4096).publish({"a": 2}), version)
+
+
+class TestSharedBoards(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "bart-feed")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_boards_read_what_the_fetcher_parsed(self):
+        now = time.time()
+        fetcher = BARTData(make_config(preferred_stations=None))
+        fetcher.subscription = Subscription()
+        fetcher.transport = FakeTransport([trip_payload(now, 5)], alerts=alerts_feed(SYSTEM).SerializeToString())
+        fetcher.update_departures()
+        fetcher.get_system_status()
+        writer = SharedFeedWriter(self.path)
+        writer.publish(build_record(fetcher))
+
+        boards = [BARTData(make_config(shared_feed=self.path)) for _ in range(3)]
+        for board in boards:
+            board.transport = FakeTransport()
+            board.update_departures()
+            self.assertEqual([d.minutes_at(now) for d in board.snapshot.station.departures], [5])
+            self.assertEqual(board.get_system_status()["ticker"], "Elevator outages")
+            self.assertFalse(board.network_issues)
+            self.assertEqual(board.transport.requests, 0)
+        self.assertEqual(fetcher.transport.requests, 2)
+        writer.close()
+
+    def test_stale_record_without_a_timetable_is_still_shown(self):
+        now = time.time()
+        fetcher = BARTData(make_config())
+        fetcher.transport = FakeTransport([trip_payload(now, 5)], alerts=alerts_feed(SYSTEM).SerializeToString())
+        fetcher.update_departures()
+        record = build_record(fetcher)
+        record["fetched_at"] = now - 3600
+        writer = SharedFeedWriter(self.path)
+        writer.publish(record)
+
+        board = BARTData(make_config(shared_feed=self.path))
+        board.transport = FakeTransport()
+        board.update_departures()
+        self.assertIsNone(board.timetable)
+        self.assertEqual(board.transport.requests, 0)
+        self.assertEqual([d.minutes_at(now) for d in board.snapshot.station.departures], [5])
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import threading
+import unittest
+
+from data.bart import BARTDeparture, BARTStation
+from data.snapshot import EMPTY_SNAPSHOT, SPARE_ROWS, DataSnapshot, SnapshotPublisher, freeze_status
+
+
+class TestSnapshotPublisher(unittest.TestCase):
+    def test_publish_bumps_version_and_keeps_other_fields(self):
+        publisher = SnapshotPublisher()
+        self.assertIs(publisher.current, EMPTY_SNAPSHOT)
+
+        first = publisher.publish(system_status=freeze_status({"status": "normal", "alerts": []}))
+        second = publisher.publish(weather=None)
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertIs(second.system_status, first.system_status)
+        self.assertIs(publisher.current, second)
+
+    def test_snapshots_are_read_only(self):
+        status = {"status": "alert", "alerts": [{"title": "Delays"}]}
+        snapshot = DataSnapshot.capture(1, system_status=status)
+        status["alerts"].append({"title": "Later change"})
+
+        self.assertEqual(len(snapshot.system_status["alerts"]), 1)
+        with self.assertRaises(TypeError):
+            snapshot.system_status["status"] = "normal"
+        with self.assertRaises(TypeError):
+            snapshot.system_status["alerts"][0]["title"] = "Changed"
+
+    def test_station_snapshot_is_detached_from_station(self):
+        station = BARTStation("Walnut Creek", "WCRK", "WCRK")
+        departures = [BARTDeparture("MLBR", 1000 + i * 60, "1", "N", "yellow", 10) for i in range(10)]
+        station.set_departures(list(reversed(departures)), limit=3)
+
+        snapshot = DataSnapshot.capture(1, station=station)
+        station.set_departures([], limit=3)
+        self.assertEqual(snapshot.station.departures, tuple(departures[: 3 + SPARE_ROWS]))
+
+    def test_concurrent_publishers(self):
+        publisher = SnapshotPublisher()
+
+        def publish_many():
+            for _ in range(500):
+                publisher.publish()
+
+        threads = [threading.Thread(target=publish_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(publisher.current.version, 2000)
+
+    def test_wait_wakes_on_publish(self):
+        publisher = SnapshotPublisher()
+        self.assertFalse(publisher.wait(0, timeout=0.01))
+        timer = threading.Timer(0.05, publisher.publish)
+        timer.start()
+        self.assertTrue(publisher.wait(0, timeout=5))
+        timer.join()
+        self.assertTrue(publisher.wait(0, timeout=0))
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from data.bart import BARTData, BARTDeparture
+from data.snapshot import DataSnapshot, StationSnapshot, WeatherSnapshot, freeze_status
+from data.snapshot_store import SnapshotStore
+from tests.helpers import FakeTransport, make_config, trip_payload
+
+NOW = 1700000000.0
+
+
+def make_snapshot(version=1, minutes=(3, 9)):
+    departures = tuple(BARTDeparture("Millbrae", NOW + m * 60 + 30, "2", "S", "yellow", 10) for m in minutes)
+    status = {"status": "alert", "alerts": [{"title": "Delays", "description": ""}], "ticker": "Delays"}
+    return DataSnapshot(
+        version,
+        NOW,
+        StationSnapshot("WCRK", "Walnut Creek", departures),
+        freeze_status(status),
+        WeatherSnapshot(61.0, "Fog", "fog"),
+    )
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "snapshot.bin")
+        self.store = SnapshotStore(self.path, write_interval=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.assertTrue(self.store.save(make_snapshot(), NOW))
+        restored = SnapshotStore(self.path).load(NOW + 120, BARTDeparture._make)
+
+        self.assertEqual(restored.station.saved_at, NOW)
+        self.assertEqual(restored.station.departures, make_snapshot().station.departures)
+        self.assertEqual(restored.system_status["ticker"], "Delays")
+        self.assertEqual(restored.system_status["alerts"][0]["title"], "Delays")
+        self.assertEqual(restored.weather, WeatherSnapshot(61.0, "Fog", "fog"))
+
+    def test_writes_are_rate_limited(self):
+        self.assertTrue(self.store.save(make_snapshot(1), NOW))
+        self.assertFalse(self.store.save(make_snapshot(1), NOW + 120))  # already written
+        self.assertFalse(self.store.save(make_snapshot(2), NOW + 30))
+        self.assertTrue(self.store.save(make_snapshot(2), NOW + 60))
+        self.assertFalse(self.store.save(make_snapshot(3, minutes=()), NOW + 300))  # nothing worth restoring
+        self.assertEqual(self.store.writes, 2)
+
+    def test_missing_corrupt_and_old_snapshots_are_ignored(self):
+        self.assertIsNone(self.store.load(NOW))
+        with open(self.path, "wb") as f:
+            f.write(b"BARTSS01garbage")
+        self.assertIsNone(self.store.load(NOW))
+
+        self.store.save(make_snapshot(), NOW)
+        self.assertIsNone(self.store.load(NOW + self.store.max_age + 1))
+
+
+class TestWarmStart(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "snapshot.bin")
+        SnapshotStore(self.path).save(make_snapshot(minutes=(-2, 3, 9)), NOW - 90)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_board_starts_from_the_saved_snapshot(self):
+        transport = FakeTransport([trip_payload(NOW, 4)])
+        transport.clock = lambda: NOW
+        data = BARTData(make_config(snapshot_file=self.path))
+        data.transport = transport
+        data.clock = transport.clock
+
+        # Shown before any fetch, aged, and without the train that left since
+        self.assertTrue(data.restore_snapshot(NOW))
+        station = data.snapshot.station
+        self.assertEqual(station.saved_at, NOW - 90)
+        self.assertEqual([d.minutes_at(NOW) for d in station.departures], [3, 9])
+        self.assertEqual(data.snapshot.weather.conditions, "Fog")
+        self.assertFalse(data.trip_policy.stale(NOW))
+
+        # Fresh departures replace it
+        data.update_departures()
+        self.assertIsNone(data.snapshot.station.saved_at)
+        self.assertEqual([d.minutes_at(NOW) for d in data.snapshot.station.departures], [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
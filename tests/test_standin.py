@@ -0,0 +1,80 @@
+import random
+import time
+import unittest
+
+import requests
+from google.protobuf.message import DecodeError
+from google.transit import gtfs_realtime_pb2
+
+from benchmarks.gtfs_standin import ALERTS, TRIP_UPDATES, FaultProfile, PayloadSource, StandInServer, parse_latency
+from data.bart import BARTData
+from data.transport import BARTTransport
+from tests.helpers import make_config
+
+
+class TestStandIn(unittest.TestCase):
+    def start(self, fast_decoder=None, **faults):
+        self.server = StandInServer(
+            ("127.0.0.1", 0), PayloadSource(trips=40, stops_per_trip=10), FaultProfile(**faults)
+        )
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.data = BARTData(make_config(bart_api_base=self.server.base_url, fast_decoder=fast_decoder))
+        self.data.transport = BARTTransport("", connect_timeout=1, read_timeout=0.5)
+        self.addCleanup(self.data.transport.close)
+
+    def departures(self):
+        return sum(len(station.departures) for station in self.data.stations.values())
+
+    def test_healthy_feed(self):
+        self.start()
+        self.data.update_departures()
+        self.assertGreater(self.departures(), 0)
+        self.assertEqual(self.data.get_system_status()["status"], "normal")
+        self.assertEqual(self.server.stats.counts, {"ok": 2})
+
+    def test_faults_keep_the_last_good_departures(self):
+        # The fast decoder is only on by default for pure Python protobuf, so run both explicitly
+        for fast_decoder in (False, True):
+            with self.subTest(fast_decoder=fast_decoder):
+                self.start(fast_decoder=fast_decoder)
+                self.data.update_departures()
+                before = self.departures()
+
+                for fault in ("error_rate", "truncate_rate", "garbage_rate", "drop_rate", "slow_drip_rate"):
+                    self.server.faults = FaultProfile(drip_chunk=16, drip_interval=0.3, **{fault: 1.0})
+                    self.data.last_update = 0
+                    self.data.trip_policy.next_attempt = 0  # skip the backoff
+                    self.data.update_departures()
+                    self.assertEqual(self.departures(), before, fault)
+
+                self.assertEqual(
+                    set(self.server.stats.counts), {"ok", "error", "truncated", "garbage", "dropped", "slow_drip"}
+                )
+
+    def test_faulty_bodies(self):
+        self.start(garbage_rate=0.5, truncate_rate=0.5)
+        for _ in range(4):
+            response = requests.get(self.server.base_url + TRIP_UPDATES, timeout=2)
+            with self.assertRaises(DecodeError):
+                gtfs_realtime_pb2.FeedMessage().ParseFromString(response.content)
+
+    def test_latency(self):
+        self.start(latency=parse_latency("fixed:0.2"))
+        start = time.monotonic()
+        requests.get(self.server.base_url + ALERTS, timeout=2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_parse_latency(self):
+        rng = random.Random(1)
+        self.assertEqual(parse_latency("fixed:0.5")(rng), 0.5)
+        self.assertTrue(0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2)
+        self.assertGreater(parse_latency("lognormal:-2.3,0.8")(rng), 0)
+        with self.assertRaises(ValueError):
+            parse_latency("bimodal:1,2")
+
+
+if __name__ == "__main__":
+    unittest.main()
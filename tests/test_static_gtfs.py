@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from google.transit import gtfs_realtime_pb2
+
+from data.bart import DEFAULT_DIRECTION, BARTData
+from data.static_gtfs import CACHE_SUFFIX, StaticGTFS, nearest_line_color
+from tests.helpers import GTFS_FILES, make_config, write_gtfs
+
+
+class TestStaticGTFS(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "google_transit.zip")
+        write_gtfs(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_tables(self):
+        static = StaticGTFS.from_zip(self.path)
+        self.assertEqual(static.line_color("1"), "yellow")
+        self.assertEqual(static.line_color("7"), "red")
+        self.assertIsNone(static.line_color("99"))
+        # The grey Oakland Airport line has no palette entry
+        self.assertIsNone(static.line_color("20"))
+
+        self.assertEqual(static.headsign("T100"), "San Francisco International Airport / Millbrae")
+        self.assertEqual(static.headsign("T200"), "Walnut Creek")  # named after its last stop
+        self.assertEqual(static.trips["T100"], ("1", "San Francisco International Airport / Millbrae"))
+
+        self.assertEqual(static.station_for("WCRK_2"), "WCRK")
+        self.assertEqual(static.station_for("OAKL"), "OAKL")
+        self.assertEqual(static.station_for("UNKNOWN"), "UNKNOWN")
+        self.assertEqual(static.platform("WCRK_2"), "2")
+        self.assertEqual(static.stations, {"WCRK": "Walnut Creek", "MLBR": "Millbrae"})
+
+    def test_nearest_line_color(self):
+        self.assertEqual(nearest_line_color("0099CC"), "blue")
+        self.assertEqual(nearest_line_color("339933"), "green")
+        self.assertEqual(nearest_line_color("FF9933"), "orange")
+        for far in ("D5CFA3", "FFFFFF", "000000"):
+            self.assertIsNone(nearest_line_color(far), far)
+        self.assertIsNone(nearest_line_color(""))
+        self.assertIsNone(nearest_line_color("not a color"))
+
+    def test_cache_is_used_until_the_zip_changes(self):
+        static = StaticGTFS.load(self.path)
+        cache = self.path + CACHE_SUFFIX
+        self.assertTrue(os.path.exists(cache))
+
+        from_cache = StaticGTFS.load(self.path)
+        self.assertEqual(from_cache.trips, static.trips)
+        self.assertEqual(from_cache.stop_platforms, static.stop_platforms)
+
+        files = dict(GTFS_FILES, **{"routes.txt": ["route_id,route_color", "1,0099CC"]})
+        write_gtfs(self.path, files)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(StaticGTFS.load(self.path).line_color("1"), "blue")
+
+    def test_corrupt_cache_is_rebuilt(self):
+        with open(self.path + CACHE_SUFFIX, "wb") as f:
+            f.write(b"garbage")
+        self.assertEqual(StaticGTFS.load(self.path).line_color("7"), "red")
+
+    def test_departures_resolve_through_tables(self):
+        data = BARTData(make_config(static_gtfs=self.path))
+        now = time.time()
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.header.gtfs_realtime_version = "2.0"
+        entity = feed.entity.add()
+        entity.id = "T100"
+        entity.trip_update.trip.trip_id = "T100"
+        entity.trip_update.trip.route_id = "1"
+        update = entity.trip_update.stop_time_update.add()
+        update.stop_id = "WCRK_2"
+        update.arrival.time = int(now) + 300
+
+        data._apply_entities(feed, now)
+        (departure,) = data.stations["WCRK"].ordered_departures()
+        self.assertEqual(departure.destination_name, "San Francisco International Airport / Millbrae")
+        self.assertEqual((departure.platform, departure.direction, departure.line_color), ("2", DEFAULT_DIRECTION, "yellow"))
+        self.assertEqual(data.get_line_color("20"), "white")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from benchmarks.synthetic import BOTH, DEPARTURE, STATION_IDS, build_feed
+
+
+class TestSyntheticFeeds(unittest.TestCase):
+    def stop_time_updates(self, feed):
+        return [update for entity in feed.entity for update in entity.trip_update.stop_time_update]
+
+    def test_size_and_unknown_stops(self):
+        feed = build_feed(50, 8, now=1700000000, unknown_share=0.25)
+        updates = self.stop_time_updates(feed)
+        self.assertEqual(len(feed.entity), 50)
+        self.assertEqual(len(updates), 400)
+
+        unknown = sum(update.stop_id not in STATION_IDS for update in updates)
+        self.assertTrue(60 < unknown < 140, unknown)
+        self.assertEqual(build_feed(50, 8, now=1700000000), build_feed(50, 8, now=1700000000))
+
+    def test_time_modes(self):
+        for update in self.stop_time_updates(build_feed(5, 4, now=1700000000)):
+            self.assertTrue(update.HasField("arrival"))
+            self.assertFalse(update.HasField("departure"))
+        for update in self.stop_time_updates(build_feed(5, 4, now=1700000000, time_mode=DEPARTURE)):
+            self.assertFalse(update.HasField("arrival"))
+            self.assertTrue(update.HasField("departure"))
+        for update in self.stop_time_updates(build_feed(5, 4, now=1700000000, time_mode=BOTH)):
+            self.assertEqual(update.departure.time - update.arrival.time, 30)
+        with self.assertRaises(ValueError):
+            build_feed(1, 1, time_mode="dwell")
+
+
+if __name__ == "__main__":
+    unittest.main()
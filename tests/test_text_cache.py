@@ -0,0 +1,73 @@
+import unittest
+
+from renderers.frame_pacing import FramePacer
+from renderers.framebuffer import BitmapFonts, FramebufferCanvas
+from renderers.text_cache import TextCache, rasterize
+
+FONTS = BitmapFonts()
+WHITE = (255, 255, 255)
+
+
+class TestTextCache(unittest.TestCase):
+    def setUp(self):
+        self.font = FONTS.get_font("4x6")
+        self.cache = TextCache()
+
+    def test_cached_text_matches_glyph_by_glyph(self):
+        for name in ("4x6", "6x9", "7x13"):
+            with self.subTest(font=name):
+                font = FONTS.get_font(name)
+                for x, y in ((2, 20), (-9, 3), (50, 34)):
+                    plain = FramebufferCanvas(64, 32)
+                    cached = FramebufferCanvas(64, 32, self.cache)
+                    for canvas in (plain, cached):
+                        canvas.Fill(0, 0, 128)
+                        canvas.SetFont(font)
+                    self.assertEqual(
+                        cached.DrawText(cached, "Pittsburg gy 12:05", x, y, 255, 0, 0),
+                        plain.DrawText(plain, "Pittsburg gy 12:05", x, y, 255, 0, 0),
+                    )
+                    self.assertEqual(cached.pixels.tolist(), plain.pixels.tolist())
+
+    def test_hits_and_misses(self):
+        self.cache.get(self.font, "Dest", WHITE)
+        self.cache.get(self.font, "Dest", WHITE)
+        self.cache.get(self.font, "Dest", (255, 0, 0))
+        self.cache.get(FONTS.get_font("6x9"), "Dest", WHITE)
+        self.assertEqual(self.cache.report(), (1, 3, 0))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+        self.assertEqual(len(self.cache.entries), 3)
+
+    def test_least_recently_drawn_is_evicted(self):
+        size = rasterize(self.font, "Min", WHITE).nbytes
+        self.cache = TextCache(max_bytes=2 * size)
+        self.cache.get(self.font, "Min", WHITE)
+        self.cache.get(self.font, "Dst", WHITE)
+        self.cache.get(self.font, "Min", WHITE)
+        self.cache.get(self.font, "Plt", WHITE)
+        self.assertEqual([key[1] for key in self.cache.entries], ["Min", "Plt"])
+        self.assertEqual((self.cache.nbytes, self.cache.evictions), (2 * size, 1))
+
+    def test_strings_bigger_than_the_cache_are_drawn_uncached(self):
+        self.cache = TextCache(max_bytes=1024)
+        canvas = FramebufferCanvas(64, 32, self.cache)
+        canvas.SetFont(self.font)
+        self.assertIsNone(self.cache.get(self.font, "x" * 200, WHITE))
+        self.assertEqual(canvas.DrawText(canvas, "x" * 200, 0, 10, 255, 255, 255), 800)
+        self.assertTrue(canvas.pixels.any())
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_blank_text_still_advances(self):
+        bitmap = self.cache.get(self.font, "  ", WHITE)
+        self.assertEqual((bitmap.mask.size, bitmap.advance), (0, 8))
+
+    def test_reported_with_the_frame_rates(self):
+        pacer = FramePacer()
+        pacer.reports.append(self.cache.report)
+        self.cache.get(self.font, "Dest", WHITE)
+        pacer.report()
+        self.assertEqual(self.cache.misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
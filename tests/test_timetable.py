@@ -0,0 +1,123 @@
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from data import timetable
+from data.bart import BARTData
+from data.timetable import TIMETABLE_SUFFIX, Timetable, parse_gtfs_time
+from tests.helpers import GTFS_FILES, make_config, write_gtfs
+
+TODAY = datetime.date.today()
+WEEKDAY_FLAGS = ",".join("1" if day == TODAY.weekday() else "0" for day in range(7))
+ALL_DAYS = ",".join("1" for _ in range(7))
+DATE_RANGE = "20200101,20991231"
+
+TIMETABLE_FILES = dict(
+    GTFS_FILES,
+    **{
+        "calendar.txt": [
+            "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date",
+            f"TODAY,{WEEKDAY_FLAGS},{DATE_RANGE}",
+            f"HOLIDAY,{ALL_DAYS},{DATE_RANGE}",
+        ],
+        "calendar_dates.txt": [
+            "service_id,date,exception_type",
+            f"HOLIDAY,{TODAY:%Y%m%d},2",
+        ],
+        "trips.txt": [
+            "route_id,service_id,trip_id,trip_headsign,direction_id",
+            "1,TODAY,T100,Millbrae,1",
+            "7,TODAY,T200,Richmond,0",
+            "1,TODAY,T300,Millbrae,1",
+            "1,HOLIDAY,T400,Millbrae,1",
+        ],
+        "stop_times.txt": [
+            "trip_id,arrival_time,departure_time,stop_id,stop_sequence",
+            "T100,07:00:00,07:00:30,WCRK_2,1",
+            "T100,07:40:00,07:40:00,MLBR_1,2",
+            "T200,06:50:00,06:50:30,WCRK_1,1",
+            "T300,24:10:00,24:10:30,WCRK_2,1",
+            "T400,07:05:00,07:05:30,WCRK_2,1",
+        ],
+    },
+)
+
+
+def at(hours, minutes=0, day=TODAY):
+    midnight = time.mktime(day.timetuple())
+    return midnight + hours * 3600 + minutes * 60
+
+
+class TestTimetable(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "google_transit.zip")
+        write_gtfs(self.path, TIMETABLE_FILES)
+        self.timetable = Timetable.load(self.path)
+
+    def tearDown(self):
+        self.timetable.close()
+        shutil.rmtree(self.directory)
+
+    def test_parse_gtfs_time(self):
+        self.assertEqual(parse_gtfs_time("07:00:30"), 7 * 3600 + 30)
+        self.assertEqual(parse_gtfs_time("25:01:00"), 25 * 3600 + 60)
+        self.assertIsNone(parse_gtfs_time(""))
+
+    def test_next_departures(self):
+        departures = self.timetable.next_departures("WCRK", at(6, 0), 2)
+        self.assertEqual([d.departure_time for d in departures], [at(6, 50) + 30, at(7, 0) + 30])
+        self.assertEqual(departures[0][1:], ("7", "Richmond", "1"))
+        self.assertEqual(departures[1][1:], ("1", "Millbrae", "2"))
+
+        # The holiday service is removed today, and the 24:10 trip runs just after midnight
+        later = self.timetable.next_departures("WCRK", at(7, 1), 5)
+        self.assertEqual([d.departure_time for d in later], [at(24, 10) + 30])
+        self.assertEqual(self.timetable.next_departures("ORIN", at(6, 0), 3), [])
+
+    def test_after_midnight_uses_yesterdays_service(self):
+        tomorrow = TODAY + datetime.timedelta(days=1)
+        departures = self.timetable.next_departures("WCRK", at(0, 5, day=tomorrow), 1)
+        self.assertEqual([d.departure_time for d in departures], [at(24, 10) + 30])
+
+    def test_labels_past_the_short_column_get_wide_indexes(self):
+        self.timetable.close()
+        os.remove(self.path + TIMETABLE_SUFFIX)
+        with mock.patch.object(timetable, "SHORT_LABEL_LIMIT", 2):
+            self.timetable = Timetable.load(self.path)
+        self.assertGreater(len(self.timetable.labels), 2)
+        self.assertEqual(self.timetable.label_indexes.format, "I")
+        departures = self.timetable.next_departures("WCRK", at(6, 0), 2)
+        self.assertEqual([d[1:] for d in departures], [("7", "Richmond", "1"), ("1", "Millbrae", "2")])
+
+    def test_compiled_file_is_reused(self):
+        path = self.path + TIMETABLE_SUFFIX
+        modified = os.stat(path).st_mtime_ns
+        reloaded = Timetable.load(self.path)
+        self.assertEqual(os.stat(path).st_mtime_ns, modified)
+        self.assertEqual(reloaded.labels, self.timetable.labels)
+        reloaded.close()
+
+    def test_board_falls_back_to_the_timetable(self):
+        data = BARTData(make_config(static_gtfs=self.path))
+        data.clock = lambda: at(6, 0)
+        data.show_timetable(data.clock())
+
+        snapshot = data.snapshot.station
+        self.assertTrue(data.using_timetable)
+        self.assertTrue(snapshot.scheduled)
+        self.assertEqual([d.destination_name for d in snapshot.departures][:2], ["Richmond", "Millbrae"])
+
+        # Back on the realtime feed, the board is no longer marked as scheduled
+        data._leave_timetable(data.clock())
+        data.publish_station()
+        self.assertFalse(data.using_timetable)
+        self.assertFalse(data.snapshot.station.scheduled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import gzip
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from data.transport import BARTTransport
+
+BODY = b"departures" * 100
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        self.server.clients.add(self.client_address)
+        body = BODY
+        self.send_response(200)
+        if self.path.startswith("/drip"):
+            # A few bytes at a time, each well within the read timeout
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                for start in range(0, len(body), 16):
+                    self.wfile.write(body[start : start + 16])  # noqa: E203
+                    self.wfile.flush()
+                    time.sleep(0.2)
+            except ConnectionError:
+                pass  # the client gave up
+            return
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.paths = []
+        self.server.clients = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.transport = BARTTransport("KEY", connect_timeout=1, read_timeout=1)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive_and_compression(self):
+        for _ in range(3):
+            response = self.transport.get(self.base + "/gtfsrt/tripupdate.aspx")
+            self.assertEqual(response.content, BODY)
+        self.transport.get(self.base + "/gtfsrt/alerts.aspx")
+
+        # Every request reused one pooled connection
+        self.assertEqual(len(self.server.clients), 1)
+        self.assertTrue(all("api_key=KEY" in path for path in self.server.paths))
+
+        trips = self.transport.stats["/gtfsrt/tripupdate.aspx"]
+        self.assertEqual(trips.requests, 3)
+        self.assertEqual(trips.bytes, 3 * len(BODY))
+        self.assertLess(trips.wire_bytes, trips.bytes)
+        self.assertEqual(self.transport.stats["/gtfsrt/alerts.aspx"].requests, 1)
+
+    def test_failure_counted(self):
+        # Nothing listens on a port we just released
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        url = "http://127.0.0.1:{}/gtfsrt/tripupdate.aspx".format(probe.getsockname()[1])
+        probe.close()
+
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.get(url)
+        self.assertEqual(self.transport.endpoint_stats(url).failures, 1)
+        self.assertEqual(self.transport.endpoint_stats(url).requests, 0)
+
+    def test_slow_body_stops_at_the_deadline(self):
+        start = time.monotonic()
+        with self.assertRaises(requests.Timeout):
+            self.transport.get(self.base + "/drip", deadline=1)
+        # Not once the whole body has dripped in, about 13 seconds
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(self.transport.endpoint_stats(self.base + "/drip").failures, 1)